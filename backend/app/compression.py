@@ -0,0 +1,194 @@
+"""HTTP response compression with gzip and brotli.
+
+:class:`CompressionMiddleware` picks an encoding from the request's
+``Accept-Encoding`` header and compresses text-like responses of at least
+``compression_minimum_size`` bytes. Complete bodies are compressed in one go;
+streamed bodies (NDJSON/CSV exports) chunk by chunk, flushing after every
+chunk so rows keep arriving as they are produced.
+
+Responses that already carry a ``Content-Encoding`` are passed through, which
+lets handlers send precompressed bytes (see the assignment cache) without the
+middleware compressing them again. Brotli is used when the ``brotli`` package
+is installed, gzip otherwise.
+"""
+
+import gzip
+import zlib
+from typing import Any
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Media types worth compressing; Parquet, Arrow and images are already dense
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def available_encodings() -> tuple[str, ...]:
+    """Encodings the server can produce, in order of preference."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Pick the best supported encoding from an ``Accept-Encoding`` header.
+
+    Returns None when the client accepts none of them (or sent no header).
+    Equal quality values are resolved by server preference, brotli first.
+    """
+    if not accept_encoding:
+        return None
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if name:
+            weights[name.strip().lower()] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in available_encodings():
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a complete body with the given encoding."""
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.compression_brotli_quality)
+    return gzip.compress(body, compresslevel=settings.compression_gzip_level, mtime=0)
+
+
+def is_compressible(content_type: str | None) -> bool:
+    """Check whether a media type is worth compressing."""
+    return bool(content_type) and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class _StreamCompressor:
+    """Incremental compressor that flushes everything it was given so far."""
+
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor: Any = brotli.Compressor(
+                quality=settings.compression_brotli_quality
+            )
+        else:
+            self._compressor = zlib.compressobj(
+                settings.compression_gzip_level, zlib.DEFLATED, zlib.MAX_WBITS | 16
+            )
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with gzip or brotli."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder)
+
+
+class _CompressionResponder:
+    """Wraps ``send`` and decides per response whether to compress it."""
+
+    def __init__(self, send: Send, encoding: str, minimum_size: int) -> None:
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start: Message | None = None
+        self.compressor: _StreamCompressor | None = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = "content-encoding" in headers or not is_compressible(
+                headers.get("content-type")
+            )
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.start is not None:
+            await self._send_start(message)
+        elif self.compressor is not None:
+            body = self.compressor.compress(message.get("body", b""))
+            more_body = message.get("more_body", False)
+            if not more_body:
+                body += self.compressor.finish()
+            await self.send(
+                {"type": "http.response.body", "body": body, "more_body": more_body}
+            )
+        else:
+            await self.send(message)
+
+    async def _send_start(self, message: Message) -> None:
+        """Send the held start message with the first body message."""
+        start, self.start = self.start, None
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.passthrough or (not more_body and len(body) < self.minimum_size):
+            await self.send(start)
+            await self.send(message)
+            return
+
+        headers = MutableHeaders(raw=start["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if more_body:
+            del headers["Content-Length"]
+            self.compressor = _StreamCompressor(self.encoding)
+            body = self.compressor.compress(body)
+        else:
+            body = compress(body, self.encoding)
+            headers["Content-Length"] = str(len(body))
+
+        await self.send(start)
+        await self.send(
+            {"type": "http.response.body", "body": body, "more_body": more_body}
+        )
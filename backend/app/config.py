@@ -42,6 +42,10 @@ class Settings(BaseSettings):
         description="MySQL database connection URL",
     )
     database_echo: bool = Field(default=False, description="Echo SQL queries")
+    database_async: bool = Field(
+        default=False,
+        description="Use the async MySQL driver (aiomysql) for dispatcher queries",
+    )
 
     # MySQL specific settings
     mysql_host: str = Field(default="localhost", description="MySQL host")
@@ -70,6 +74,96 @@ class Settings(BaseSettings):
     default_page_size: int = Field(default=20, description="Default page size")
     max_page_size: int = Field(default=100, description="Maximum page size")
 
+    # Assignment cache settings
+    assignment_cache_enabled: bool = Field(
+        default=True, description="Cache serialized assignment responses"
+    )
+    assignment_cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024, description="Assignment cache memory budget (64MB)"
+    )
+    assignment_cache_revalidate_seconds: float = Field(
+        default=2.0,
+        description="How long a date fingerprint is trusted before re-querying",
+    )
+    delta_sync_max_lists: int = Field(
+        default=512, description="Assignment lists whose snapshots are kept"
+    )
+    delta_sync_versions: int = Field(
+        default=8, description="Snapshots kept per list for since= delta requests"
+    )
+
+    # Response compression settings
+    compression_enabled: bool = Field(
+        default=True, description="Compress responses with gzip or brotli"
+    )
+    compression_minimum_size: int = Field(
+        default=1024, description="Responses smaller than this are sent uncompressed"
+    )
+    compression_gzip_level: int = Field(default=6, description="gzip level (1-9)")
+    compression_brotli_quality: int = Field(
+        default=5, description="Brotli quality (0-11)"
+    )
+
+    # Admin table browser settings
+    table_count_cache_ttl_seconds: int = Field(
+        default=600, description="How long exact table row counts stay fresh"
+    )
+    admin_engine_pool_size: int = Field(
+        default=2, description="Pool size of each per-database admin engine"
+    )
+    admin_engine_max_overflow: int = Field(
+        default=2, description="Extra connections per-database admin engines may open"
+    )
+    admin_engine_idle_seconds: int = Field(
+        default=600, description="Dispose per-database engines unused for this long"
+    )
+    admin_engine_max_count: int = Field(
+        default=16, description="Maximum number of per-database engines kept open"
+    )
+    table_export_chunk_rows: int = Field(
+        default=2000, description="Rows fetched per chunk by streaming table exports"
+    )
+
+    # Text encoding settings
+    encoding_repair_cache_size: int = Field(
+        default=8192, description="Distinct strings kept by the mojibake repair cache"
+    )
+    encoding_repair_on_read: bool = Field(
+        default=True,
+        description="Repair mojibake in responses; disable once the data is clean",
+    )
+
+    # Metrics settings
+    metrics_enabled: bool = Field(
+        default=True, description="Collect metrics and expose them at /metrics"
+    )
+    metrics_loop_lag_interval_seconds: float = Field(
+        default=0.5, description="How often event loop lag is sampled"
+    )
+
+    # Daily statistics settings
+    daily_stats_enabled: bool = Field(
+        default=True, description="Serve statistics from the daily summary tables"
+    )
+    daily_stats_refresh_seconds: float = Field(
+        default=60.0, description="How often changed dates are re-summarized"
+    )
+    daily_stats_refresh_days: int = Field(
+        default=7, description="Past days checked for changes on each refresh"
+    )
+
+    # Change stream settings
+    change_stream_poll_seconds: float = Field(
+        default=2.0, description="How often a watched date is checked for changes"
+    )
+    change_stream_heartbeat_seconds: float = Field(
+        default=15.0, description="Idle time after which a keep-alive is sent"
+    )
+    change_stream_queue_size: int = Field(
+        default=100,
+        description="Events a slow client may fall behind before it must resync",
+    )
+
     # File upload settings
     upload_dir: str = Field(default="uploads", description="Upload directory")
     max_file_size: int = Field(
@@ -100,6 +194,14 @@ class Settings(BaseSettings):
             return self.database_url
         return self.mysql_url
 
+    @property
+    def async_database_url(self) -> str:
+        """Get effective database URL with the async MySQL driver."""
+        scheme, _, rest = self.effective_database_url.partition("://")
+        if scheme.startswith("mysql"):
+            scheme = "mysql+aiomysql"
+        return f"{scheme}://{rest}"
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -1,24 +1,68 @@
 """Database configuration and connection setup."""
 
-from collections.abc import Generator
+import asyncio
+import threading
+import time
+from collections.abc import AsyncGenerator, Callable, Generator, Sequence
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, TypeVar
 
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, Executable, Row, create_engine, event, make_url
 from sqlalchemy.orm import Session, sessionmaker
 
 from .config import settings
+from .metrics import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    instrument_engine,
+)
 from .models.base import Base
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+T = TypeVar("T")
+
 # Create database engine
 engine = create_engine(
     settings.effective_database_url,
     echo=settings.database_echo,
     pool_pre_ping=True,
+    poolclass=InstrumentedQueuePool,
     # MySQL connection settings
     connect_args={"charset": "utf8mb4"}
     if "mysql" in settings.effective_database_url
     else {},
 )
 
+
+def _create_async_engine() -> "AsyncEngine | None":
+    """Create the aiomysql engine when DATABASE_ASYNC is enabled."""
+    if not settings.database_async:
+        return None
+
+    # Imported lazily: the asyncio extension needs greenlet and aiomysql
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    return create_async_engine(
+        settings.async_database_url,
+        echo=settings.database_echo,
+        pool_pre_ping=True,
+        poolclass=InstrumentedAsyncQueuePool,
+        connect_args={"charset": "utf8mb4"}
+        if "mysql" in settings.async_database_url
+        else {},
+    )
+
+
+# Async engine (aiomysql), None when the sync path is configured
+async_engine = _create_async_engine()
+
+if settings.metrics_enabled:
+    instrument_engine(engine, pool_label="main")
+    if async_engine is not None:
+        instrument_engine(async_engine.sync_engine, pool_label="main_async")
+
 # Create session factory
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -27,12 +71,232 @@ SessionLocal = sessionmaker(
 )
 
 
+def quote_identifier(name: str) -> str:
+    """Quote a MySQL identifier, escaping embedded backticks."""
+    return "`" + name.replace("`", "``") + "`"
+
+
+def qualified_name(database_name: str, table_name: str) -> str:
+    """Build a schema-qualified ``database.table`` reference."""
+    return f"{quote_identifier(database_name)}.{quote_identifier(table_name)}"
+
+
+@dataclass
+class RegisteredEngine:
+    """Engine bound to one database together with its usage counters."""
+
+    database_name: str
+    engine: Engine
+    async_engine: "AsyncEngine | None" = None
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    active: int = 0
+    uses: int = 0
+    connects: int = 0
+    checkouts: int = 0
+    checked_out: int = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Return usage counters and pool state of this engine."""
+        now = time.monotonic()
+        return {
+            "database": self.database_name,
+            "async": self.async_engine is not None,
+            "age_seconds": round(now - self.created_at, 1),
+            "idle_seconds": round(now - self.last_used, 1),
+            "active_calls": self.active,
+            "uses": self.uses,
+            "connections_opened": self.connects,
+            "checkouts": self.checkouts,
+            "checked_out": self.checked_out,
+            "pool": self.engine.pool.status(),
+        }
+
+
+class EngineRegistry:
+    """Lazily created engines, one per database, each with a small own pool.
+
+    Admin endpoints browse arbitrary databases. Switching the default schema
+    with ``USE`` on a connection of the shared pool leaks into whichever
+    request borrows it next, so every database gets its own engine instead,
+    and queries use schema-qualified names. Engines unused for
+    ``idle_seconds`` are disposed, and at most ``max_engines`` are kept.
+    """
+
+    def __init__(
+        self,
+        pool_size: int,
+        max_overflow: int,
+        idle_seconds: float,
+        max_engines: int,
+    ) -> None:
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.idle_seconds = idle_seconds
+        self.max_engines = max_engines
+        self._entries: dict[str, RegisteredEngine] = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evictions = 0
+
+    def acquire(self, database_name: str) -> RegisteredEngine:
+        """Return the engine of a database, creating it on first use.
+
+        Every call must be paired with :meth:`release`; engines with active
+        calls are never evicted.
+        """
+        with self._lock:
+            entry = self._entries.get(database_name)
+            if entry is None:
+                if len(self._entries) >= self.max_engines:
+                    raise RuntimeError(
+                        f"Too many database engines open ({self.max_engines})"
+                    )
+                entry = self._create(database_name)
+                self._entries[database_name] = entry
+                self.created += 1
+            entry.active += 1
+            entry.uses += 1
+            entry.last_used = time.monotonic()
+            return entry
+
+    def release(self, entry: RegisteredEngine) -> None:
+        """Mark a call started with :meth:`acquire` as finished."""
+        with self._lock:
+            entry.active -= 1
+            entry.last_used = time.monotonic()
+
+    def pop_idle(self, incoming: str | None = None) -> list[RegisteredEngine]:
+        """Unregister idle engines and return them for disposal.
+
+        When ``incoming`` names a database without an engine, the least
+        recently used unused engines are also evicted to make room for it.
+        """
+        now = time.monotonic()
+        with self._lock:
+            unused = sorted(
+                (entry for entry in self._entries.values() if entry.active == 0),
+                key=lambda entry: entry.last_used,
+            )
+            evicted = [
+                entry for entry in unused if now - entry.last_used > self.idle_seconds
+            ]
+            if incoming is not None and incoming not in self._entries:
+                excess = len(self._entries) - len(evicted) - self.max_engines + 1
+                remaining = [entry for entry in unused if entry not in evicted]
+                evicted.extend(remaining[: max(excess, 0)])
+            for entry in evicted:
+                del self._entries[entry.database_name]
+            self.evictions += len(evicted)
+        return evicted
+
+    def stats(self) -> dict[str, Any]:
+        """Return registry counters and per-engine metrics."""
+        with self._lock:
+            engines = [entry.stats() for entry in self._entries.values()]
+        return {
+            "engines": engines,
+            "engine_count": len(engines),
+            "max_engines": self.max_engines,
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "idle_seconds": self.idle_seconds,
+            "created": self.created,
+            "evictions": self.evictions,
+        }
+
+    async def dispose_all(self) -> None:
+        """Dispose every registered engine."""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            await dispose_registered_engine(entry)
+
+    def _create(self, database_name: str) -> RegisteredEngine:
+        url = settings.effective_database_url
+        options: dict[str, Any] = {
+            "echo": settings.database_echo,
+            "pool_pre_ping": True,
+            "connect_args": {"charset": "utf8mb4"} if "mysql" in url else {},
+        }
+        if "sqlite" not in url:
+            options["pool_size"] = self.pool_size
+            options["max_overflow"] = self.max_overflow
+
+        if settings.database_async:
+            from sqlalchemy.ext.asyncio import create_async_engine
+
+            async_url = make_url(settings.async_database_url)
+            new_async = create_async_engine(
+                async_url.set(database=database_name),
+                poolclass=InstrumentedAsyncQueuePool,
+                **options,
+            )
+            entry = RegisteredEngine(
+                database_name, new_async.sync_engine, async_engine=new_async
+            )
+        else:
+            new_engine = create_engine(
+                make_url(url).set(database=database_name),
+                poolclass=InstrumentedQueuePool,
+                **options,
+            )
+            entry = RegisteredEngine(database_name, new_engine)
+
+        self._track_pool(entry)
+        if settings.metrics_enabled:
+            instrument_engine(entry.engine, pool_label=f"admin:{database_name}")
+        return entry
+
+    @staticmethod
+    def _track_pool(entry: RegisteredEngine) -> None:
+        def on_connect(*_: Any) -> None:
+            entry.connects += 1
+
+        def on_checkout(*_: Any) -> None:
+            entry.checkouts += 1
+            entry.checked_out += 1
+
+        def on_checkin(*_: Any) -> None:
+            entry.checked_out -= 1
+
+        event.listen(entry.engine, "connect", on_connect)
+        event.listen(entry.engine, "checkout", on_checkout)
+        event.listen(entry.engine, "checkin", on_checkin)
+
+
+async def dispose_registered_engine(entry: RegisteredEngine) -> None:
+    """Close the pooled connections of a registry engine."""
+    if entry.async_engine is not None:
+        await entry.async_engine.dispose()
+    else:
+        entry.engine.dispose()
+
+
+# Per-database engines for the admin table browser
+engine_registry = EngineRegistry(
+    pool_size=settings.admin_engine_pool_size,
+    max_overflow=settings.admin_engine_max_overflow,
+    idle_seconds=settings.admin_engine_idle_seconds,
+    max_engines=settings.admin_engine_max_count,
+)
+
+
 async def create_tables() -> None:
     """Create database tables."""
     Base.metadata.create_all(bind=engine)
     print("📊 Database tables created successfully")
 
 
+async def dispose_engines() -> None:
+    """Close all pooled connections."""
+    await engine_registry.dispose_all()
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
+
+
 def get_db() -> Generator[Session, None, None]:
     """Get database session dependency."""
     db = SessionLocal()
@@ -42,6 +306,105 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+def run_with_connection(fn: Callable[..., T], *args: Any) -> T:
+    """Run a query function on a pooled connection of the sync engine."""
+    return _run_on_engine(engine, fn, *args)
+
+
+def _run_on_engine(bind: Engine, fn: Callable[..., T], *args: Any) -> T:
+    with bind.connect() as conn:
+        return fn(conn, *args)
+
+
+async def run_in_connection(fn: Callable[..., T], *args: Any) -> T:
+    """Run a query function without blocking the event loop.
+
+    ``fn`` receives a synchronous ``Connection`` as its first argument. With
+    ``DATABASE_ASYNC`` enabled it runs on an aiomysql connection through
+    ``AsyncConnection.run_sync``; otherwise it runs on the sync engine in a
+    worker thread.
+    """
+    if async_engine is not None:
+        async with async_engine.connect() as conn:
+            return await conn.run_sync(fn, *args)
+    return await asyncio.to_thread(run_with_connection, fn, *args)
+
+
+async def run_in_database(database_name: str, fn: Callable[..., T], *args: Any) -> T:
+    """Run a query function on the registry engine of one database.
+
+    Same contract as :func:`run_in_connection`, but the connection comes from
+    the per-database pool of :data:`engine_registry`, never the shared one.
+    """
+    for idle in engine_registry.pop_idle(incoming=database_name):
+        await dispose_registered_engine(idle)
+
+    entry = engine_registry.acquire(database_name)
+    try:
+        if entry.async_engine is not None:
+            async with entry.async_engine.connect() as conn:
+                return await conn.run_sync(fn, *args)
+        return await asyncio.to_thread(_run_on_engine, entry.engine, fn, *args)
+    finally:
+        engine_registry.release(entry)
+
+
+async def stream_in_database(
+    database_name: str, statement: Executable, chunk_rows: int
+) -> AsyncGenerator[tuple[list[str], Sequence[Row[Any]]], None]:
+    """Yield ``(column names, rows)`` chunks of a query on one database.
+
+    Rows come from an unbuffered server-side cursor (``SSCursor`` through
+    ``stream_results``), so at most ``chunk_rows`` rows are held in memory.
+    The first chunk is always yielded, even when it is empty. A stream that
+    is abandoned early invalidates its connection instead of reading the
+    remaining rows off the wire.
+    """
+    for idle in engine_registry.pop_idle(incoming=database_name):
+        await dispose_registered_engine(idle)
+
+    entry = engine_registry.acquire(database_name)
+    finished = False
+    try:
+        if entry.async_engine is not None:
+            async with entry.async_engine.connect() as async_conn:
+                try:
+                    async_result = await async_conn.stream(statement)
+                    keys = list(async_result.keys())
+                    rows = await async_result.fetchmany(chunk_rows)
+                    yield keys, rows
+                    while rows:
+                        rows = await async_result.fetchmany(chunk_rows)
+                        if rows:
+                            yield keys, rows
+                    finished = True
+                finally:
+                    if not finished:
+                        await async_conn.invalidate()
+            return
+
+        conn = await asyncio.to_thread(entry.engine.connect)
+        try:
+            streaming = conn.execution_options(
+                stream_results=True, max_row_buffer=chunk_rows
+            )
+            result = await asyncio.to_thread(streaming.execute, statement)
+            keys = list(result.keys())
+            rows = await asyncio.to_thread(result.fetchmany, chunk_rows)
+            yield keys, rows
+            while rows:
+                rows = await asyncio.to_thread(result.fetchmany, chunk_rows)
+                if rows:
+                    yield keys, rows
+            finished = True
+        finally:
+            if not finished:
+                conn.invalidate()
+            await asyncio.to_thread(conn.close)
+    finally:
+        engine_registry.release(entry)
+
+
 # Database utility functions
 def init_db() -> None:
     """Initialize database with tables."""
@@ -1,16 +1,22 @@
 """Main FastAPI application for KHTRM System."""
 
+import asyncio
+import contextlib
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
+from .compression import CompressionMiddleware
 from .config import settings
-from .database import create_tables
+from .database import create_tables, dispose_engines
+from .metrics import monitor_event_loop_lag, registry
+from .services.change_stream import change_hub
+from .services.daily_stats import daily_stats_maintainer
 
 
 @asynccontextmanager
@@ -18,11 +24,31 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Application lifespan manager."""
     # Startup
     await create_tables()
+    lag_monitor = None
+    if settings.metrics_enabled:
+        lag_monitor = asyncio.create_task(
+            monitor_event_loop_lag(settings.metrics_loop_lag_interval_seconds)
+        )
+    stats_refresher = None
+    if settings.daily_stats_enabled:
+        stats_refresher = asyncio.create_task(
+            daily_stats_maintainer.run_forever(
+                settings.daily_stats_refresh_seconds,
+                settings.daily_stats_refresh_days,
+            )
+        )
     print("🚀 KHTRM System backend started successfully")
 
     yield
 
     # Shutdown
+    for task in (lag_monitor, stats_refresher):
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+    await change_hub.close()
+    await dispose_engines()
     print("⏹️ KHTRM System backend shutting down")
 
 
@@ -48,6 +74,12 @@ def create_app() -> FastAPI:
         allow_headers=settings.cors_headers,
     )
 
+    # Compress large responses with gzip or brotli (cached ones come precompressed)
+    if settings.compression_enabled:
+        app.add_middleware(
+            CompressionMiddleware, minimum_size=settings.compression_minimum_size
+        )
+
     # Exception handlers
     @app.exception_handler(StarletteHTTPException)
     async def http_exception_handler(request: Request, exc: StarletteHTTPException) -> JSONResponse:
@@ -110,6 +142,14 @@ def create_app() -> FastAPI:
             "message": "KHTRM System працює коректно",
         }
 
+    # Metrics endpoint (Prometheus text format)
+    @app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+    async def metrics() -> PlainTextResponse:
+        """Expose collected metrics for Prometheus."""
+        return PlainTextResponse(
+            registry.render(), media_type="text/plain; version=0.0.4"
+        )
+
     # Root endpoint
     @app.get("/")
     async def read_root() -> dict[str, str]:
@@ -0,0 +1,386 @@
+"""Prometheus-style metrics for the backend.
+
+Metrics are kept in process memory and rendered in the Prometheus text
+exposition format by the ``/metrics`` endpoint. Database metrics come from
+SQLAlchemy cursor and pool events; their ``operation`` label is taken from a
+context variable set by the router (handler name) and by
+``AssignmentService`` (method name), so statement timings can be traced back
+to the code that issued them.
+"""
+
+import asyncio
+import threading
+import time
+from collections.abc import Awaitable, Callable, Generator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, TypeVar
+
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import Engine, event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Name of the router function or service method currently running
+current_operation: ContextVar[str] = ContextVar("current_operation", default="other")
+
+LabelValues = tuple[str, ...]
+M = TypeVar("M", bound="Metric")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values, strict=True):
+        escaped = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Base class of labelled metrics."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> list[str]:
+        """Return exposition lines of all label combinations."""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """Render HELP, TYPE and sample lines."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+        return "\n".join(lines)
+
+
+class _ValueMetric(Metric):
+    """Single value per label combination."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increase the value of a label combination."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Counter(_ValueMetric):
+    """Monotonically increasing value per label combination."""
+
+    kind = "counter"
+
+
+class Gauge(_ValueMetric):
+    """Value that can go up and down per label combination."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        """Decrease the gauge of a label combination."""
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        """Set the gauge of a label combination."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """Cumulative bucket counts, sum and count per label combination."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: dict[LabelValues, list[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one observation."""
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Bucket counts followed by sum and count
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+        lines = []
+        names = (*self.labelnames, "le")
+        for key, values in series:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, values, strict=False):
+                cumulative += count
+                labels = _format_labels(names, (*key, _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(values[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(values[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together by ``/metrics``."""
+
+    def __init__(self) -> None:
+        self._metrics: list[Metric] = []
+
+    def register(self, metric: M) -> M:
+        """Add a metric to the registry and return it."""
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text format."""
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = registry.register(
+    Histogram(
+        "khtrm_http_request_duration_seconds",
+        "Latency of API requests by route.",
+        ("handler", "route", "method", "status"),
+    )
+)
+DB_STATEMENT_SECONDS = registry.register(
+    Histogram(
+        "khtrm_db_statement_duration_seconds",
+        "Time spent executing SQL statements.",
+        ("operation", "statement"),
+    )
+)
+DB_STATEMENT_ROWS = registry.register(
+    Counter(
+        "khtrm_db_statement_rows_total",
+        "Rows returned or affected by SQL statements.",
+        ("operation", "statement"),
+    )
+)
+DB_POOL_CHECKOUT_SECONDS = registry.register(
+    Histogram(
+        "khtrm_db_pool_checkout_duration_seconds",
+        "Time spent waiting for a pooled connection.",
+        ("operation",),
+    )
+)
+DB_POOL_IN_USE = registry.register(
+    Gauge(
+        "khtrm_db_pool_connections_in_use",
+        "Connections currently checked out of a pool.",
+        ("pool",),
+    )
+)
+SERVICE_ERRORS = registry.register(
+    Counter(
+        "khtrm_service_errors_total",
+        "Errors caught and answered with fallback data.",
+        ("operation",),
+    )
+)
+COALESCED_CALLS = registry.register(
+    Counter(
+        "khtrm_coalesced_calls_total",
+        "Calls answered by an identical call already in flight.",
+        ("operation",),
+    )
+)
+CHANGE_STREAM_FEEDS = registry.register(
+    Gauge(
+        "khtrm_change_stream_feeds",
+        "Dates with a running change stream poller.",
+    )
+)
+CHANGE_STREAM_SUBSCRIBERS = registry.register(
+    Gauge(
+        "khtrm_change_stream_subscribers",
+        "Clients connected to assignment change streams.",
+    )
+)
+EVENT_LOOP_LAG_SECONDS = registry.register(
+    Histogram(
+        "khtrm_event_loop_lag_seconds",
+        "Delay of event loop wakeups beyond the scheduled time.",
+    )
+)
+
+
+@contextmanager
+def operation_scope(name: str) -> Generator[None, None, None]:
+    """Label database metrics recorded inside the block with ``name``."""
+    token = current_operation.set(name)
+    try:
+        yield
+    finally:
+        current_operation.reset(token)
+
+
+def _statement_kind(statement: str) -> str:
+    words = statement.lstrip(" \t\r\n(").split(None, 1)
+    return words[0].upper() if words else "UNKNOWN"
+
+
+def _before_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    started = conn.info["metrics_query_start"].pop()
+    operation = current_operation.get()
+    kind = _statement_kind(statement)
+    DB_STATEMENT_SECONDS.observe(
+        time.perf_counter() - started, operation=operation, statement=kind
+    )
+    rows = getattr(cursor, "rowcount", -1)
+    if rows and rows > 0:
+        DB_STATEMENT_ROWS.inc(rows, operation=operation, statement=kind)
+
+
+def _handle_error(context: Any) -> None:
+    conn = context.connection
+    if conn is not None and conn.info.get("metrics_query_start"):
+        conn.info["metrics_query_start"].pop()
+
+
+def instrument_engine(bind: Engine, pool_label: str) -> None:
+    """Attach statement timing and pool usage hooks to a sync engine.
+
+    For an ``AsyncEngine`` pass its ``sync_engine``.
+    """
+    event.listen(bind, "before_cursor_execute", _before_cursor_execute)
+    event.listen(bind, "after_cursor_execute", _after_cursor_execute)
+    event.listen(bind, "handle_error", _handle_error)
+
+    def on_checkout(*_: Any) -> None:
+        DB_POOL_IN_USE.inc(pool=pool_label)
+
+    def on_checkin(*_: Any) -> None:
+        DB_POOL_IN_USE.dec(pool=pool_label)
+
+    event.listen(bind, "checkout", on_checkout)
+    event.listen(bind, "checkin", on_checkin)
+
+
+class _TimedCheckout:
+    """Pool mixin recording how long ``connect()`` waits for a connection."""
+
+    def connect(self) -> Any:
+        started = time.perf_counter()
+        try:
+            return super().connect()  # type: ignore[misc]
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(
+                time.perf_counter() - started, operation=current_operation.get()
+            )
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    """QueuePool that records checkout wait time."""
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout wait time."""
+
+
+async def monitor_event_loop_lag(interval: float) -> None:
+    """Measure how late the event loop wakes up from a fixed sleep."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG_SECONDS.observe(max(0.0, loop.time() - started - interval))
+
+
+class InstrumentedRoute(APIRoute):
+    """Route class timing each request and labelling it with the handler name."""
+
+    def get_route_handler(self) -> Callable[[Request], Awaitable[Response]]:
+        handler = super().get_route_handler()
+        handler_name = self.name
+        route = self.path
+
+        async def instrumented_handler(request: Request) -> Response:
+            started = time.perf_counter()
+            status = 500
+            try:
+                with operation_scope(handler_name):
+                    response = await handler(request)
+                status = response.status_code
+                return response
+            except HTTPException as e:
+                status = e.status_code
+                raise
+            finally:
+                HTTP_REQUEST_SECONDS.observe(
+                    time.perf_counter() - started,
+                    handler=handler_name,
+                    route=route,
+                    method=request.method,
+                    status=str(status),
+                )
+
+        return instrumented_handler
@@ -4,10 +4,20 @@ Models package initialization
 
 from .assignment import Assignment
 from .base import Base
+from .daily_stats import DailyAssignmentStats, DailyRouteShiftStats
 from .employee import Employee
 from .route import Route
 from .user import User
 from .vehicle import Vehicle
 
 # Export all models for easier imports
-__all__ = ["Base", "User", "Assignment", "Route", "Employee", "Vehicle"]
+__all__ = [
+    "Base",
+    "User",
+    "Assignment",
+    "Route",
+    "Employee",
+    "Vehicle",
+    "DailyAssignmentStats",
+    "DailyRouteShiftStats",
+]
@@ -0,0 +1,71 @@
+"""
+Daily statistics summary models
+Materialized aggregates of the zanaradka table, maintained by the
+daily_stats service
+"""
+
+from sqlalchemy import BigInteger, Column, Date, DateTime, Index, Integer, String
+
+from .base import Base
+
+
+class DailyAssignmentStats(Base):
+    """
+    Per-date totals of zanaradka together with the fingerprint of the rows
+    they were computed from
+    """
+
+    __tablename__ = "daily_assignment_stats"
+
+    stat_date = Column(Date, primary_key=True, comment="Дата наряда")
+
+    total_assignments = Column(Integer, nullable=False, default=0)
+    total_routes = Column(Integer, nullable=False, default=0)
+    total_drivers = Column(Integer, nullable=False, default=0)
+    total_vehicles = Column(Integer, nullable=False, default=0)
+    total_brigades = Column(Integer, nullable=False, default=0)
+    total_shifts = Column(Integer, nullable=False, default=0)
+
+    # Fingerprint of the source rows: row count, max key and checksum
+    source_rows = Column(Integer, nullable=False, default=0)
+    source_max_key = Column(BigInteger, nullable=True)
+    source_checksum = Column(BigInteger, nullable=True)
+
+    refreshed_at = Column(DateTime, nullable=False, comment="Время пересчета")
+
+    def __repr__(self) -> str:
+        return (
+            f"<DailyAssignmentStats(date={self.stat_date}, "
+            f"assignments={self.total_assignments})>"
+        )
+
+
+class DailyRouteShiftStats(Base):
+    """Per date, route and shift totals of zanaradka"""
+
+    __tablename__ = "daily_route_shift_stats"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    stat_date = Column(Date, nullable=False, comment="Дата наряда")
+    route = Column(Integer, nullable=True, comment="Маршрут (marshrut)")
+    shift = Column(String(6), nullable=True, comment="Смена (smena)")
+
+    assignments_count = Column(Integer, nullable=False, default=0)
+    drivers_count = Column(Integer, nullable=False, default=0)
+    vehicles_count = Column(Integer, nullable=False, default=0)
+    brigades_count = Column(Integer, nullable=False, default=0)
+
+    # Sum and number of rows with both tvih and tzah, for average work hours
+    work_seconds = Column(BigInteger, nullable=False, default=0)
+    work_rows = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_daily_route_shift_stats_date_route", "stat_date", "route"),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<DailyRouteShiftStats(date={self.stat_date}, route={self.route}, "
+            f"shift={self.shift})>"
+        )
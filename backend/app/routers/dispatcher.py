@@ -1,15 +1,43 @@
 """Enhanced dispatcher router for assignment management with real MySQL data."""
 
-from datetime import date
+import asyncio
+from collections.abc import Iterator
+from contextlib import closing
+from datetime import date, timedelta
 from typing import Any
 
-from fastapi import APIRouter, HTTPException, Query, Body
-from sqlalchemy import text
-
-from ..database import engine
+from fastapi import APIRouter, HTTPException, Query, Body, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Connection, text
+
+from ..compression import negotiate_encoding
+from ..config import settings
+from ..database import (
+    engine_registry,
+    qualified_name,
+    quote_identifier,
+    run_in_connection,
+    run_in_database,
+    stream_in_database,
+)
+from ..metrics import InstrumentedRoute
+from ..services import arrow_export
 from ..services.assignment_service import assignment_service
+from ..services.assignment_views import (
+    ASSIGNMENT_VIEWS,
+    parse_fields,
+)
+from ..services.change_stream import change_hub
+from ..services.columnar import LAYOUTS
+from ..services.daily_stats import REPORT_GROUPS, daily_stats_maintainer
+from ..services.pagination import InvalidCursorError
+from ..services.table_export import EXPORT_FORMATS, encode_chunks
+from ..services.table_stats import exact_row_counts
+
+router = APIRouter(route_class=InstrumentedRoute)
 
-router = APIRouter()
+FIELDS_DESCRIPTION = "Comma separated fields to return (default: all)"
+SINCE_DESCRIPTION = "Version of a previous response; only changes are returned"
 
 
 @router.get("/check-table-structure")
@@ -17,42 +45,44 @@ async def check_table_structure(
     table_name: str = Query("zanaradka", description="Table name to check"),
 ) -> dict[str, Any]:
     """Check the structure of the zanaradka table to get correct field names."""
-    try:
-        with engine.connect() as conn:
-            # Get table structure
-            describe_query = text(f"DESCRIBE {table_name}")
-            result = conn.execute(describe_query)
-            fields = result.fetchall()
-
-            # Get sample data to see what's in the table
-            sample_query = text(f"SELECT * FROM {table_name} LIMIT 3")
-            sample_result = conn.execute(sample_query)
-            sample_data = sample_result.fetchall()
-
-            # Get column names
-            column_names = list(sample_result.keys()) if sample_data else []
-
-            return {
-                "table_name": table_name,
-                "field_structure": [
-                    {
-                        "field": field[0],
-                        "type": field[1],
-                        "null": field[2],
-                        "key": field[3],
-                        "default": field[4],
-                        "extra": field[5],
-                    }
-                    for field in fields
-                ],
-                "column_names": column_names,
-                "sample_data": [
-                    {column_names[i]: value for i, value in enumerate(row)}
-                    for row in sample_data
-                ],
-                "total_fields": len(fields),
-            }
 
+    def fetch(conn: Connection) -> dict[str, Any]:
+        # Get table structure
+        describe_query = text(f"DESCRIBE {table_name}")
+        result = conn.execute(describe_query)
+        fields = result.fetchall()
+
+        # Get sample data to see what's in the table
+        sample_query = text(f"SELECT * FROM {table_name} LIMIT 3")
+        sample_result = conn.execute(sample_query)
+        sample_data = sample_result.fetchall()
+
+        # Get column names
+        column_names = list(sample_result.keys()) if sample_data else []
+
+        return {
+            "table_name": table_name,
+            "field_structure": [
+                {
+                    "field": field[0],
+                    "type": field[1],
+                    "null": field[2],
+                    "key": field[3],
+                    "default": field[4],
+                    "extra": field[5],
+                }
+                for field in fields
+            ],
+            "column_names": column_names,
+            "sample_data": [
+                {column_names[i]: value for i, value in enumerate(row)}
+                for row in sample_data
+            ],
+            "total_fields": len(fields),
+        }
+
+    try:
+        return await run_in_connection(fetch)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error checking table structure: {str(e)}"
@@ -62,64 +92,66 @@ async def check_table_structure(
 @router.get("/test-raw-data")
 async def test_raw_data() -> dict[str, Any]:
     """Test endpoint to check raw data in zanaradka table."""
-    try:
-        with engine.connect() as conn:
-            # Count total records
-            count_query = text("SELECT COUNT(*) as total FROM zanaradka")
-            count_result = conn.execute(count_query)
-            total_count = count_result.scalar()
-
-            # Get first 3 records with key fields only
-            simple_query = text("""
-                SELECT
-                    `key`,
-                    marshrut,
-                    data_day,
-                    fiovoditel,
-                    smena
-                FROM zanaradka
-                ORDER BY `key` DESC
-                LIMIT 5
-            """)
-
-            result = conn.execute(simple_query)
-            rows = result.fetchall()
-
-            # Get date range
-            date_range_query = text("""
-                SELECT
-                    MIN(data_day) as min_date,
-                    MAX(data_day) as max_date,
-                    COUNT(DISTINCT data_day) as unique_dates
-                FROM zanaradka
-                WHERE data_day IS NOT NULL
-            """)
-
-            date_result = conn.execute(date_range_query)
-            date_info = date_result.fetchone()
-
-            raw_data = []
-            for row in rows:
-                raw_data.append(
-                    {
-                        "key": row[0],
-                        "marshrut": row[1],
-                        "data_day": str(row[2]) if row[2] else None,
-                        "fiovoditel": row[3],
-                        "smena": row[4],
-                    }
-                )
-
-            return {
-                "total_records": total_count,
-                "sample_records": raw_data,
-                "date_range": {
-                    "min_date": str(date_info.min_date) if date_info and date_info.min_date else None,
-                    "max_date": str(date_info.max_date) if date_info and date_info.max_date else None,
-                    "unique_dates": date_info.unique_dates if date_info else 0,
-                },
-            }
 
+    def fetch(conn: Connection) -> dict[str, Any]:
+        # Count total records
+        count_query = text("SELECT COUNT(*) as total FROM zanaradka")
+        count_result = conn.execute(count_query)
+        total_count = count_result.scalar()
+
+        # Get first 3 records with key fields only
+        simple_query = text("""
+            SELECT
+                `key`,
+                marshrut,
+                data_day,
+                fiovoditel,
+                smena
+            FROM zanaradka
+            ORDER BY `key` DESC
+            LIMIT 5
+        """)
+
+        result = conn.execute(simple_query)
+        rows = result.fetchall()
+
+        # Get date range
+        date_range_query = text("""
+            SELECT
+                MIN(data_day) as min_date,
+                MAX(data_day) as max_date,
+                COUNT(DISTINCT data_day) as unique_dates
+            FROM zanaradka
+            WHERE data_day IS NOT NULL
+        """)
+
+        date_result = conn.execute(date_range_query)
+        date_info = date_result.fetchone()
+
+        raw_data = []
+        for row in rows:
+            raw_data.append(
+                {
+                    "key": row[0],
+                    "marshrut": row[1],
+                    "data_day": str(row[2]) if row[2] else None,
+                    "fiovoditel": row[3],
+                    "smena": row[4],
+                }
+            )
+
+        return {
+            "total_records": total_count,
+            "sample_records": raw_data,
+            "date_range": {
+                "min_date": str(date_info.min_date) if date_info and date_info.min_date else None,
+                "max_date": str(date_info.max_date) if date_info and date_info.max_date else None,
+                "unique_dates": date_info.unique_dates if date_info else 0,
+            },
+        }
+
+    try:
+        return await run_in_connection(fetch)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error testing raw data: {str(e)}"
@@ -133,66 +165,68 @@ async def test_encoding(
     ),
 ) -> dict[str, Any]:
     """Test endpoint to try different encoding approaches for Ukrainian text."""
-    try:
-        with engine.connect() as conn:
-            query = text("""
-                SELECT
-                    fiovoditel,
-                    fioconduktor
-                FROM zanaradka
-                WHERE data_day = :target_date
-                    AND fiovoditel IS NOT NULL
-                    AND fiovoditel != ''
-                LIMIT 3
-            """)
-
-            result = conn.execute(query, {"target_date": assignment_date})
-            rows = result.fetchall()
-
-            encoding_tests = []
-            for row in rows:
-                driver_name = row.fiovoditel
-                conductor_name = row.fioconduktor or ""
-
-                test_result = {
-                    "original": driver_name,
-                    "conductor_original": conductor_name,
-                    "encoding_attempts": {},
-                }
 
-                # Try different encoding conversions
-                try:
-                    # If data is stored as latin-1 but should be cp1251
-                    if isinstance(driver_name, str):
-                        # Try to encode as latin-1 and decode as cp1251
-                        test_result["encoding_attempts"]["latin1_to_cp1251"] = (
-                            driver_name.encode("latin-1").decode(
-                                "cp1251", errors="ignore"
-                            )
+    def fetch(conn: Connection) -> dict[str, Any]:
+        query = text("""
+            SELECT
+                fiovoditel,
+                fioconduktor
+            FROM zanaradka
+            WHERE data_day = :target_date
+                AND fiovoditel IS NOT NULL
+                AND fiovoditel != ''
+            LIMIT 3
+        """)
+
+        result = conn.execute(query, {"target_date": assignment_date})
+        rows = result.fetchall()
+
+        encoding_tests = []
+        for row in rows:
+            driver_name = row.fiovoditel
+            conductor_name = row.fioconduktor or ""
+
+            test_result = {
+                "original": driver_name,
+                "conductor_original": conductor_name,
+                "encoding_attempts": {},
+            }
+
+            # Try different encoding conversions
+            try:
+                # If data is stored as latin-1 but should be cp1251
+                if isinstance(driver_name, str):
+                    # Try to encode as latin-1 and decode as cp1251
+                    test_result["encoding_attempts"]["latin1_to_cp1251"] = (
+                        driver_name.encode("latin-1").decode(
+                            "cp1251", errors="ignore"
                         )
-                        # Try to encode as latin-1 and decode as utf-8
-                        test_result["encoding_attempts"]["latin1_to_utf8"] = (
-                            driver_name.encode("latin-1").decode(
-                                "utf-8", errors="ignore"
-                            )
+                    )
+                    # Try to encode as latin-1 and decode as utf-8
+                    test_result["encoding_attempts"]["latin1_to_utf8"] = (
+                        driver_name.encode("latin-1").decode(
+                            "utf-8", errors="ignore"
                         )
-                        # Try to encode as cp1252 and decode as cp1251
-                        test_result["encoding_attempts"]["cp1252_to_cp1251"] = (
-                            driver_name.encode("cp1252", errors="ignore").decode(
-                                "cp1251", errors="ignore"
-                            )
+                    )
+                    # Try to encode as cp1252 and decode as cp1251
+                    test_result["encoding_attempts"]["cp1252_to_cp1251"] = (
+                        driver_name.encode("cp1252", errors="ignore").decode(
+                            "cp1251", errors="ignore"
                         )
-                except Exception as e:
-                    test_result["encoding_attempts"]["error"] = str(e)
+                    )
+            except Exception as e:
+                test_result["encoding_attempts"]["error"] = str(e)
 
-                encoding_tests.append(test_result)
+            encoding_tests.append(test_result)
 
-            return {
-                "date": assignment_date,
-                "encoding_tests": encoding_tests,
-                "message": "Try different encoding conversions to find the correct one",
-            }
+        return {
+            "date": assignment_date,
+            "encoding_tests": encoding_tests,
+            "message": "Try different encoding conversions to find the correct one",
+        }
 
+    try:
+        return await run_in_connection(fetch)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error in encoding test: {str(e)}"
@@ -207,86 +241,88 @@ async def test_simple_query(
     limit: int = Query(3, description="Number of records to return"),
 ) -> dict[str, Any]:
     """Test endpoint with minimal fields to debug the WHERE clause."""
-    try:
-        with engine.connect() as conn:
-            # First, test without WHERE to see if query works
-            test_query = text("""
-                SELECT
-                    `key` as id,
-                    marshrut as route_number,
-                    data_day as assignment_date,
-                    fiovoditel as driver_name,
-                    smena as shift
-                FROM zanaradka
-                ORDER BY `key` DESC
-                LIMIT :limit
-            """)
-
-            result = conn.execute(test_query, {"limit": limit})
-            rows_without_where = result.fetchall()
-
-            # Now test with WHERE clause
-            date_query = text("""
-                SELECT
-                    `key` as id,
-                    marshrut as route_number,
-                    data_day as assignment_date,
-                    fiovoditel as driver_name,
-                    smena as shift
-                FROM zanaradka
-                WHERE data_day = :target_date
-                ORDER BY `key` DESC
-                LIMIT :limit
-            """)
-
-            result_with_where = conn.execute(
-                date_query, {"target_date": assignment_date, "limit": limit}
-            )
-            rows_with_where = result_with_where.fetchall()
-
-            # Count records for that date
-            count_query = text("""
-                SELECT COUNT(*) as count
-                FROM zanaradka
-                WHERE data_day = :target_date
-            """)
-
-            count_result = conn.execute(count_query, {"target_date": assignment_date})
-            count_for_date = count_result.scalar()
-
-            return {
-                "test_date": assignment_date,
-                "records_without_where": [
-                    {
-                        "id": row.id,
-                        "route_number": str(row.route_number)
-                        if row.route_number
-                        else "",
-                        "assignment_date": str(row.assignment_date)
-                        if row.assignment_date
-                        else None,
-                        "driver_name": row.driver_name or "",
-                        "shift": str(row.shift) if row.shift else "",
-                    }
-                    for row in rows_without_where
-                ],
-                "records_with_where": [
-                    {
-                        "id": row.id,
-                        "route_number": str(row.route_number)
-                        if row.route_number
-                        else "",
-                        "assignment_date": str(row.assignment_date)
-                        if row.assignment_date
-                        else None,
-                        "driver_name": row.driver_name or "",
-                        "shift": str(row.shift) if row.shift else "",
-                    }
-                    for row in rows_with_where
-                ],
-                "count_for_date": count_for_date,
-            }
 
+    def fetch(conn: Connection) -> dict[str, Any]:
+        # First, test without WHERE to see if query works
+        test_query = text("""
+            SELECT
+                `key` as id,
+                marshrut as route_number,
+                data_day as assignment_date,
+                fiovoditel as driver_name,
+                smena as shift
+            FROM zanaradka
+            ORDER BY `key` DESC
+            LIMIT :limit
+        """)
+
+        result = conn.execute(test_query, {"limit": limit})
+        rows_without_where = result.fetchall()
+
+        # Now test with WHERE clause
+        date_query = text("""
+            SELECT
+                `key` as id,
+                marshrut as route_number,
+                data_day as assignment_date,
+                fiovoditel as driver_name,
+                smena as shift
+            FROM zanaradka
+            WHERE data_day = :target_date
+            ORDER BY `key` DESC
+            LIMIT :limit
+        """)
+
+        result_with_where = conn.execute(
+            date_query, {"target_date": assignment_date, "limit": limit}
+        )
+        rows_with_where = result_with_where.fetchall()
+
+        # Count records for that date
+        count_query = text("""
+            SELECT COUNT(*) as count
+            FROM zanaradka
+            WHERE data_day = :target_date
+        """)
+
+        count_result = conn.execute(count_query, {"target_date": assignment_date})
+        count_for_date = count_result.scalar()
+
+        return {
+            "test_date": assignment_date,
+            "records_without_where": [
+                {
+                    "id": row.id,
+                    "route_number": str(row.route_number)
+                    if row.route_number
+                    else "",
+                    "assignment_date": str(row.assignment_date)
+                    if row.assignment_date
+                    else None,
+                    "driver_name": row.driver_name or "",
+                    "shift": str(row.shift) if row.shift else "",
+                }
+                for row in rows_without_where
+            ],
+            "records_with_where": [
+                {
+                    "id": row.id,
+                    "route_number": str(row.route_number)
+                    if row.route_number
+                    else "",
+                    "assignment_date": str(row.assignment_date)
+                    if row.assignment_date
+                    else None,
+                    "driver_name": row.driver_name or "",
+                    "shift": str(row.shift) if row.shift else "",
+                }
+                for row in rows_with_where
+            ],
+            "count_for_date": count_for_date,
+        }
+
+    try:
+        return await run_in_connection(fetch)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error in test simple query: {str(e)}"
@@ -295,212 +331,149 @@ async def test_simple_query(
 
 @router.get("/direct-assignments")
 async def get_direct_assignments(
+    request: Request,
     assignment_date: str = Query(
         "2025-07-06", description="Assignment date (YYYY-MM-DD)"
     ),
     limit: int = Query(10, description="Number of records to return"),
-) -> dict[str, Any]:
-    """Direct assignment endpoint that bypasses the service layer."""
+    cursor: str | None = Query(None, description="Cursor from next_cursor"),
+    with_total: bool = Query(False, description="Include total rows for the date"),
+    layout: str = Query("rows", description="Response layout: rows or columnar"),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    since: str | None = Query(None, description=SINCE_DESCRIPTION),
+) -> Response:
+    """Get assignments joined with tabel (driver and conductor by personnel number).
+
+    Served through the assignment cache like the other views; cached pages and
+    delta snapshots are keyed by the tabel fingerprint of the date as well, so
+    edits to tabel are picked up.
+    """
+    if layout not in LAYOUTS:
+        raise HTTPException(
+            status_code=400, detail=f"layout must be one of: {', '.join(LAYOUTS)}"
+        )
+    keys = _view_fields("direct", fields)
+    _check_since(since, cursor, keys, layout)
     try:
-        from ..services.assignment_service import fix_ukrainian_encoding
-
-        with engine.connect() as conn:
-            query = text("""
-                SELECT
-                    z.`key` as id,
-                    z.marshrut as route_number,
-                    z.vipusk as brigade,
-                    z.smena as shift,
-                    z.tabvoditel as driver_tab_number,
-                    z.fiovoditel as driver_name,
-                    z.tabconduktor as conductor_tab_number,
-                    z.fioconduktor as conductor_name,
-                    z.`pe№` as vehicle_number,
-                    z.`putlist№` as waybill_number,
-                    z.data_day as assignment_date,
-                    z.tvih as departure_time,
-                    z.tzah as arrival_time,
-                    z.tvihmarsrut as departure_vzd,
-                    z.tend as arrival_zgd,
-                    z.tPodgotovkaVod as preparation_time,
-                    z.tSda4aVod as end_time,
-                    z.tVihdepoVod as driver_departure_time,
-                    z.tZahdepoVod as driver_arrival_time,
-                    CASE
-                        WHEN z.tvih IS NOT NULL AND z.tzah IS NOT NULL THEN
-                            TIME_FORMAT(SEC_TO_TIME(
-                                TIME_TO_SEC(z.tzah) - TIME_TO_SEC(z.tvih) -
-                                COALESCE(TIME_TO_SEC(z.tob1), 0) -
-                                COALESCE(TIME_TO_SEC(z.tob2), 0) -
-                                CASE
-                                    WHEN z.tna4otst IS NOT NULL AND z.tkonotst IS NOT NULL THEN
-                                        TIME_TO_SEC(z.tkonotst) - TIME_TO_SEC(z.tna4otst)
-                                    ELSE 0
-                                END
-                            ), '%H:%i')
-                        ELSE NULL
-                    END as profit_start,
-                    CASE
-                        WHEN z.tvih IS NOT NULL AND z.tzah IS NOT NULL THEN
-                            TIME_FORMAT(SEC_TO_TIME(
-                                TIME_TO_SEC(z.tzah) - TIME_TO_SEC(z.tvih) -
-                                COALESCE(TIME_TO_SEC(z.tob1), 0) -
-                                COALESCE(TIME_TO_SEC(z.tob2), 0) -
-                                CASE
-                                    WHEN z.tna4otst IS NOT NULL AND z.tkonotst IS NOT NULL THEN
-                                        TIME_TO_SEC(z.tkonotst) - TIME_TO_SEC(z.tna4otst)
-                                    ELSE 0
-                                END
-                            ), '%H:%i')
-                        ELSE NULL
-                    END as profit_end,
-                    z.ZaprAdr as fuel_address,
-                    z.zaprv as fuel_number,
-                    z.zaprFakt as fuel_actual,
-                    z.tipvipusk as route_type,
-                    z.kpvih as route_endpoint,
-                    z.kpzah as route_endpoint_arrival,
-                    z.tob1 as break_1,
-                    z.tob2 as break_2,
-                    z.mestootst as parking_place,
-                    z.Soobhenie as notes,
-                    z.den_nedeli as day_of_week,
-                    MONTH(z.data_day) as month,
-                    t.plan_chas as plan_hours,
-                    t.time_pr_depo as hour_prep_depo,
-                    t.time_pr_line as hour_prep_line,
-                    t.time_pr_vod as hour_prep_driver,
-                    t.time_fakt_line as hour_work_actual
-                FROM zanaradka z
-                LEFT JOIN tabel t ON (t.tab = z.tabvoditel AND t.data_day = z.data_day)
-                WHERE z.data_day = :target_date
-                ORDER BY z.marshrut, z.smena
-                LIMIT :limit
-            """)
-
-            result = conn.execute(
-                query, {"target_date": assignment_date, "limit": limit}
-            )
-            rows = result.fetchall()
-
-            assignments = []
-            for row in rows:
-                assignments.append(
-                    {
-                        "id": row.id,
-                        "route_number": str(row.route_number)
-                        if row.route_number
-                        else "",
-                        "brigade": str(row.brigade) if row.brigade else "",
-                        "shift": str(row.shift) if row.shift else "",
-                        "driver_tab_number": str(row.driver_tab_number)
-                        if row.driver_tab_number
-                        else "",
-                        "driver_name": fix_ukrainian_encoding(row.driver_name or ""),
-                        "conductor_tab_number": str(row.conductor_tab_number)
-                        if row.conductor_tab_number
-                        else "",
-                        "conductor_name": fix_ukrainian_encoding(
-                            row.conductor_name or ""
-                        ),
-                        "vehicle_number": str(row.vehicle_number)
-                        if row.vehicle_number
-                        else "",
-                        "waybill_number": str(row.waybill_number)
-                        if row.waybill_number
-                        else "",
-                        "assignment_date": str(row.assignment_date)
-                        if row.assignment_date
-                        else None,
-                        "departure_time": str(row.departure_time)
-                        if row.departure_time
-                        else None,
-                        "arrival_time": str(row.arrival_time)
-                        if row.arrival_time
-                        else None,
-                        "departure_vzd": str(row.departure_vzd)
-                        if row.departure_vzd
-                        else None,
-                        "arrival_zgd": str(row.arrival_zgd)
-                        if row.arrival_zgd
-                        else None,
-                        "preparation_time": str(row.preparation_time)
-                        if row.preparation_time
-                        else None,
-                        "end_time": str(row.end_time) if row.end_time else None,
-                        "driver_departure_time": str(row.driver_departure_time)
-                        if row.driver_departure_time
-                        else None,
-                        "driver_arrival_time": str(row.driver_arrival_time)
-                        if row.driver_arrival_time
-                        else None,
-                        "fuel_address": row.fuel_address or "",
-                        "fuel_number": str(row.fuel_number)
-                        if row.fuel_number and row.fuel_number != 0
-                        else "0",
-                        "fuel_actual": str(row.fuel_actual) if row.fuel_actual else "",
-                        "route_type": row.route_type or "",
-                        "route_endpoint": row.route_endpoint or "",
-                        "route_endpoint_arrival": row.route_endpoint_arrival or "",
-                        "break_1": str(row.break_1) if row.break_1 else "",
-                        "break_2": str(row.break_2) if row.break_2 else "",
-                        "parking_place": row.parking_place or "",
-                        "notes": fix_ukrainian_encoding(row.notes or ""),
-                        "day_of_week": row.day_of_week or "",
-                        "month": str(row.month) if row.month else "",
-                        "plan_hours": str(row.plan_hours) if row.plan_hours else "",
-                        "hour_prep_depo": str(row.hour_prep_depo)
-                        if row.hour_prep_depo
-                        else "",
-                        "hour_prep_line": str(row.hour_prep_line)
-                        if row.hour_prep_line
-                        else "",
-                        "hour_prep_driver": str(row.hour_prep_driver)
-                        if row.hour_prep_driver
-                        else "",
-                        "hour_work_actual": str(row.hour_work_actual)
-                        if row.hour_work_actual
-                        else "",
-                        "profit_start": str(row.profit_start)
-                        if row.profit_start
-                        else "",
-                        "profit_end": str(row.profit_end) if row.profit_end else "",
-                        "status": "active",
-                    }
-                )
-
-            return {
-                "assignments": assignments,
-                "total_count": len(assignments),
-                "date": assignment_date,
-                "query_used": "Direct database query bypassing service layer",
-            }
+        target_date = date.fromisoformat(assignment_date)
 
+        # Only the changes since a previous response
+        if since is not None:
+            body = await assignment_service.get_assignments_delta_async(
+                "direct", target_date, limit, since, keys
+            )
+            return _assignments_response(body, None)
+
+        body, encoding = await assignment_service.get_assignments_json_async(
+            "direct",
+            target_date,
+            limit,
+            cursor,
+            with_total,
+            layout,
+            encoding=_accepted_encoding(request),
+            fields=keys,
+        )
+
+        return _assignments_response(body, encoding)
+
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid date format: {str(e)}"
+        ) from e
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error in direct assignments: {str(e)}"
         ) from e
 
 
+def _view_fields(view: str, fields: str | None) -> tuple[str, ...] | None:
+    """Parse and validate the ``fields`` parameter of an assignment view."""
+    keys = parse_fields(fields)
+    try:
+        ASSIGNMENT_VIEWS[view].select_fields(keys)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return keys
+
+
+def _check_since(
+    since: str | None,
+    cursor: str | None,
+    keys: tuple[str, ...] | None,
+    layout: str = "rows",
+) -> None:
+    """Reject ``since`` combined with parameters delta sync does not support."""
+    if since is None:
+        return
+    if cursor is not None:
+        raise HTTPException(status_code=400, detail="since cannot be used with cursor")
+    if layout != "rows":
+        raise HTTPException(status_code=400, detail="since needs the rows layout")
+    if keys is not None and "id" not in keys:
+        raise HTTPException(status_code=400, detail="since needs the id field")
+
+
+def _accepted_encoding(request: Request) -> str | None:
+    """Pick the response encoding the client accepts, if compression is on."""
+    if not settings.compression_enabled:
+        return None
+    return negotiate_encoding(request.headers.get("accept-encoding"))
+
+
+def _assignments_response(body: bytes, encoding: str | None) -> Response:
+    """Build a JSON response from serialized (possibly precompressed) bytes."""
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @router.get("/simple-assignments")
 async def get_simple_assignments(
+    request: Request,
     assignment_date: str | None = Query(
         None, description="Assignment date (YYYY-MM-DD)"
     ),
     limit: int = Query(10, description="Number of records to return"),
-) -> dict[str, Any]:
+    cursor: str | None = Query(None, description="Cursor from next_cursor"),
+    with_total: bool = Query(False, description="Include total rows for the date"),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    since: str | None = Query(None, description=SINCE_DESCRIPTION),
+) -> Response:
     """Get simple list of assignments for dispatcher view."""
+    keys = _view_fields("simple", fields)
+    _check_since(since, cursor, keys)
     try:
         # Parse date if provided
         target_date = None
         if assignment_date:
             target_date = date.fromisoformat(assignment_date)
 
-        # Get data from service
-        result = assignment_service.get_simple_assignments(target_date, limit)
-
-        return result
-
+        # Only the changes since a previous response
+        if since is not None:
+            body = await assignment_service.get_assignments_delta_async(
+                "simple", target_date, limit, since, keys
+            )
+            return _assignments_response(body, None)
+
+        # Get serialized data from service (cached per date)
+        body, encoding = await assignment_service.get_assignments_json_async(
+            "simple",
+            target_date,
+            limit,
+            cursor,
+            with_total,
+            encoding=_accepted_encoding(request),
+            fields=keys,
+        )
+
+        return _assignments_response(body, encoding)
+
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"Invalid date format: {str(e)}"
@@ -513,23 +486,47 @@ async def get_simple_assignments(
 
 @router.get("/extended-assignments")
 async def get_extended_assignments(
+    request: Request,
     assignment_date: str | None = Query(
         None, description="Assignment date (YYYY-MM-DD)"
     ),
     limit: int = Query(50, description="Number of records to return"),
-) -> dict[str, Any]:
+    cursor: str | None = Query(None, description="Cursor from next_cursor"),
+    with_total: bool = Query(False, description="Include total rows for the date"),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    since: str | None = Query(None, description=SINCE_DESCRIPTION),
+) -> Response:
     """Get extended list of assignments with more fields for dispatcher view."""
+    keys = _view_fields("extended", fields)
+    _check_since(since, cursor, keys)
     try:
         # Parse date if provided
         target_date = None
         if assignment_date:
             target_date = date.fromisoformat(assignment_date)
 
-        # Get data from service
-        result = assignment_service.get_extended_assignments(target_date, limit)
-
-        return result
-
+        # Only the changes since a previous response
+        if since is not None:
+            body = await assignment_service.get_assignments_delta_async(
+                "extended", target_date, limit, since, keys
+            )
+            return _assignments_response(body, None)
+
+        # Get serialized data from service (cached per date)
+        body, encoding = await assignment_service.get_assignments_json_async(
+            "extended",
+            target_date,
+            limit,
+            cursor,
+            with_total,
+            encoding=_accepted_encoding(request),
+            fields=keys,
+        )
+
+        return _assignments_response(body, encoding)
+
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"Invalid date format: {str(e)}"
@@ -542,23 +539,53 @@ async def get_extended_assignments(
 
 @router.get("/full-assignments")
 async def get_full_assignments(
+    request: Request,
     assignment_date: str | None = Query(
         None, description="Assignment date (YYYY-MM-DD)"
     ),
     limit: int = Query(100, description="Number of records to return"),
-) -> dict[str, Any]:
+    cursor: str | None = Query(None, description="Cursor from next_cursor"),
+    with_total: bool = Query(False, description="Include total rows for the date"),
+    layout: str = Query("rows", description="Response layout: rows or columnar"),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    since: str | None = Query(None, description=SINCE_DESCRIPTION),
+) -> Response:
     """Get full assignment data with all MS Access fields for dispatcher view."""
+    if layout not in LAYOUTS:
+        raise HTTPException(
+            status_code=400, detail=f"layout must be one of: {', '.join(LAYOUTS)}"
+        )
+    keys = _view_fields("full", fields)
+    _check_since(since, cursor, keys, layout)
     try:
         # Parse date if provided
         target_date = None
         if assignment_date:
             target_date = date.fromisoformat(assignment_date)
 
-        # Get data from service
-        result = assignment_service.get_full_assignments(target_date, limit)
-
-        return result
-
+        # Only the changes since a previous response
+        if since is not None:
+            body = await assignment_service.get_assignments_delta_async(
+                "full", target_date, limit, since, keys
+            )
+            return _assignments_response(body, None)
+
+        # Get serialized data from service (cached per date)
+        body, encoding = await assignment_service.get_assignments_json_async(
+            "full",
+            target_date,
+            limit,
+            cursor,
+            with_total,
+            layout,
+            encoding=_accepted_encoding(request),
+            fields=keys,
+        )
+
+        return _assignments_response(body, encoding)
+
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"Invalid date format: {str(e)}"
@@ -569,6 +596,29 @@ async def get_full_assignments(
         ) from e
 
 
+@router.get("/assignments/stream")
+async def stream_assignment_changes(
+    assignment_date: str | None = Query(
+        None, description="Assignment date (YYYY-MM-DD)"
+    ),
+) -> StreamingResponse:
+    """Stream inserted, updated and deleted assignments of a date as SSE."""
+    try:
+        target_date = (
+            date.fromisoformat(assignment_date) if assignment_date else date.today()
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid date format: {str(e)}"
+        ) from e
+
+    return StreamingResponse(
+        change_hub.stream(target_date),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/available-dates")
 async def get_available_dates(
     days_back: int = Query(
@@ -577,7 +627,7 @@ async def get_available_dates(
 ) -> dict[str, Any]:
     """Get available dates with assignment data."""
     try:
-        dates = assignment_service.get_available_dates(days_back)
+        dates = await assignment_service.get_available_dates_async(days_back)
 
         return {"available_dates": dates, "total_count": len(dates)}
 
@@ -601,7 +651,7 @@ async def get_dispatcher_statistics(
             target_date = date.fromisoformat(assignment_date)
 
         # Get statistics from service
-        stats = assignment_service.get_statistics(target_date)
+        stats = await assignment_service.get_statistics_async(target_date)
 
         return stats
 
@@ -615,12 +665,162 @@ async def get_dispatcher_statistics(
         ) from e
 
 
+def _report_range(date_from: str | None, date_to: str | None) -> tuple[date, date]:
+    """Parse a report date range; defaults to the 30 days up to today."""
+    end = date.fromisoformat(date_to) if date_to else date.today()
+    start = date.fromisoformat(date_from) if date_from else end - timedelta(days=29)
+    if start > end:
+        raise ValueError("date_from is after date_to")
+    return start, end
+
+
+@router.get("/reports/daily")
+async def get_daily_report(
+    date_from: str | None = Query(None, description="First date (YYYY-MM-DD)"),
+    date_to: str | None = Query(None, description="Last date (YYYY-MM-DD)"),
+) -> dict[str, Any]:
+    """Get per-date statistics of a date range from the daily summary."""
+    try:
+        start, end = _report_range(date_from, date_to)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid date range: {str(e)}"
+        ) from e
+
+    try:
+        days = await assignment_service.get_daily_report_async(start, end)
+        return {
+            "date_from": start.isoformat(),
+            "date_to": end.isoformat(),
+            "days": days,
+            "total_count": len(days),
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error fetching daily report: {str(e)}"
+        ) from e
+
+
+@router.get("/reports/route-shift")
+async def get_route_shift_report(
+    date_from: str | None = Query(None, description="First date (YYYY-MM-DD)"),
+    date_to: str | None = Query(None, description="Last date (YYYY-MM-DD)"),
+    group_by: str = Query(
+        "route_shift", description="Grouping: route, shift or route_shift"
+    ),
+) -> dict[str, Any]:
+    """Get assignment totals by route and shift from the daily summary."""
+    if group_by not in REPORT_GROUPS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"group_by must be one of: {', '.join(REPORT_GROUPS)}",
+        )
+    try:
+        start, end = _report_range(date_from, date_to)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid date range: {str(e)}"
+        ) from e
+
+    try:
+        rows = await assignment_service.get_route_shift_report_async(
+            start, end, group_by
+        )
+        return {
+            "date_from": start.isoformat(),
+            "date_to": end.isoformat(),
+            "group_by": group_by,
+            "rows": rows,
+            "total_count": len(rows),
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error fetching route/shift report: {str(e)}"
+        ) from e
+
+
+@router.get("/export/assignments")
+async def export_assignments(
+    date_from: str = Query(..., description="First date (YYYY-MM-DD)"),
+    date_to: str = Query(..., description="Last date (YYYY-MM-DD)"),
+    export_format: str = Query(
+        "parquet", alias="format", description="Export format: arrow or parquet"
+    ),
+    chunk_days: int = Query(7, ge=1, le=31, description="Days read per query"),
+) -> StreamingResponse:
+    """Export zanaradka joined with tabel as a zstd Arrow IPC stream or Parquet."""
+    if not arrow_export.pyarrow_available():
+        raise HTTPException(
+            status_code=501,
+            detail='Export requires pyarrow: pip install "khtrm-system[export]"',
+        )
+    if export_format not in arrow_export.EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"format must be one of: {', '.join(arrow_export.EXPORT_FORMATS)}",
+        )
+    try:
+        start, end = _report_range(date_from, date_to)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid date range: {str(e)}"
+        ) from e
+
+    pieces = arrow_export.export_assignments(start, end, export_format, chunk_days)
+
+    # Read the first date chunk before responding, so query errors become a 500
+    try:
+        first = await asyncio.to_thread(next, pieces)
+    except Exception as e:
+        pieces.close()
+        raise HTTPException(
+            status_code=500, detail=f"Error exporting assignments: {str(e)}"
+        ) from e
+
+    def body() -> Iterator[bytes]:
+        # Closing the pieces releases their connection, also when the client
+        # disconnects mid-stream and the response stops iterating
+        with closing(pieces):
+            yield first
+            yield from pieces
+
+    media_type, extension = arrow_export.EXPORT_FORMATS[export_format]
+    filename = f"zanaradka_{start.isoformat()}_{end.isoformat()}.{extension}"
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/daily-stats-status")
+async def get_daily_stats_status() -> dict[str, Any]:
+    """Get the outcome of the last daily summary refresh."""
+    return daily_stats_maintainer.status()
+
+
+@router.get("/change-stream-status")
+async def get_change_stream_status() -> dict[str, Any]:
+    """Watched dates of the assignment change stream."""
+    return change_hub.status()
+
+
+@router.get("/cache-stats")
+async def get_cache_stats() -> dict[str, Any]:
+    """Get hit/miss counters and memory usage of the assignment cache."""
+    return {
+        **assignment_service.cache.stats(),
+        "delta_sync": assignment_service.snapshots.stats(),
+        "single_flight": assignment_service.flights.stats(),
+    }
+
+
 @router.get("/test-connection")
 async def test_database_connection() -> dict[str, Any]:
     """Test database connection to verify everything works."""
     try:
         # Try to get available dates as a connection test
-        dates = assignment_service.get_available_dates(7)
+        dates = await assignment_service.get_available_dates_async(7)
 
         return {
             "status": "success",
@@ -636,73 +836,116 @@ async def test_database_connection() -> dict[str, Any]:
 @router.get("/admin/databases")
 async def get_available_databases() -> dict[str, Any]:
     """Get list of available databases for admin selection."""
+
+    def fetch(conn: Connection) -> dict[str, Any]:
+        # Get all databases
+        query = text("SHOW DATABASES")
+        result = conn.execute(query)
+        all_databases = [row[0] for row in result.fetchall()]
+
+        # Filter out system databases
+        system_dbs = ["information_schema", "mysql", "performance_schema", "sys"]
+        user_databases = [db for db in all_databases if db not in system_dbs]
+
+        return {
+            "databases": user_databases,
+            "default_database": "saltdepoavt_",
+            "total_count": len(user_databases),
+        }
+
     try:
-        with engine.connect() as conn:
-            # Get all databases
-            query = text("SHOW DATABASES")
-            result = conn.execute(query)
-            all_databases = [row[0] for row in result.fetchall()]
-
-            # Filter out system databases
-            system_dbs = ["information_schema", "mysql", "performance_schema", "sys"]
-            user_databases = [db for db in all_databases if db not in system_dbs]
-
-            return {
-                "databases": user_databases,
-                "default_database": "saltdepoavt_",
-                "total_count": len(user_databases),
-            }
+        return await run_in_connection(fetch)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error fetching databases: {str(e)}"
         ) from e
 
 
+@router.get("/admin/engines")
+async def get_engine_stats() -> dict[str, Any]:
+    """Get pool metrics of the per-database admin engines."""
+    return engine_registry.stats()
+
+
 @router.get("/admin/tables")
 async def get_database_tables(
     database_name: str = Query(..., description="Database name"),
+    exact_counts: bool = Query(
+        False, description="Include exact row counts from the background job"
+    ),
 ) -> dict[str, Any]:
-    """Get list of tables in the specified database."""
+    """Get list of tables in the specified database.
+
+    Row counts are the estimates kept in information_schema. Exact counts are
+    computed by a background job and returned from its cache.
+    """
+
+    def fetch(conn: Connection) -> list[dict[str, Any]]:
+        # One query for all tables instead of COUNT(*) + SHOW COLUMNS per table
+        query = text("""
+            SELECT
+                t.TABLE_NAME as name,
+                t.TABLE_ROWS as row_count,
+                t.DATA_LENGTH as data_size,
+                t.INDEX_LENGTH as index_size,
+                t.ENGINE as engine,
+                t.UPDATE_TIME as update_time,
+                COUNT(c.COLUMN_NAME) as column_count
+            FROM information_schema.TABLES t
+            LEFT JOIN information_schema.COLUMNS c
+                ON c.TABLE_SCHEMA = t.TABLE_SCHEMA
+                AND c.TABLE_NAME = t.TABLE_NAME
+            WHERE t.TABLE_SCHEMA = :database_name
+            GROUP BY
+                t.TABLE_NAME,
+                t.TABLE_ROWS,
+                t.DATA_LENGTH,
+                t.INDEX_LENGTH,
+                t.ENGINE,
+                t.UPDATE_TIME
+            ORDER BY t.TABLE_NAME
+        """)
+        result = conn.execute(query, {"database_name": database_name})
+
+        return [
+            {
+                "name": row.name,
+                "row_count": int(row.row_count or 0),
+                "row_count_estimated": True,
+                "column_count": int(row.column_count or 0),
+                "data_size": int(row.data_size or 0),
+                "index_size": int(row.index_size or 0),
+                "engine": row.engine,
+                "update_time": row.update_time.isoformat()
+                if row.update_time
+                else None,
+            }
+            for row in result.fetchall()
+        ]
+
     try:
-        with engine.connect() as conn:
-            # Use the specified database
-            conn.execute(text(f"USE `{database_name}`"))
-
-            # Get all tables
-            query = text("SHOW TABLES")
-            result = conn.execute(query)
-            tables = [row[0] for row in result.fetchall()]
-
-            # Get table info with row counts and column counts
-            table_info = []
-            for table in tables:
-                try:
-                    count_query = text(f"SELECT COUNT(*) FROM `{table}`")
-                    count_result = conn.execute(count_query)
-                    row_count = count_result.scalar()
-
-                    # Get column count
-                    columns_query = text(f"SHOW COLUMNS FROM `{table}`")
-                    columns_result = conn.execute(columns_query)
-                    column_count = len(columns_result.fetchall())
-
-                    table_info.append(
-                        {
-                            "name": table,
-                            "row_count": row_count,
-                            "column_count": column_count,
-                        }
-                    )
-                except Exception:
-                    table_info.append(
-                        {"name": table, "row_count": 0, "column_count": 0}
-                    )
+        table_info = await run_in_database(database_name, fetch)
 
-            return {
-                "database": database_name,
-                "tables": table_info,
-                "total_count": len(tables),
+        response: dict[str, Any] = {
+            "database": database_name,
+            "tables": table_info,
+            "total_count": len(table_info),
+        }
+
+        if exact_counts:
+            cached = exact_row_counts.get(database_name)
+            if cached is None or cached["stale"]:
+                exact_row_counts.schedule_refresh(database_name)
+            if cached is not None:
+                for table in table_info:
+                    if table["name"] in cached["counts"]:
+                        table["exact_row_count"] = cached["counts"][table["name"]]
+            response["exact_counts"] = {
+                "computed_at": cached["computed_at"] if cached else None,
+                "refreshing": exact_row_counts.is_refreshing(database_name),
             }
+
+        return response
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error fetching tables: {str(e)}"
@@ -715,56 +958,58 @@ async def get_table_fields(
     table_name: str = Query(..., description="Table name"),
 ) -> dict[str, Any]:
     """Get field information for the specified table."""
+
+    def fetch(conn: Connection) -> dict[str, Any]:
+        table_ref = qualified_name(database_name, table_name)
+
+        # Get table structure
+        describe_query = text(f"DESCRIBE {table_ref}")
+        result = conn.execute(describe_query)
+        fields = result.fetchall()
+
+        # Get sample data to understand field content
+        sample_query = text(f"SELECT * FROM {table_ref} LIMIT 3")
+        sample_result = conn.execute(sample_query)
+        sample_data = sample_result.fetchall()
+        column_names = list(sample_result.keys()) if sample_data else []
+
+        field_info = []
+        for field in fields:
+            field_name = field[0]
+            field_type = field[1]
+            is_nullable = field[2] == "YES"
+            is_key = field[3] != ""
+            default_value = field[4]
+
+            # Get sample values for this field
+            sample_values = []
+            for row in sample_data:
+                if field_name in column_names:
+                    field_index = column_names.index(field_name)
+                    value = row[field_index]
+                    if value is not None:
+                        sample_values.append(str(value)[:50])  # Limit to 50 chars
+
+            field_info.append(
+                {
+                    "name": field_name,
+                    "type": field_type,
+                    "nullable": is_nullable,
+                    "is_key": is_key,
+                    "default_value": default_value,
+                    "sample_values": sample_values[:3],  # Max 3 sample values
+                }
+            )
+
+        return {
+            "database": database_name,
+            "table": table_name,
+            "fields": field_info,
+            "total_fields": len(field_info),
+        }
+
     try:
-        with engine.connect() as conn:
-            # Use the specified database
-            conn.execute(text(f"USE `{database_name}`"))
-
-            # Get table structure
-            describe_query = text(f"DESCRIBE `{table_name}`")
-            result = conn.execute(describe_query)
-            fields = result.fetchall()
-
-            # Get sample data to understand field content
-            sample_query = text(f"SELECT * FROM `{table_name}` LIMIT 3")
-            sample_result = conn.execute(sample_query)
-            sample_data = sample_result.fetchall()
-            column_names = list(sample_result.keys()) if sample_data else []
-
-            field_info = []
-            for field in fields:
-                field_name = field[0]
-                field_type = field[1]
-                is_nullable = field[2] == "YES"
-                is_key = field[3] != ""
-                default_value = field[4]
-
-                # Get sample values for this field
-                sample_values = []
-                for row in sample_data:
-                    if field_name in column_names:
-                        field_index = column_names.index(field_name)
-                        value = row[field_index]
-                        if value is not None:
-                            sample_values.append(str(value)[:50])  # Limit to 50 chars
-
-                field_info.append(
-                    {
-                        "name": field_name,
-                        "type": field_type,
-                        "nullable": is_nullable,
-                        "is_key": is_key,
-                        "default_value": default_value,
-                        "sample_values": sample_values[:3],  # Max 3 sample values
-                    }
-                )
-
-            return {
-                "database": database_name,
-                "table": table_name,
-                "fields": field_info,
-                "total_fields": len(field_info),
-            }
+        return await run_in_database(database_name, fetch)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error fetching table fields: {str(e)}"
@@ -777,60 +1022,110 @@ async def get_table_data(
     table_name: str = Query(..., description="Table name"),
     columns: str = Query(None, description="Comma-separated list of columns to fetch"),
     limit: int = Query(100, description="Maximum number of records to return"),
-) -> dict[str, Any]:
+    export_format: str = Query(
+        "json",
+        alias="format",
+        description="json, or ndjson/csv to stream rows (limit=0 exports all rows)",
+    ),
+) -> Any:
     """Get data from the specified table with optional column filtering."""
+    # Parse columns if provided
+    if columns:
+        # Clean and validate column names
+        column_list = [col.strip() for col in columns.split(",")]
+        # Escape column names
+        escaped_columns = [quote_identifier(col) for col in column_list if col]
+        columns_str = ", ".join(escaped_columns)
+    else:
+        columns_str = "*"
+
+    select_sql = (
+        f"SELECT {columns_str} FROM {qualified_name(database_name, table_name)}"
+    )
+
+    if export_format != "json":
+        return await stream_table_data(
+            database_name, table_name, select_sql, limit, export_format
+        )
+
+    def fetch(conn: Connection) -> dict[str, Any]:
+        # Build and execute query
+        query = text(f"{select_sql} LIMIT {limit}")
+        result = conn.execute(query)
+        rows = result.fetchall()
+
+        # Get column names
+        column_names = list(result.keys())
+
+        # Format data
+        data = []
+        for row in rows:
+            row_dict: dict[str, Any] = {}
+            for i, value in enumerate(row):
+                column_name = column_names[i]
+                # Convert values to JSON-serializable format
+                if value is None:
+                    row_dict[column_name] = None
+                elif isinstance(value, date):
+                    row_dict[column_name] = value.isoformat()
+                else:
+                    row_dict[column_name] = str(value)
+            data.append(row_dict)
+
+        return {
+            "database": database_name,
+            "table": table_name,
+            "columns": column_names,
+            "data": data,
+            "total_rows": len(data),
+            "limit": limit,
+        }
+
     try:
-        with engine.connect() as conn:
-            # Use the specified database
-            conn.execute(text(f"USE `{database_name}`"))
-
-            # Parse columns if provided
-            if columns:
-                # Clean and validate column names
-                column_list = [col.strip() for col in columns.split(",")]
-                # Escape column names
-                escaped_columns = [f"`{col}`" for col in column_list if col]
-                columns_str = ", ".join(escaped_columns)
-            else:
-                columns_str = "*"
-
-            # Build and execute query
-            query = text(f"SELECT {columns_str} FROM `{table_name}` LIMIT {limit}")
-            result = conn.execute(query)
-            rows = result.fetchall()
-
-            # Get column names
-            column_names = list(result.keys())
-
-            # Format data
-            data = []
-            for row in rows:
-                row_dict: dict[str, Any] = {}
-                for i, value in enumerate(row):
-                    column_name = column_names[i]
-                    # Convert values to JSON-serializable format
-                    if value is None:
-                        row_dict[column_name] = None
-                    elif isinstance(value, date):
-                        row_dict[column_name] = value.isoformat()
-                    else:
-                        row_dict[column_name] = str(value)
-                data.append(row_dict)
-
-            return {
-                "database": database_name,
-                "table": table_name,
-                "columns": column_names,
-                "data": data,
-                "total_rows": len(data),
-                "limit": limit,
-            }
+        return await run_in_database(database_name, fetch)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error fetching table data: {str(e)}"
         ) from e
 
 
+async def stream_table_data(
+    database_name: str,
+    table_name: str,
+    select_sql: str,
+    limit: int,
+    export_format: str,
+) -> StreamingResponse:
+    """Stream a table as NDJSON or CSV from a server-side cursor."""
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"format must be one of: json, {', '.join(EXPORT_FORMATS)}",
+        )
+    query = text(f"{select_sql} LIMIT {limit}" if limit > 0 else select_sql)
+    chunks = stream_in_database(
+        database_name, query, settings.table_export_chunk_rows
+    )
+
+    # Fetch the first chunk before responding, so query errors become a 500
+    try:
+        first = await anext(chunks)
+    except Exception as e:
+        await chunks.aclose()
+        raise HTTPException(
+            status_code=500, detail=f"Error fetching table data: {str(e)}"
+        ) from e
+
+    media_type, extension = EXPORT_FORMATS[export_format]
+    return StreamingResponse(
+        encode_chunks(export_format, first, chunks),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{table_name}.{extension}"'
+        },
+    )
+
+
 @router.post("/admin/custom-table-data")
 async def get_custom_table_data(
     database_name: str = Query(..., description="Database name"),
@@ -839,97 +1134,96 @@ async def get_custom_table_data(
     limit: int = Query(100, description="Maximum number of records to return"),
 ) -> dict[str, Any]:
     """Get data from table with custom fields processed."""
-    try:
-        with engine.connect() as conn:
-            # Use the specified database
-            conn.execute(text(f"USE `{database_name}`"))
 
-            # Parse the request
-            columns = request.get("columns", [])
-            custom_fields = request.get("custom_fields", [])
-            
-            # Build the SELECT clause
-            select_parts = []
-            join_clauses = []
-            
-            # Add regular columns
-            for col in columns:
-                if not col.get("is_custom", False):
-                    select_parts.append(f"`{col['field']}` AS `{col['field']}`")
-            
-            # Process custom fields
-            for field in custom_fields:
-                field_sql = generate_custom_field_sql(field, conn, database_name)
-                if field_sql:
-                    select_parts.append(field_sql)
-                    
-                    # Add JOIN clauses if needed
-                    if field.get("type") == "join":
-                        join_sql = generate_join_clause(field, database_name)
-                        if join_sql:
-                            join_clauses.append(join_sql)
-                    elif field.get("type") == "lookup":
-                        lookup_sql = generate_lookup_join(field, database_name)
-                        if lookup_sql:
-                            join_clauses.append(lookup_sql)
-            
-            # Build the full query
-            if not select_parts:
-                select_parts = ["*"]
-                
-            query_parts = [
-                f"SELECT {', '.join(select_parts)}",
-                f"FROM `{table_name}`"
-            ]
-            
-            # Add JOIN clauses
-            for join_clause in join_clauses:
-                query_parts.append(join_clause)
-            
-            # Add GROUP BY for aggregate fields
-            group_by_fields = []
-            for field in custom_fields:
-                if field.get("type") == "aggregate" and field.get("config", {}).get("groupByField"):
-                    group_by_fields.append(f"`{field['config']['groupByField']}`")
-            
-            if group_by_fields:
-                query_parts.append(f"GROUP BY {', '.join(group_by_fields)}")
-            
-            query_parts.append(f"LIMIT {limit}")
-            
-            final_query = " ".join(query_parts)
-            
-            # Execute the query
-            result = conn.execute(text(final_query))
-            rows = result.fetchall()
-            
-            # Get column names
-            column_names = list(result.keys())
-            
-            # Format data
-            data = []
-            for row in rows:
-                row_dict: dict[str, Any] = {}
-                for i, value in enumerate(row):
-                    column_name = column_names[i]
-                    # Convert values to JSON-serializable format
-                    if value is None:
-                        row_dict[column_name] = None
-                    elif isinstance(value, date):
-                        row_dict[column_name] = value.isoformat()
-                    else:
-                        row_dict[column_name] = str(value)
-                data.append(row_dict)
-            
-            return {
-                "database": database_name,
-                "table": table_name,
-                "columns": column_names,
-                "data": data,
-                "total_records": len(data),
-                "query": final_query  # For debugging
-            }
-            
+    def fetch(conn: Connection) -> dict[str, Any]:
+        # Parse the request
+        columns = request.get("columns", [])
+        custom_fields = request.get("custom_fields", [])
+
+        # Build the SELECT clause
+        select_parts = []
+        join_clauses = []
+
+        # Add regular columns
+        for col in columns:
+            if not col.get("is_custom", False):
+                select_parts.append(f"`{col['field']}` AS `{col['field']}`")
+
+        # Process custom fields
+        for field in custom_fields:
+            field_sql = generate_custom_field_sql(field, conn, database_name)
+            if field_sql:
+                select_parts.append(field_sql)
+
+                # Add JOIN clauses if needed
+                if field.get("type") == "join":
+                    join_sql = generate_join_clause(field, database_name)
+                    if join_sql:
+                        join_clauses.append(join_sql)
+                elif field.get("type") == "lookup":
+                    lookup_sql = generate_lookup_join(field, database_name)
+                    if lookup_sql:
+                        join_clauses.append(lookup_sql)
+
+        # Build the full query
+        if not select_parts:
+            select_parts = ["*"]
+
+        query_parts = [
+            f"SELECT {', '.join(select_parts)}",
+            f"FROM {qualified_name(database_name, table_name)} AS `{table_name}`"
+        ]
+
+        # Add JOIN clauses
+        for join_clause in join_clauses:
+            query_parts.append(join_clause)
+
+        # Add GROUP BY for aggregate fields
+        group_by_fields = []
+        for field in custom_fields:
+            if field.get("type") == "aggregate" and field.get("config", {}).get("groupByField"):
+                group_by_fields.append(f"`{field['config']['groupByField']}`")
+
+        if group_by_fields:
+            query_parts.append(f"GROUP BY {', '.join(group_by_fields)}")
+
+        query_parts.append(f"LIMIT {limit}")
+
+        final_query = " ".join(query_parts)
+
+        # Execute the query
+        result = conn.execute(text(final_query))
+        rows = result.fetchall()
+
+        # Get column names
+        column_names = list(result.keys())
+
+        # Format data
+        data = []
+        for row in rows:
+            row_dict: dict[str, Any] = {}
+            for i, value in enumerate(row):
+                column_name = column_names[i]
+                # Convert values to JSON-serializable format
+                if value is None:
+                    row_dict[column_name] = None
+                elif isinstance(value, date):
+                    row_dict[column_name] = value.isoformat()
+                else:
+                    row_dict[column_name] = str(value)
+            data.append(row_dict)
+
+        return {
+            "database": database_name,
+            "table": table_name,
+            "columns": column_names,
+            "data": data,
+            "total_records": len(data),
+            "query": final_query  # For debugging
+        }
+
+    try:
+        return await run_in_database(database_name, fetch)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error fetching custom table data: {str(e)}"
@@ -1055,7 +1349,8 @@ def generate_join_clause(config: dict, database_name: str) -> str:
     join_type = config.get("joinType", "LEFT")
     
     if join_table and source_field and target_field:
-        return f"{join_type} JOIN `{join_table}` ON `{source_field}` = `{join_table}`.`{target_field}`"
+        join_ref = qualified_name(database_name, join_table)
+        return f"{join_type} JOIN {join_ref} AS `{join_table}` ON `{source_field}` = `{join_table}`.`{target_field}`"
     
     return ""
 
@@ -1067,7 +1362,8 @@ def generate_lookup_join(config: dict, database_name: str) -> str:
     search_field = config.get("lookupSearchField", "")
     
     if lookup_table and key_field and search_field:
-        return f"LEFT JOIN `{lookup_table}` AS lookup_table ON `{key_field}` = lookup_table.`{search_field}`"
+        lookup_ref = qualified_name(database_name, lookup_table)
+        return f"LEFT JOIN {lookup_ref} AS lookup_table ON `{key_field}` = lookup_table.`{search_field}`"
     
     return ""
 
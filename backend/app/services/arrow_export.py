@@ -0,0 +1,291 @@
+"""Arrow IPC / Parquet export of zanaradka joined with tabel.
+
+Rows are read one date range chunk at a time (``chunk_days`` days per
+query), converted into a typed Arrow record batch and written straight to
+the output, so memory stays bounded by one chunk:
+
+- dates as ``date32``
+- ``HH:MM`` times of zanaradka and the second counters of tabel as
+  ``duration[s]``
+- ``tabel.plan_chas`` as a decimal, numbers as sized integers
+- driver, conductor and note columns with mojibake repaired
+
+Both formats are compressed with zstd. Requires the optional ``pyarrow``
+dependency (``pip install "khtrm-system[export]"``).
+
+Usage (from the ``backend`` directory)::
+
+    python -m app.services.arrow_export --from 2025-07-01 --to 2025-07-31 \\
+        --format parquet --output zanaradka_2025_07.parquet
+"""
+
+import argparse
+import re
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Engine, create_engine, text
+
+from ..database import engine
+from .text_encoding import fix_ukrainian_encoding_batch
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Export format -> (media type, file extension)
+EXPORT_FORMATS: dict[str, tuple[str, str]] = {
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+_CLOCK = re.compile(r"\s*(-?)(\d{1,3}):(\d{1,2})(?::(\d{1,2}))?\s*")
+
+
+def pyarrow_available() -> bool:
+    """Check whether the optional pyarrow dependency is installed."""
+    return pa is not None
+
+
+def clock_seconds(value: Any) -> int | None:
+    """Seconds of an ``HH:MM[:SS]`` text, None when empty or malformed."""
+    return None if value is None else _parse_clock(str(value))
+
+
+@lru_cache(maxsize=8192)
+def _parse_clock(value: str) -> int | None:
+    # A day has only 1440 distinct HH:MM values, so parses are memoized
+    match = _CLOCK.fullmatch(value)
+    if match is None:
+        return None
+    sign, hours, minutes, seconds = match.groups()
+    total = int(hours) * 3600 + int(minutes) * 60 + int(seconds or 0)
+    return -total if sign else total
+
+
+def _as_decimal(value: Any) -> Decimal | None:
+    return None if value is None else Decimal(str(value))
+
+
+def _as_text(value: Any) -> str | None:
+    return None if value is None else str(value)
+
+
+@dataclass(frozen=True)
+class ExportColumn:
+    """Output column: SQL expression, Arrow type name and value converter."""
+
+    name: str
+    sql: str
+    arrow_type: str
+    convert: Callable[[Any], Any] | None = None
+    repair: bool = False
+
+
+def _clock(name: str, source: str) -> ExportColumn:
+    return ExportColumn(name, source, "duration", clock_seconds)
+
+
+EXPORT_COLUMNS: tuple[ExportColumn, ...] = (
+    ExportColumn("key", "z.`key`", "int32"),
+    ExportColumn("data_day", "z.data_day", "date32"),
+    ExportColumn("marshrut", "z.marshrut", "int16"),
+    ExportColumn("vipusk", "z.vipusk", "int16"),
+    ExportColumn("smena", "z.smena", "string", _as_text),
+    ExportColumn("tipvipusk", "z.tipvipusk", "string"),
+    ExportColumn("pe№", "z.`pe№`", "int32"),
+    ExportColumn("tabvoditel", "z.tabvoditel", "int32"),
+    ExportColumn("fiovoditel", "z.fiovoditel", "string", repair=True),
+    ExportColumn("tabconduktor", "z.tabconduktor", "int32"),
+    ExportColumn("fioconduktor", "z.fioconduktor", "string", repair=True),
+    _clock("tvih", "z.tvih"),
+    _clock("tvihmarsrut", "z.tvihmarsrut"),
+    _clock("tzah", "z.tzah"),
+    _clock("tend", "z.tend"),
+    ExportColumn("kpvih", "z.kpvih", "string"),
+    ExportColumn("kpzah", "z.kpzah", "string"),
+    _clock("tob1", "z.tob1"),
+    _clock("tob2", "z.tob2"),
+    ExportColumn("mestootst", "z.mestootst", "string"),
+    _clock("tna4otst", "z.tna4otst"),
+    _clock("tkonotst", "z.tkonotst"),
+    _clock("tPodgotovkaVod", "z.tPodgotovkaVod"),
+    _clock("tSda4aVod", "z.tSda4aVod"),
+    _clock("tVihdepoVod", "z.tVihdepoVod"),
+    _clock("tZahdepoVod", "z.tZahdepoVod"),
+    ExportColumn("putlist№", "z.`putlist№`", "string"),
+    ExportColumn("ZaprAdr", "z.ZaprAdr", "string"),
+    ExportColumn("den_nedeli", "z.den_nedeli", "string"),
+    ExportColumn("Soobhenie", "z.Soobhenie", "string", repair=True),
+    ExportColumn("tabel_key", "t.`key`", "int32"),
+    ExportColumn("tabel_status", "t.status", "string"),
+    ExportColumn("plan_chas", "t.plan_chas", "decimal(6,2)", _as_decimal),
+    ExportColumn("time_fakt_line", "t.time_fakt_line", "duration"),
+    ExportColumn("time_pr_depo", "t.time_pr_depo", "duration"),
+    ExportColumn("time_pr_line", "t.time_pr_line", "duration"),
+    ExportColumn("time_pr_vod", "t.time_pr_vod", "duration"),
+)
+
+
+def _arrow_type(name: str) -> Any:
+    if name == "duration":
+        return pa.duration("s")
+    if name.startswith("decimal("):
+        precision, scale = name[len("decimal(") : -1].split(",")
+        return pa.decimal128(int(precision), int(scale))
+    return getattr(pa, name)()
+
+
+def export_schema() -> Any:
+    """Arrow schema of the export."""
+    return pa.schema(
+        [
+            pa.field(column.name, _arrow_type(column.arrow_type))
+            for column in EXPORT_COLUMNS
+        ]
+    )
+
+
+def date_chunks(
+    date_from: date, date_to: date, chunk_days: int
+) -> Iterator[tuple[date, date]]:
+    """Split an inclusive date range into chunks of ``chunk_days`` days."""
+    start = date_from
+    while start <= date_to:
+        end = min(start + timedelta(days=chunk_days - 1), date_to)
+        yield start, end
+        start = end + timedelta(days=1)
+
+
+class _ChunkSink:
+    """Write-only file object that hands out what was written since last drain."""
+
+    def __init__(self) -> None:
+        self._parts: list[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data: Any) -> int:
+        chunk = bytes(data)
+        self._parts.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _record_batch(rows: list[Any], schema: Any) -> Any:
+    arrays = []
+    for index, column in enumerate(EXPORT_COLUMNS):
+        values = [row[index] for row in rows]
+        if column.repair:
+            values = [
+                fixed if value is not None else None
+                for value, fixed in zip(
+                    values, fix_ukrainian_encoding_batch(values), strict=True
+                )
+            ]
+        elif column.convert is not None:
+            values = [column.convert(value) for value in values]
+        arrays.append(pa.array(values, type=schema.field(index).type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def export_assignments(
+    date_from: date,
+    date_to: date,
+    export_format: str = "parquet",
+    chunk_days: int = 7,
+    bind: Engine | None = None,
+) -> Iterator[bytes]:
+    """Yield the encoded export piece by piece, one piece per date chunk."""
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed")
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    if chunk_days < 1:
+        raise ValueError("chunk_days must be at least 1")
+
+    schema = export_schema()
+    sink = _ChunkSink()
+    if export_format == "arrow":
+        writer = pa.ipc.new_stream(
+            sink, schema, options=pa.ipc.IpcWriteOptions(compression="zstd")
+        )
+    else:
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+
+    columns_sql = ", ".join(column.sql for column in EXPORT_COLUMNS)
+    query = text(f"""
+        SELECT {columns_sql}
+        FROM zanaradka z
+        LEFT JOIN tabel t ON (t.tab = z.tabvoditel AND t.data_day = z.data_day)
+        WHERE z.data_day BETWEEN :chunk_from AND :chunk_to
+        ORDER BY z.data_day, z.`key`
+    """)
+
+    with (bind or engine).connect() as conn:
+        for chunk_from, chunk_to in date_chunks(date_from, date_to, chunk_days):
+            rows = conn.execute(
+                query, {"chunk_from": chunk_from, "chunk_to": chunk_to}
+            ).fetchall()
+            if rows:
+                writer.write_batch(_record_batch(rows, schema))
+            yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Export zanaradka with tabel")
+    parser.add_argument(
+        "--from", dest="date_from", type=date.fromisoformat, required=True
+    )
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, required=True)
+    parser.add_argument("--format", choices=tuple(EXPORT_FORMATS), default="parquet")
+    parser.add_argument("--chunk-days", type=int, default=7)
+    parser.add_argument("--output", type=Path, help="Output file")
+    parser.add_argument("--url", help="Database URL (defaults to the app settings)")
+    args = parser.parse_args()
+
+    if not pyarrow_available():
+        raise SystemExit('pyarrow is not installed: pip install "khtrm-system[export]"')
+
+    extension = EXPORT_FORMATS[args.format][1]
+    output = args.output or Path(
+        f"zanaradka_{args.date_from}_{args.date_to}.{extension}"
+    )
+    bind = create_engine(args.url) if args.url else None
+
+    with output.open("wb") as file:
+        for piece in export_assignments(
+            args.date_from, args.date_to, args.format, args.chunk_days, bind
+        ):
+            file.write(piece)
+    print(f"Exported {args.date_from}..{args.date_to} to {output}")
+
+
+if __name__ == "__main__":
+    main()
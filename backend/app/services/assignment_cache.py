@@ -0,0 +1,249 @@
+"""In-memory cache of serialized assignment responses.
+
+Entries are keyed by the full request: ``(view, target_date, limit,
+page_cursor, with_total, layout, fields, tabel_fingerprint)``, where
+``page_cursor`` is the decoded keyset cursor, ``layout`` is ``rows`` or
+``columnar``, ``fields`` is the requested field subset and
+``tabel_fingerprint`` the fingerprint of the date's tabel rows for pages
+that join tabel (None otherwise). An entry holds the JSON bytes
+sent to the client and, once a client has asked for them, gzip/brotli
+variants of those bytes, so hot responses are compressed once rather than
+on every request. Variants count towards the size limit and are dropped
+with their entry.
+
+Instead of expiring on a timer, every entry remembers the fingerprint of
+its date (row count, max key and a checksum of the zanaradka rows for that
+day). When a newer fingerprint is recorded for a date, all entries built
+from the old one are dropped. Delta sync snapshots (``delta_sync``) are
+kept separately, per list, and checked against the same fingerprints.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any
+
+from ..config import settings
+
+CacheKey = tuple[Any, ...]
+Fingerprint = tuple[Any, ...]
+
+# zanaradka columns that feed the assignment views; a change in any of them
+# changes the per-date checksum and invalidates cached responses
+FINGERPRINT_COLUMNS = (
+    "`key`",
+    "marshrut",
+    "vipusk",
+    "smena",
+    "tipvipusk",
+    "`pe№`",
+    "tabvoditel",
+    "fiovoditel",
+    "tabconduktor",
+    "fioconduktor",
+    "tvih",
+    "tzah",
+    "`putlist№`",
+    "ZaprAdr",
+    "kpvih",
+    "tob1",
+    "tob2",
+    "tna4otst",
+    "tkonotst",
+    "tPodgotovkaVod",
+    "tPodgotovkaKon",
+    "tSda4aVod",
+    "tSda4aKon",
+    "tVihdepoVod",
+    "tVihdepoKon",
+    "tZahdepoVod",
+    "tZahdepoKon",
+    "Soobhenie",
+    "mestootst",
+    "den_nedeli",
+)
+
+
+def row_checksum_sql(columns: Sequence[str]) -> str:
+    """SQL checksum of one row over ``columns``.
+
+    CONCAT_WS skips NULLs, so each NULL is replaced by a '\\0' marker:
+    otherwise moving a value between adjacent nullable columns (tob1 -> tob2)
+    keeps the same checksum.
+    """
+    values = ", ".join(f"COALESCE({column}, '\\0')" for column in columns)
+    return f"CRC32(CONCAT_WS('|', {values}))"
+
+
+# Checksum of one zanaradka row over FINGERPRINT_COLUMNS
+ROW_CHECKSUM_SQL = row_checksum_sql(FINGERPRINT_COLUMNS)
+
+
+@dataclass
+class CacheEntry:
+    """Serialized response together with the fingerprint it was built from."""
+
+    body: bytes
+    fingerprint: Fingerprint
+    target_date: date
+    # Content-Encoding -> compressed body
+    variants: dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(body) for body in self.variants.values())
+
+
+class AssignmentCache:
+    """LRU cache of serialized responses bounded by total body size."""
+
+    def __init__(self, max_bytes: int, revalidate_seconds: float) -> None:
+        self.max_bytes = max_bytes
+        self.revalidate_seconds = revalidate_seconds
+        self._entries: OrderedDict[CacheKey, CacheEntry] = OrderedDict()
+        # (source table, date) -> (fingerprint, time it was queried)
+        self._fingerprints: dict[tuple[str, date], tuple[Fingerprint, float]] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def current_fingerprint(
+        self, target_date: date, source: str = "zanaradka"
+    ) -> Fingerprint | None:
+        """Return the last fingerprint of a date if it is recent enough to trust."""
+        with self._lock:
+            known = self._fingerprints.get((source, target_date))
+        if known is None:
+            return None
+        fingerprint, checked_at = known
+        if time.monotonic() - checked_at > self.revalidate_seconds:
+            return None
+        return fingerprint
+
+    def record_fingerprint(
+        self, target_date: date, fingerprint: Fingerprint, source: str = "zanaradka"
+    ) -> None:
+        """Store a freshly queried fingerprint and drop entries it makes stale.
+
+        Entries are checked against the zanaradka fingerprint of their date.
+        Fingerprints of other sources (``tabel``) are part of the key of the
+        entries that read them, so entries of an older one are no longer
+        requested and age out.
+        """
+        with self._lock:
+            self._fingerprints[(source, target_date)] = (fingerprint, time.monotonic())
+            if source != "zanaradka":
+                return
+            stale = [
+                key
+                for key, entry in self._entries.items()
+                if entry.target_date == target_date and entry.fingerprint != fingerprint
+            ]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+
+    def get(self, key: CacheKey, fingerprint: Fingerprint) -> bytes | None:
+        """Return cached bytes for key if they match the given fingerprint."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.fingerprint != fingerprint:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.body
+
+    def get_variant(
+        self, key: CacheKey, fingerprint: Fingerprint, encoding: str
+    ) -> bytes | None:
+        """Return a compressed variant of a cached body if one is stored."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.fingerprint != fingerprint:
+                return None
+            variant = entry.variants.get(encoding)
+            if variant is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return variant
+
+    def put_variant(
+        self, key: CacheKey, fingerprint: Fingerprint, encoding: str, body: bytes
+    ) -> None:
+        """Store a compressed variant next to the cached body it was made from."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.fingerprint != fingerprint:
+                return
+            self._size += len(body) - len(entry.variants.get(encoding, b""))
+            entry.variants[encoding] = body
+            self._evict()
+
+    def put(
+        self,
+        key: CacheKey,
+        target_date: date,
+        fingerprint: Fingerprint,
+        body: bytes,
+    ) -> None:
+        """Store serialized bytes, evicting least recently used entries."""
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CacheEntry(body, fingerprint, target_date)
+            self._size += len(body)
+            self._evict()
+
+    def clear(self) -> None:
+        """Drop all entries and fingerprints."""
+        with self._lock:
+            self._entries.clear()
+            self._fingerprints.clear()
+            self._size = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters and memory usage."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "compressed_variants": sum(
+                    len(entry.variants) for entry in self._entries.values()
+                ),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "tracked_dates": len(
+                    {target_date for _, target_date in self._fingerprints}
+                ),
+            }
+
+    def _evict(self) -> None:
+        while self._size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key)
+        self._size -= entry.size
+
+
+# Global cache instance
+assignment_cache = AssignmentCache(
+    max_bytes=settings.assignment_cache_max_bytes,
+    revalidate_seconds=settings.assignment_cache_revalidate_seconds,
+)
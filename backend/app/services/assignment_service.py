@@ -1,551 +1,704 @@
 """Assignment service for fetching real data from MySQL zanaradka table."""
 
+import asyncio
+from collections.abc import Callable, Sequence
 from datetime import date
-from typing import Any
+from typing import Any, TypeVar
 
-from sqlalchemy import text
+from sqlalchemy import Connection, Engine, text
 from sqlalchemy.exc import SQLAlchemyError
 
-from ..database import engine
-
-
-def fix_ukrainian_encoding(text: str) -> str:
-    """Try to fix Ukrainian text encoding issues."""
-    if not text or not isinstance(text, str):
-        return text
-
-    # If text contains garbled characters, try to fix encoding
-    if any(
-        char in text
-        for char in [
-            "Ð",
-            "Ñ",
-            "Ò",
-            "Ó",
-            "Ô",
-            "Õ",
-            "Ã",
-            "°",
-            "º",
-            "½",
-            "¾",
-            "¿",
-            "»",
-            "¼",
-        ]
-    ):
-        try:
-            # The data appears to be UTF-8 bytes interpreted as latin-1
-            # First encode as latin-1 to get the original bytes, then decode as UTF-8
-            byte_data = text.encode("latin-1")
-            fixed_text = byte_data.decode("utf-8")
-            # Check if the result looks reasonable (contains Cyrillic characters)
-            if any("\u0400" <= char <= "\u04ff" for char in fixed_text):
-                return fixed_text
-        except (UnicodeDecodeError, UnicodeEncodeError):
-            try:
-                # Alternative: try cp1251 encoding
-                fixed_text = text.encode("latin-1").decode("cp1251")
-                if any("\u0400" <= char <= "\u04ff" for char in fixed_text):
-                    return fixed_text
-            except (UnicodeDecodeError, UnicodeEncodeError):
-                pass
-
-        # Another approach: try windows-1252 to utf-8
-        try:
-            fixed_text = text.encode("windows-1252").decode("utf-8")
-            if any("\u0400" <= char <= "\u04ff" for char in fixed_text):
-                return fixed_text
-        except (UnicodeDecodeError, UnicodeEncodeError):
-            pass
-
-    return text
+from ..compression import compress
+from ..config import settings
+from ..database import async_engine, engine
+from ..metrics import SERVICE_ERRORS, operation_scope
+from .assignment_cache import ROW_CHECKSUM_SQL, Fingerprint, assignment_cache
+from .assignment_views import (
+    ASSIGNMENT_VIEWS,
+    fetch_tabel_fingerprint,
+    fetch_view_page,
+    view_statistics,
+)
+from .columnar import LAYOUTS, columnar_response
+from .daily_stats import (
+    DailyStatsMaintainer,
+    daily_stats_maintainer,
+    fetch_daily_report,
+    fetch_date_statistics,
+    fetch_route_shift_report,
+)
+from .delta_sync import diff_snapshots, snapshot_index
+from .pagination import Cursor, decode_cursor
+from .row_serializers import dump_json
+from .single_flight import SingleFlight
+
+T = TypeVar("T")
+
+# Views that can be served from the assignment cache
+CACHED_VIEWS = ("simple", "extended", "full", "direct")
+
+
+def count_assignments(conn: Connection, target_date: date) -> int:
+    """Count all zanaradka rows of a date."""
+    query = text("SELECT COUNT(*) FROM zanaradka WHERE data_day = :target_date")
+    return int(conn.execute(query, {"target_date": target_date}).scalar() or 0)
+
+
+def fetch_date_fingerprint(conn: Connection, target_date: date) -> Fingerprint:
+    """Query row count, max key and row checksum of a date."""
+    query = text(f"""
+        SELECT
+            COUNT(*) as row_count,
+            MAX(`key`) as max_key,
+            BIT_XOR({ROW_CHECKSUM_SQL}) as checksum
+        FROM zanaradka
+        WHERE data_day = :target_date
+    """)
+
+    row = conn.execute(query, {"target_date": target_date}).one()
+    return (row.row_count, row.max_key, row.checksum)
+
+
+def _empty_assignments(target_date: date) -> dict[str, Any]:
+    """Build the fallback response used when an assignment query fails."""
+    return {
+        "assignments": [],
+        "total_count": 0,
+        "date": target_date.isoformat(),
+        "next_cursor": None,
+    }
+
+
+def _view_fields(view: str, fields: Sequence[str] | None) -> tuple[str, ...] | None:
+    """Normalize requested fields to view order (None means all)."""
+    if fields is None:
+        return None
+    return tuple(field.key for field in ASSIGNMENT_VIEWS[view].select_fields(fields))
+
+
+def _reads_tabel(view: str, fields: tuple[str, ...] | None) -> bool:
+    """Whether the view rows with these fields are joined with tabel."""
+    view_ = ASSIGNMENT_VIEWS[view]
+    return view_.reads_tabel(view_.select_fields(fields))
+
+
+def _has_ids(fields: tuple[str, ...] | None) -> bool:
+    """Whether rows with these fields carry the row id delta sync needs."""
+    return fields is None or "id" in fields
+
+
+def _list_fingerprint(
+    fingerprint: Fingerprint | None, tabel_fingerprint: Fingerprint | None
+) -> Fingerprint | None:
+    """Fingerprint a list snapshot is built from: the date's, plus tabel's."""
+    if fingerprint is None or tabel_fingerprint is None:
+        return fingerprint
+    return (*fingerprint, *tabel_fingerprint)
+
+
+# Fingerprint source -> (operation name, query)
+_FINGERPRINT_QUERIES: dict[str, tuple[str, Callable[[Connection, date], Any]]] = {
+    "zanaradka": ("date_fingerprint", fetch_date_fingerprint),
+    "tabel": ("tabel_fingerprint", fetch_tabel_fingerprint),
+}
 
 
 class AssignmentService:
-    """Service for managing assignment data from MySQL zanaradka table."""
-
-    def __init__(self) -> None:
-        self.engine = engine
+    """Service for managing assignment data from MySQL zanaradka table.
+
+    Every query is written once as a ``_fetch_*`` method that receives a
+    synchronous ``Connection``. The public ``get_*`` methods run it on the
+    sync engine, and the ``get_*_async`` variants run it either on the
+    aiomysql engine (``DATABASE_ASYNC=true``) or in a worker thread, so a
+    slow query never blocks the event loop.
+    """
+
+    def __init__(self, bind: Engine | None = None) -> None:
+        """Use the application engines, or only ``bind`` when it is given."""
+        self.engine = bind if bind is not None else engine
+        self.async_engine = async_engine if bind is None else None
+        self.cache = assignment_cache
+        self.snapshots = snapshot_index
+        self.stats_maintainer = (
+            daily_stats_maintainer if bind is None else DailyStatsMaintainer(bind)
+        )
+        self.flights = SingleFlight()
+
+    def _run(self, name: str, fetch: Callable[..., T], fallback: T, *args: Any) -> T:
+        """Run a fetch method on the sync engine, returning fallback on errors."""
+        operation = f"AssignmentService.{name}"
+        with operation_scope(operation):
+            try:
+                with self.engine.connect() as conn:
+                    return fetch(conn, *args)
+            except SQLAlchemyError as e:
+                print(f"Database error in {name}: {e}")
+            except Exception as e:
+                print(f"Error in {name}: {e}")
+            SERVICE_ERRORS.inc(operation=operation)
+        return fallback
+
+    async def _run_async(
+        self, name: str, fetch: Callable[..., T], fallback: T, *args: Any
+    ) -> T:
+        """Run a fetch method without blocking the event loop."""
+        if self.async_engine is None:
+            return await asyncio.to_thread(self._run, name, fetch, fallback, *args)
+        operation = f"AssignmentService.{name}"
+        with operation_scope(operation):
+            try:
+                async with self.async_engine.connect() as conn:
+                    return await conn.run_sync(fetch, *args)
+            except SQLAlchemyError as e:
+                print(f"Database error in {name}: {e}")
+            except Exception as e:
+                print(f"Error in {name}: {e}")
+            SERVICE_ERRORS.inc(operation=operation)
+        return fallback
+
+    async def get_assignments_json_async(
+        self,
+        view: str,
+        assignment_date: date | None = None,
+        limit: int = 10,
+        cursor: str | None = None,
+        with_total: bool = False,
+        layout: str = "rows",
+        encoding: str | None = None,
+        fields: Sequence[str] | None = None,
+    ) -> tuple[bytes, str | None]:
+        """Get a serialized assignment view, served from cache when unchanged.
+
+        The per-date fingerprint is re-queried at most once per
+        ``assignment_cache_revalidate_seconds``, so terminals polling the same
+        day share one cheap fingerprint query and one full query per change.
+        Identical requests that miss the cache together wait for one query.
+
+        With an ``encoding`` accepted by the client, cached bodies are returned
+        compressed and the compressed bytes are cached next to them. Returns
+        the body and its Content-Encoding (None when sent uncompressed).
+
+        ``fields`` limits the rows to a subset of the view's keys. Pages that
+        join tabel are also keyed by the tabel fingerprint of the date.
+
+        First pages that include row ids carry the ``version`` of their
+        snapshot for :meth:`get_assignments_delta_async`.
+        """
+        if view not in CACHED_VIEWS:
+            raise ValueError(f"Unknown assignment view: {view}")
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown response layout: {layout}")
+
+        target_date = assignment_date or date.today()
+        page_cursor = decode_cursor(cursor)
+        fields = _view_fields(view, fields)
+
+        fingerprint = tabel_fingerprint = None
+        if settings.assignment_cache_enabled:
+            fingerprint, tabel_fingerprint = await self._view_fingerprints_async(
+                view, target_date, fields
+            )
+        key = (
+            view,
+            target_date,
+            limit,
+            page_cursor,
+            with_total,
+            layout,
+            fields,
+            tabel_fingerprint,
+        )
+
+        if fingerprint is not None:
+            if encoding is not None:
+                variant = self.cache.get_variant(key, fingerprint, encoding)
+                if variant is not None:
+                    return variant, encoding
+            body = self.cache.get(key, fingerprint)
+            if body is not None:
+                return await self._cached_variant(key, fingerprint, body, encoding)
+
+        # Identical requests arriving together share one query
+        body, cached = await self.flights.do(
+            f"get_{view}_assignments",
+            (key, fingerprint),
+            lambda: self._build_assignments_json(key, fingerprint),
+        )
+        if cached:
+            return await self._cached_variant(key, fingerprint, body, encoding)
+        return body, None
+
+    async def _build_assignments_json(
+        self, key: tuple[Any, ...], fingerprint: Fingerprint | None
+    ) -> tuple[bytes, bool]:
+        """Query and serialize a response, caching it when the query succeeded.
+
+        Returns the body and whether it was cached.
+        """
+        (
+            view,
+            target_date,
+            limit,
+            page_cursor,
+            with_total,
+            layout,
+            fields,
+            tabel_fingerprint,
+        ) = key
+        fallback = _empty_assignments(target_date)
+        data = await self._run_async(
+            f"get_{view}_assignments",
+            self._fetch_view,
+            fallback,
+            view,
+            target_date,
+            limit,
+            page_cursor,
+            with_total,
+            fields,
+        )
+        if page_cursor is None and data is not fallback and _has_ids(fields):
+            data["version"], _ = self.snapshots.record(
+                (view, target_date, limit, fields),
+                data["assignments"],
+                _list_fingerprint(fingerprint, tabel_fingerprint),
+            )
+        body = dump_json(columnar_response(data) if layout == "columnar" else data)
+        if fingerprint is not None and data is not fallback:
+            self.cache.put(key, target_date, fingerprint, body)
+            return body, True
+        return body, False
+
+    async def get_assignments_delta_async(
+        self,
+        view: str,
+        assignment_date: date | None,
+        limit: int,
+        since: str,
+        fields: Sequence[str] | None = None,
+    ) -> bytes:
+        """Get the changes of an assignment list since the snapshot ``since``.
+
+        ``assignments`` holds only the rows added or changed since then and
+        ``deleted`` the ids of removed rows; ``version`` is the new snapshot.
+        When ``since`` is no longer known the whole list is returned with
+        ``full`` set. An unchanged list is answered from the date fingerprint
+        (and the tabel one, for lists that join it) without querying the rows.
+        """
+        if view not in CACHED_VIEWS:
+            raise ValueError(f"Unknown assignment view: {view}")
+        target_date = assignment_date or date.today()
+        fields = _view_fields(view, fields)
+        if not _has_ids(fields):
+            raise ValueError("Delta sync needs the id field")
+        list_key = (view, target_date, limit, fields)
+        unchanged = {
+            "assignments": [],
+            "deleted": [],
+            "date": target_date.isoformat(),
+            "version": since,
+            "since": since,
+            "full": False,
+        }
+
+        fingerprint = None
+        if settings.assignment_cache_enabled:
+            fingerprint = _list_fingerprint(
+                *await self._view_fingerprints_async(view, target_date, fields)
+            )
+            if fingerprint is not None and self.snapshots.latest(list_key) == (
+                since,
+                fingerprint,
+            ):
+                self.snapshots.count(full=False)
+                return dump_json(unchanged)
+
+        fallback = _empty_assignments(target_date)
+        data = await self._run_async(
+            f"get_{view}_assignments",
+            self._fetch_view,
+            fallback,
+            view,
+            target_date,
+            limit,
+            None,
+            False,
+            fields,
+        )
+        if data is fallback:
+            # Keep the client's rows instead of telling it the list is empty
+            return dump_json(unchanged)
+
+        previous = self.snapshots.get(list_key, since)
+        version, hashes = self.snapshots.record(
+            list_key, data["assignments"], fingerprint
+        )
+        deleted: list[Any] = []
+        if previous is not None:
+            changed, deleted = diff_snapshots(previous, hashes)
+            changed_ids = set(changed)
+            data["assignments"] = [
+                row for row in data["assignments"] if row["id"] in changed_ids
+            ]
+        self.snapshots.count(full=previous is None)
+        data.update(
+            deleted=deleted, version=version, since=since, full=previous is None
+        )
+        return dump_json(data)
+
+    async def _cached_variant(
+        self,
+        key: tuple[Any, ...],
+        fingerprint: Fingerprint,
+        body: bytes,
+        encoding: str | None,
+    ) -> tuple[bytes, str | None]:
+        """Compress a cached body once and store the result next to it."""
+        if encoding is None or len(body) < settings.compression_minimum_size:
+            return body, None
+        compressed = await asyncio.to_thread(compress, body, encoding)
+        self.cache.put_variant(key, fingerprint, encoding, compressed)
+        return compressed, encoding
+
+    async def _date_fingerprint_async(
+        self, target_date: date, source: str = "zanaradka"
+    ) -> Fingerprint | None:
+        """Get the fingerprint of a date, re-querying it when it is too old."""
+        fingerprint = self.cache.current_fingerprint(target_date, source)
+        if fingerprint is None:
+            name, fetch = _FINGERPRINT_QUERIES[source]
+            fingerprint = await self.flights.do(
+                name,
+                target_date,
+                lambda: self._run_async(name, fetch, None, target_date),
+            )
+            if fingerprint is not None:
+                self.cache.record_fingerprint(target_date, fingerprint, source)
+        return fingerprint
+
+    async def _view_fingerprints_async(
+        self, view: str, target_date: date, fields: tuple[str, ...] | None
+    ) -> tuple[Fingerprint | None, Fingerprint | None]:
+        """Date fingerprint of a list and, if it joins tabel, the tabel one.
+
+        The date fingerprint is None when either could not be queried, so the
+        list is neither cached nor answered as unchanged.
+        """
+        fingerprint = await self._date_fingerprint_async(target_date)
+        if fingerprint is None or not _reads_tabel(view, fields):
+            return fingerprint, None
+        tabel_fingerprint = await self._date_fingerprint_async(target_date, "tabel")
+        if tabel_fingerprint is None:
+            return None, None
+        return fingerprint, tabel_fingerprint
+
+    def _page_info(
+        self,
+        conn: Connection,
+        target_date: date,
+        next_cursor: str | None,
+        with_total: bool,
+    ) -> dict[str, Any]:
+        """Build pagination fields of a response."""
+        info: dict[str, Any] = {"next_cursor": next_cursor}
+        if with_total:
+            info["total_available"] = count_assignments(conn, target_date)
+        return info
 
     def get_simple_assignments(
-        self, assignment_date: date | None = None, limit: int = 10
+        self,
+        assignment_date: date | None = None,
+        limit: int = 10,
+        cursor: str | None = None,
+        with_total: bool = False,
     ) -> dict[str, Any]:
         """Get simple assignment data with basic fields."""
-        try:
-            target_date = assignment_date or date.today()
-
-            with self.engine.connect() as conn:
-                query = text("""
-                    SELECT
-                        `key` as id,
-                        marshrut as route_number,
-                        smena as shift,
-                        fiovoditel as driver_name,
-                        `pe№` as vehicle_number,
-                        data_day as assignment_date,
-                        tvih as departure_time,
-                        tzah as arrival_time,
-                        'active' as status
-                    FROM zanaradka
-                    WHERE data_day = :target_date
-                    ORDER BY marshrut, smena
-                    LIMIT :limit
-                """)
-
-                result = conn.execute(
-                    query, {"target_date": target_date, "limit": limit}
-                )
-                rows = result.fetchall()
-
-                assignments = []
-                for row in rows:
-                    assignments.append(
-                        {
-                            "id": row.id,
-                            "route_number": str(row.route_number)
-                            if row.route_number
-                            else "",
-                            "shift": str(row.shift) if row.shift else "",
-                            "driver_name": fix_ukrainian_encoding(
-                                row.driver_name or ""
-                            ),
-                            "vehicle_number": str(row.vehicle_number)
-                            if row.vehicle_number
-                            else "",
-                            "assignment_date": row.assignment_date.isoformat()
-                            if row.assignment_date
-                            else None,
-                            "departure_time": str(row.departure_time)
-                            if row.departure_time
-                            else None,
-                            "arrival_time": str(row.arrival_time)
-                            if row.arrival_time
-                            else None,
-                            "status": "active",
-                        }
-                    )
-
-                return {
-                    "assignments": assignments,
-                    "total_count": len(assignments),
-                    "date": target_date.isoformat(),
-                }
-
-        except SQLAlchemyError as e:
-            print(f"Database error in get_simple_assignments: {e}")
-            return {
-                "assignments": [],
-                "total_count": 0,
-                "date": target_date.isoformat(),
-            }
-        except Exception as e:
-            print(f"Error in get_simple_assignments: {e}")
-            return {
-                "assignments": [],
-                "total_count": 0,
-                "date": target_date.isoformat(),
-            }
+        target_date = assignment_date or date.today()
+        return self._run(
+            "get_simple_assignments",
+            self._fetch_view,
+            _empty_assignments(target_date),
+            "simple",
+            target_date,
+            limit,
+            decode_cursor(cursor),
+            with_total,
+        )
+
+    async def get_simple_assignments_async(
+        self,
+        assignment_date: date | None = None,
+        limit: int = 10,
+        cursor: str | None = None,
+        with_total: bool = False,
+    ) -> dict[str, Any]:
+        """Async variant of :meth:`get_simple_assignments`."""
+        target_date = assignment_date or date.today()
+        return await self._run_async(
+            "get_simple_assignments",
+            self._fetch_view,
+            _empty_assignments(target_date),
+            "simple",
+            target_date,
+            limit,
+            decode_cursor(cursor),
+            with_total,
+        )
 
     def get_extended_assignments(
-        self, assignment_date: date | None = None, limit: int = 50
+        self,
+        assignment_date: date | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+        with_total: bool = False,
     ) -> dict[str, Any]:
         """Get extended assignment data with more fields."""
-        try:
-            target_date = assignment_date or date.today()
-
-            with self.engine.connect() as conn:
-                query = text("""
-                    SELECT
-                        `key` as id,
-                        data_day as assignment_date,
-                        marshrut as route_number,
-                        vipusk as brigade,
-                        smena as shift,
-                        tabvoditel as driver_tab_number,
-                        fiovoditel as driver_name,
-                        `pe№` as vehicle_number,
-                        tvih as departure_time,
-                        tzah as arrival_time,
-                        `putlist№` as waybill_number,
-                        ZaprAdr as fuel_address,
-                        kpvih as route_endpoint,
-                        den_nedeli as day_of_week,
-                        tipvipusk as route_type,
-                        mestootst as parking_place,
-                        'active' as status
-                    FROM zanaradka
-                    WHERE data_day = :target_date
-                    ORDER BY marshrut, smena
-                    LIMIT :limit
-                """)
-
-                result = conn.execute(
-                    query, {"target_date": target_date, "limit": limit}
-                )
-                rows = result.fetchall()
-
-                assignments = []
-                for row in rows:
-                    assignments.append(
-                        {
-                            "id": row.id,
-                            "assignment_date": row.assignment_date.isoformat()
-                            if row.assignment_date
-                            else None,
-                            "route_number": str(row.route_number)
-                            if row.route_number
-                            else "",
-                            "brigade": str(row.brigade) if row.brigade else "",
-                            "shift": str(row.shift) if row.shift else "",
-                            "driver_tab_number": str(row.driver_tab_number)
-                            if row.driver_tab_number
-                            else "",
-                            "driver_name": fix_ukrainian_encoding(
-                                row.driver_name or ""
-                            ),
-                            "vehicle_number": str(row.vehicle_number)
-                            if row.vehicle_number
-                            else "",
-                            "departure_time": str(row.departure_time)
-                            if row.departure_time
-                            else None,
-                            "arrival_time": str(row.arrival_time)
-                            if row.arrival_time
-                            else None,
-                            "waybill_number": row.waybill_number or "",
-                            "fuel_address": row.fuel_address or "",
-                            "route_endpoint": row.route_endpoint or "",
-                            "day_of_week": row.day_of_week or "",
-                            "route_type": row.route_type or "",
-                            "parking_place": row.parking_place or "",
-                            "status": "active",
-                        }
-                    )
-
-                # Calculate statistics
-                total_assignments = len(assignments)
-                active_assignments = len(
-                    [a for a in assignments if a["status"] == "active"]
-                )
-                total_routes = len({a["route_number"] for a in assignments})
-
-                return {
-                    "assignments": assignments,
-                    "total_count": total_assignments,
-                    "date": target_date.isoformat(),
-                    "statistics": {
-                        "total_assignments": total_assignments,
-                        "active_assignments": active_assignments,
-                        "total_routes": total_routes,
-                        "completed_assignments": total_assignments - active_assignments,
-                    },
-                }
-
-        except SQLAlchemyError as e:
-            print(f"Database error in get_extended_assignments: {e}")
-            return {
-                "assignments": [],
-                "total_count": 0,
-                "date": target_date.isoformat(),
-            }
-        except Exception as e:
-            print(f"Error in get_extended_assignments: {e}")
-            return {
-                "assignments": [],
-                "total_count": 0,
-                "date": target_date.isoformat(),
-            }
+        target_date = assignment_date or date.today()
+        return self._run(
+            "get_extended_assignments",
+            self._fetch_view,
+            _empty_assignments(target_date),
+            "extended",
+            target_date,
+            limit,
+            decode_cursor(cursor),
+            with_total,
+        )
+
+    async def get_extended_assignments_async(
+        self,
+        assignment_date: date | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+        with_total: bool = False,
+    ) -> dict[str, Any]:
+        """Async variant of :meth:`get_extended_assignments`."""
+        target_date = assignment_date or date.today()
+        return await self._run_async(
+            "get_extended_assignments",
+            self._fetch_view,
+            _empty_assignments(target_date),
+            "extended",
+            target_date,
+            limit,
+            decode_cursor(cursor),
+            with_total,
+        )
 
     def get_full_assignments(
-        self, assignment_date: date | None = None, limit: int = 100
+        self,
+        assignment_date: date | None = None,
+        limit: int = 100,
+        cursor: str | None = None,
+        with_total: bool = False,
     ) -> dict[str, Any]:
         """Get full assignment data with all MS Access fields."""
-        try:
-            target_date = assignment_date or date.today()
-
-            with self.engine.connect() as conn:
-                query = text("""
-                    SELECT
-                        `key` as id,
-                        data_day as assignment_date,
-                        MONTH(data_day) as month,
-                        vipusk as brigade,
-                        smena as shift,
-                        tipvipusk as route_type,
-                        marshrut as route_number,
-                        `pe№` as vehicle_number,
-                        tabvoditel as driver_tab_number,
-                        fiovoditel as driver_name,
-                        tabconduktor as conductor_tab_number,
-                        fioconduktor as conductor_name,
-                        tvih as departure_time,
-                        tzah as arrival_time,
-                        `putlist№` as waybill_number,
-                        ZaprAdr as fuel_address,
-                        kpvih as route_endpoint,
-                        tob1 as break_1,
-                        tob2 as break_2,
-                        tPodgotovkaVod as hour1,
-                        tPodgotovkaKon as hour2,
-                        tSda4aVod as hour3,
-                        tSda4aKon as hour4,
-                        tVihdepoVod as hour5,
-                        tVihdepoKon as departure_vzd,
-                        tZahdepoVod as departure_zgd,
-                        tZahdepoKon as end_kb,
-                        Soobhenie as notes,
-                        mestootst as parking_place,
-                        den_nedeli as day_of_week,
-                        vipusk as internal_number,
-                        CASE
-                            WHEN tvih IS NOT NULL AND tzah IS NOT NULL THEN
-                                TIME_FORMAT(SEC_TO_TIME(
-                                    TIME_TO_SEC(tzah) - TIME_TO_SEC(tvih) -
-                                    COALESCE(TIME_TO_SEC(tob1), 0) -
-                                    COALESCE(TIME_TO_SEC(tob2), 0) -
-                                    CASE
-                                        WHEN tna4otst IS NOT NULL AND tkonotst IS NOT NULL THEN
-                                            TIME_TO_SEC(tkonotst) - TIME_TO_SEC(tna4otst)
-                                        ELSE 0
-                                    END
-                                ), '%H:%i')
-                            ELSE NULL
-                        END as profit_start,
-                        CASE
-                            WHEN tvih IS NOT NULL AND tzah IS NOT NULL THEN
-                                ROUND(
-                                    (TIME_TO_SEC(tzah) - TIME_TO_SEC(tvih) -
-                                     COALESCE(TIME_TO_SEC(tob1), 0) -
-                                     COALESCE(TIME_TO_SEC(tob2), 0) -
-                                     CASE
-                                         WHEN tna4otst IS NOT NULL AND tkonotst IS NOT NULL THEN
-                                             TIME_TO_SEC(tkonotst) - TIME_TO_SEC(tna4otst)
-                                         ELSE 0
-                                     END
-                                    ) / 3600, 1
-                                )
-                            ELSE NULL
-                        END as profit_end,
-                        'active' as status
-                    FROM zanaradka
-                    WHERE data_day = :target_date
-                    ORDER BY marshrut, smena
-                    LIMIT :limit
-                """)
-
-                result = conn.execute(
-                    query, {"target_date": target_date, "limit": limit}
-                )
-                rows = result.fetchall()
-
-                assignments = []
-                for row in rows:
-                    assignments.append(
-                        {
-                            "id": row.id,
-                            "assignment_date": row.assignment_date.isoformat()
-                            if row.assignment_date
-                            else None,
-                            "date_charging": row.assignment_date.isoformat()
-                            if row.assignment_date
-                            else None,
-                            "month": str(row.month) if row.month else "",
-                            "brigade": str(row.brigade) if row.brigade else "",
-                            "shift": str(row.shift) if row.shift else "",
-                            "route_type": row.route_type or "",
-                            "route_number": str(row.route_number)
-                            if row.route_number
-                            else "",
-                            "internal_number": str(row.internal_number)
-                            if row.internal_number
-                            else "",
-                            "vehicle_number": str(row.vehicle_number)
-                            if row.vehicle_number
-                            else "",
-                            # Для соответствия оригинальной таблице
-                            "vehicle_number_for_ro": str(
-                                row.vehicle_number
-                            )  # Номер ПС для колонки Ро
-                            if row.vehicle_number
-                            else "",
-                            "driver_tab_for_internal": str(
-                                row.driver_tab_number
-                            )  # Таб номер для колонки № в
-                            if row.driver_tab_number
-                            else "",
-                            "driver_tab_number": str(row.driver_tab_number)
-                            if row.driver_tab_number
-                            else "",
-                            "driver_name": fix_ukrainian_encoding(
-                                row.driver_name or ""
-                            ),
-                            "conductor_tab_number": str(row.conductor_tab_number)
-                            if row.conductor_tab_number
-                            else "",
-                            "conductor_name": fix_ukrainian_encoding(
-                                row.conductor_name or ""
-                            ),
-                            "departure_time": str(row.departure_time)
-                            if row.departure_time
-                            else "",
-                            "arrival_time": str(row.arrival_time)
-                            if row.arrival_time
-                            else "",
-                            "waybill_number": row.waybill_number or "",
-                            "fuel_address": row.fuel_address
-                            if row.fuel_address and row.fuel_address != "-"
-                            else "Barrel",
-                            "route_endpoint": row.route_endpoint or "",
-                            "parking_place": row.parking_place or "Hospital Emergency",
-                            "day_of_week": str(row.day_of_week)
-                            if row.day_of_week
-                            else "",
-                            "hour1": str(row.hour1)
-                            if row.hour1 and row.hour1 != "00:00"
-                            else "",
-                            "hour2": str(row.hour2)
-                            if row.hour2 and row.hour2 != "00:00"
-                            else "",
-                            "hour3": str(row.hour3)
-                            if row.hour3 and row.hour3 != "00:00"
-                            else "",
-                            "hour4": str(row.hour4)
-                            if row.hour4 and row.hour4 != "00:00"
-                            else "",
-                            "hour5": str(row.hour5)
-                            if row.hour5 and row.hour5 != "00:00"
-                            else "",
-                            "break_1": str(row.break_1)
-                            if row.break_1 and row.break_1 != "00:00"
-                            else "",
-                            "break_2": str(row.break_2)
-                            if row.break_2 and row.break_2 != "00:00"
-                            else "",
-                            "profit_start": str(row.profit_start)
-                            if row.profit_start and row.profit_start != "00:00"
-                            else "",
-                            "profit_end": str(row.profit_end)
-                            if row.profit_end and row.profit_end != 0
-                            else "",
-                            "departure_vzd": str(row.departure_vzd)
-                            if row.departure_vzd and row.departure_vzd != "00:00"
-                            else "",
-                            "departure_zgd": str(row.departure_zgd)
-                            if row.departure_zgd and row.departure_zgd != "00:00"
-                            else "",
-                            "end_kb": str(row.end_kb)
-                            if row.end_kb and row.end_kb != "00:00"
-                            else "",
-                            "notes": fix_ukrainian_encoding(row.notes or ""),
-                            "status": "active",
-                            # Поля для полного соответствия MS Access
-                            "address": row.parking_place or "",
-                            "driver_waybill": row.waybill_number or "",
-                            "vehicle_model": "",  # Нет в базе, заглушка
-                            "vehicle_bedt": "",  # Нет в базе, заглушка
-                            "coal_info": "",  # Нет в базе, заглушка
-                            "application": str(row.route_number)
-                            if row.route_number
-                            else "",
-                        }
-                    )
-
-                # Calculate statistics
-                total_assignments = len(assignments)
-                active_assignments = len(
-                    [a for a in assignments if a["status"] == "active"]
-                )
-                total_routes = len({a["route_number"] for a in assignments})
-
-                return {
-                    "assignments": assignments,
-                    "total_count": total_assignments,
-                    "date": target_date.isoformat(),
-                    "statistics": {
-                        "total_assignments": total_assignments,
-                        "active_assignments": active_assignments,
-                        "total_routes": total_routes,
-                        "completed_assignments": total_assignments - active_assignments,
-                    },
-                }
-
-        except SQLAlchemyError as e:
-            print(f"Database error in get_full_assignments: {e}")
-            return {
-                "assignments": [],
-                "total_count": 0,
-                "date": target_date.isoformat(),
-            }
-        except Exception as e:
-            print(f"Error in get_full_assignments: {e}")
-            return {
-                "assignments": [],
-                "total_count": 0,
-                "date": target_date.isoformat(),
-            }
+        target_date = assignment_date or date.today()
+        return self._run(
+            "get_full_assignments",
+            self._fetch_view,
+            _empty_assignments(target_date),
+            "full",
+            target_date,
+            limit,
+            decode_cursor(cursor),
+            with_total,
+        )
+
+    async def get_full_assignments_async(
+        self,
+        assignment_date: date | None = None,
+        limit: int = 100,
+        cursor: str | None = None,
+        with_total: bool = False,
+    ) -> dict[str, Any]:
+        """Async variant of :meth:`get_full_assignments`."""
+        target_date = assignment_date or date.today()
+        return await self._run_async(
+            "get_full_assignments",
+            self._fetch_view,
+            _empty_assignments(target_date),
+            "full",
+            target_date,
+            limit,
+            decode_cursor(cursor),
+            with_total,
+        )
+
+    def _fetch_view(
+        self,
+        conn: Connection,
+        view_name: str,
+        target_date: date,
+        limit: int,
+        cursor: Cursor | None = None,
+        with_total: bool = False,
+        fields: Sequence[str] | None = None,
+    ) -> dict[str, Any]:
+        """Query one page of an assignment view (optionally only some fields)."""
+        view = ASSIGNMENT_VIEWS[view_name]
+        assignments, rows, next_cursor = fetch_view_page(
+            conn, view, target_date, limit, cursor, fields
+        )
+        response = {
+            "assignments": assignments,
+            "total_count": len(assignments),
+            "date": target_date.isoformat(),
+            **self._page_info(conn, target_date, next_cursor, with_total),
+        }
+        if view.statistics:
+            response["statistics"] = view_statistics(rows)
+        return response
 
     def get_available_dates(self, days_back: int = 30) -> list[str]:
         """Get available dates with assignment data."""
-        try:
-            with self.engine.connect() as conn:
-                query = text("""
-                    SELECT DISTINCT data_day as assignment_date
-                    FROM zanaradka
-                    WHERE data_day >= DATE_SUB(NOW(), INTERVAL :days_back DAY)
-                    ORDER BY assignment_date DESC
-                """)
-
-                result = conn.execute(query, {"days_back": days_back})
-                rows = result.fetchall()
-
-                dates = [row.assignment_date.isoformat() for row in rows]
-                return dates
-
-        except SQLAlchemyError as e:
-            print(f"Database error in get_available_dates: {e}")
-            return []
-        except Exception as e:
-            print(f"Error in get_available_dates: {e}")
-            return []
+        return self._run(
+            "get_available_dates",
+            self._fetch_available_dates,
+            [],
+            days_back,
+        )
+
+    async def get_available_dates_async(self, days_back: int = 30) -> list[str]:
+        """Async variant of :meth:`get_available_dates`.
+
+        Concurrent calls for the same ``days_back`` share one query.
+        """
+        return await self.flights.do(
+            "get_available_dates",
+            days_back,
+            lambda: self._run_async(
+                "get_available_dates",
+                self._fetch_available_dates,
+                [],
+                days_back,
+            ),
+        )
+
+    def _fetch_available_dates(self, conn: Connection, days_back: int) -> list[str]:
+        """Query dates that have assignment data."""
+        query = text("""
+            SELECT DISTINCT data_day as assignment_date
+            FROM zanaradka
+            WHERE data_day >= DATE_SUB(NOW(), INTERVAL :days_back DAY)
+            ORDER BY assignment_date DESC
+        """)
+
+        result = conn.execute(query, {"days_back": days_back})
+        rows = result.fetchall()
+
+        dates = [row.assignment_date.isoformat() for row in rows]
+        return dates
 
     def get_statistics(self, assignment_date: date | None = None) -> dict[str, Any]:
         """Get assignment statistics for a specific date."""
-        try:
-            target_date = assignment_date or date.today()
-
-            with self.engine.connect() as conn:
-                query = text("""
-                    SELECT
-                        COUNT(*) as total_assignments,
-                        COUNT(DISTINCT marshrut) as total_routes,
-                        COUNT(DISTINCT tabvoditel) as total_drivers,
-                        COUNT(DISTINCT `pe№`) as total_vehicles,
-                        COUNT(DISTINCT vipusk) as total_brigades
-                    FROM zanaradka
-                    WHERE data_day = :target_date
-                """)
-
-                result = conn.execute(query, {"target_date": target_date})
-                row = result.fetchone()
-
-                return {
-                    "date": target_date.isoformat(),
-                    "total_assignments": row.total_assignments if row else 0,
-                    "active_assignments": row.total_assignments if row else 0,  # Assume all are active
-                    "completed_assignments": 0,
-                    "total_routes": row.total_routes if row else 0,
-                    "total_drivers": row.total_drivers if row else 0,
-                    "total_vehicles": row.total_vehicles if row else 0,
-                    "total_brigades": row.total_brigades if row else 0,
-                }
-
-        except SQLAlchemyError as e:
-            print(f"Database error in get_statistics: {e}")
-            return {"date": target_date.isoformat(), "total_assignments": 0}
-        except Exception as e:
-            print(f"Error in get_statistics: {e}")
-            return {"date": target_date.isoformat(), "total_assignments": 0}
+        target_date = assignment_date or date.today()
+        return self._run(
+            "get_statistics",
+            self._fetch_statistics,
+            {"date": target_date.isoformat(), "total_assignments": 0},
+            target_date,
+            self.cache.current_fingerprint(target_date),
+        )
+
+    async def get_statistics_async(
+        self, assignment_date: date | None = None
+    ) -> dict[str, Any]:
+        """Async variant of :meth:`get_statistics`.
+
+        Concurrent calls for the same date share one query. The summary is
+        checked against the date fingerprint shared with the assignment cache.
+        """
+        target_date = assignment_date or date.today()
+        fingerprint = None
+        if settings.daily_stats_enabled:
+            fingerprint = await self._date_fingerprint_async(target_date)
+        return await self.flights.do(
+            "get_statistics",
+            (target_date, fingerprint),
+            lambda: self._run_async(
+                "get_statistics",
+                self._fetch_statistics,
+                {"date": target_date.isoformat(), "total_assignments": 0},
+                target_date,
+                fingerprint,
+            ),
+        )
+
+    def _fetch_statistics(
+        self,
+        conn: Connection,
+        target_date: date,
+        fingerprint: Fingerprint | None = None,
+    ) -> dict[str, Any]:
+        """Read assignment statistics of a date from the daily summary.
+
+        The summary is used only if it was computed from the rows described
+        by ``fingerprint`` (queried here when not known). Dates without a
+        current summary are aggregated live and queued for a refresh.
+        """
+        if settings.daily_stats_enabled:
+            if fingerprint is None:
+                fingerprint = fetch_date_fingerprint(conn, target_date)
+                self.cache.record_fingerprint(target_date, fingerprint)
+            stats = fetch_date_statistics(conn, target_date, fingerprint)
+            if stats is not None:
+                return stats
+            if fingerprint[0]:
+                self.stats_maintainer.request_refresh(target_date)
+        return self._fetch_live_statistics(conn, target_date)
+
+    def _fetch_live_statistics(
+        self, conn: Connection, target_date: date
+    ) -> dict[str, Any]:
+        """Query assignment statistics for a date."""
+        query = text("""
+            SELECT
+                COUNT(*) as total_assignments,
+                COUNT(DISTINCT marshrut) as total_routes,
+                COUNT(DISTINCT tabvoditel) as total_drivers,
+                COUNT(DISTINCT `pe№`) as total_vehicles,
+                COUNT(DISTINCT vipusk) as total_brigades
+            FROM zanaradka
+            WHERE data_day = :target_date
+        """)
+
+        result = conn.execute(query, {"target_date": target_date})
+        row = result.fetchone()
+
+        return {
+            "date": target_date.isoformat(),
+            "total_assignments": row.total_assignments if row else 0,
+            "active_assignments": row.total_assignments
+            if row
+            else 0,  # Assume all are active
+            "completed_assignments": 0,
+            "total_routes": row.total_routes if row else 0,
+            "total_drivers": row.total_drivers if row else 0,
+            "total_vehicles": row.total_vehicles if row else 0,
+            "total_brigades": row.total_brigades if row else 0,
+        }
+
+    async def get_daily_report_async(
+        self, date_from: date, date_to: date
+    ) -> list[dict[str, Any]]:
+        """Get per-date statistics of a date range from the daily summary."""
+        return await self._run_async(
+            "get_daily_report", fetch_daily_report, [], date_from, date_to
+        )
+
+    async def get_route_shift_report_async(
+        self, date_from: date, date_to: date, group_by: str = "route_shift"
+    ) -> list[dict[str, Any]]:
+        """Get route and shift statistics of a date range from the daily summary."""
+        return await self._run_async(
+            "get_route_shift_report",
+            fetch_route_shift_report,
+            [],
+            date_from,
+            date_to,
+            group_by,
+        )
 
 
 # Global service instance
@@ -0,0 +1,427 @@
+"""Declarative registry of the assignment views.
+
+Every column an assignment view can show is declared once in
+``VIEW_COLUMNS`` as a SQL expression over ``zanaradka z`` (or ``tabel t``).
+A view (simple, extended, full, direct) is a tuple of serializer
+:class:`Field` entries mapping output keys to those columns. For a page of
+a view :func:`fetch_view_page`:
+
+- selects only the columns the requested fields read, plus the ones keyset
+  pagination needs
+- joins ``tabel`` only when one of them comes from it
+- converts the rows with a generated :class:`RowSerializer`, built once per
+  field subset
+
+Clients can ask for any subset of a view's fields (``?fields=id,route_number``)
+and get just those keys, in view order, from a narrower query.
+"""
+
+import threading
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+from sqlalchemy import Connection, bindparam, text
+
+from .assignment_cache import Fingerprint, row_checksum_sql
+from .pagination import Cursor, keyset_condition, order_by_clause, split_page
+from .row_serializers import (
+    CLOCK,
+    ISO_DATE,
+    OR_EMPTY,
+    TEXT,
+    TEXT_OR_NONE,
+    Field,
+    RowSerializer,
+    constant,
+)
+
+
+@dataclass(frozen=True)
+class ViewColumn:
+    """SQL expression of a view column and whether it needs the tabel join."""
+
+    sql: str
+    tabel: bool = False
+
+
+# Working time of a naryad in seconds: shift minus breaks and the break period
+_WORK_SECONDS = """
+    TIME_TO_SEC(z.tzah) - TIME_TO_SEC(z.tvih) -
+    COALESCE(TIME_TO_SEC(z.tob1), 0) -
+    COALESCE(TIME_TO_SEC(z.tob2), 0) -
+    CASE
+        WHEN z.tna4otst IS NOT NULL AND z.tkonotst IS NOT NULL THEN
+            TIME_TO_SEC(z.tkonotst) - TIME_TO_SEC(z.tna4otst)
+        ELSE 0
+    END
+"""
+_HAS_SHIFT = "z.tvih IS NOT NULL AND z.tzah IS NOT NULL"
+
+TABEL_JOIN = "LEFT JOIN tabel t ON (t.tab = z.tabvoditel AND t.data_day = z.data_day)"
+
+# Column name (used as SQL alias) -> expression
+VIEW_COLUMNS: dict[str, ViewColumn] = {
+    "id": ViewColumn("z.`key`"),
+    "assignment_date": ViewColumn("z.data_day"),
+    "month": ViewColumn("MONTH(z.data_day)"),
+    "route_number": ViewColumn("z.marshrut"),
+    "brigade": ViewColumn("z.vipusk"),
+    "shift": ViewColumn("z.smena"),
+    "route_type": ViewColumn("z.tipvipusk"),
+    "vehicle_number": ViewColumn("z.`pe№`"),
+    "driver_tab_number": ViewColumn("z.tabvoditel"),
+    "driver_name": ViewColumn("z.fiovoditel"),
+    "conductor_tab_number": ViewColumn("z.tabconduktor"),
+    "conductor_name": ViewColumn("z.fioconduktor"),
+    "departure_time": ViewColumn("z.tvih"),
+    "arrival_time": ViewColumn("z.tzah"),
+    "route_departure_time": ViewColumn("z.tvihmarsrut"),
+    "route_end_time": ViewColumn("z.tend"),
+    "waybill_number": ViewColumn("z.`putlist№`"),
+    "fuel_address": ViewColumn("z.ZaprAdr"),
+    "fuel_number": ViewColumn("z.zaprv"),
+    "fuel_actual": ViewColumn("z.zaprFakt"),
+    "route_endpoint": ViewColumn("z.kpvih"),
+    "route_endpoint_arrival": ViewColumn("z.kpzah"),
+    "break_1": ViewColumn("z.tob1"),
+    "break_2": ViewColumn("z.tob2"),
+    "parking_place": ViewColumn("z.mestootst"),
+    "notes": ViewColumn("z.Soobhenie"),
+    "day_of_week": ViewColumn("z.den_nedeli"),
+    "driver_preparation": ViewColumn("z.tPodgotovkaVod"),
+    "conductor_preparation": ViewColumn("z.tPodgotovkaKon"),
+    "driver_handover": ViewColumn("z.tSda4aVod"),
+    "conductor_handover": ViewColumn("z.tSda4aKon"),
+    "driver_depot_departure": ViewColumn("z.tVihdepoVod"),
+    "conductor_depot_departure": ViewColumn("z.tVihdepoKon"),
+    "driver_depot_arrival": ViewColumn("z.tZahdepoVod"),
+    "conductor_depot_arrival": ViewColumn("z.tZahdepoKon"),
+    "profit_time": ViewColumn(
+        f"CASE WHEN {_HAS_SHIFT} THEN "
+        f"TIME_FORMAT(SEC_TO_TIME({_WORK_SECONDS}), '%H:%i') ELSE NULL END"
+    ),
+    "profit_hours": ViewColumn(
+        f"CASE WHEN {_HAS_SHIFT} THEN ROUND(({_WORK_SECONDS}) / 3600, 1) ELSE NULL END"
+    ),
+    "plan_hours": ViewColumn("t.plan_chas", tabel=True),
+    "hour_prep_depo": ViewColumn("t.time_pr_depo", tabel=True),
+    "hour_prep_line": ViewColumn("t.time_pr_line", tabel=True),
+    "hour_prep_driver": ViewColumn("t.time_pr_vod", tabel=True),
+    "hour_work_actual": ViewColumn("t.time_fakt_line", tabel=True),
+}
+
+# Always selected: split_page builds the next cursor from them
+PAGE_COLUMNS = ("route_number", "shift", "id")
+
+# tabel columns the views read and the join key; their per-date checksum is
+# part of the cache key of views that join tabel
+TABEL_FINGERPRINT_COLUMNS = (
+    "t.`key`",
+    "t.tab",
+    *(column.sql for column in VIEW_COLUMNS.values() if column.tabel),
+)
+
+
+def fetch_tabel_fingerprint(conn: Connection, target_date: date) -> Fingerprint:
+    """Query row count, max key and row checksum of the tabel rows of a date."""
+    query = text(f"""
+        SELECT
+            COUNT(*) as row_count,
+            MAX(t.`key`) as max_key,
+            BIT_XOR({row_checksum_sql(TABEL_FINGERPRINT_COLUMNS)}) as checksum
+        FROM tabel t
+        WHERE t.data_day = :target_date
+    """)
+    row = conn.execute(query, {"target_date": target_date}).one()
+    return (row.row_count, row.max_key, row.checksum)
+
+
+class AssignmentView:
+    """Output fields of an assignment view and the serializers built for it."""
+
+    def __init__(
+        self, name: str, fields: Sequence[Field], statistics: bool = False
+    ) -> None:
+        self.name = name
+        self.fields = tuple(fields)
+        self.statistics = statistics
+        self.keys = tuple(field.key for field in self.fields)
+        unknown = {field.column for field in self.fields} - {None, *VIEW_COLUMNS}
+        if unknown:
+            raise ValueError(f"{name}: unknown view columns {sorted(unknown)}")
+        self._serializers: dict[tuple[str, ...], RowSerializer] = {}
+        self._lock = threading.Lock()
+
+    def select_fields(self, keys: Sequence[str] | None = None) -> tuple[Field, ...]:
+        """Fields of the view limited to ``keys`` (all when None), in view order."""
+        if keys is None:
+            return self.fields
+        unknown = [key for key in keys if key not in self.keys]
+        if unknown:
+            raise ValueError(
+                f"Unknown fields for the {self.name} view: {', '.join(unknown)}"
+            )
+        wanted = set(keys)
+        return tuple(field for field in self.fields if field.key in wanted)
+
+    def reads_tabel(self, fields: tuple[Field, ...]) -> bool:
+        """Whether a page of ``fields`` joins tabel."""
+        return any(
+            field.column is not None and VIEW_COLUMNS[field.column].tabel
+            for field in fields
+        )
+
+    def serializer(self, fields: tuple[Field, ...]) -> RowSerializer:
+        """Row serializer of a field subset, created once."""
+        keys = tuple(field.key for field in fields)
+        serializer = self._serializers.get(keys)
+        if serializer is None:
+            with self._lock:
+                serializer = self._serializers.setdefault(
+                    keys, RowSerializer(self.name, fields)
+                )
+        return serializer
+
+    def query(self, fields: tuple[Field, ...], condition: str) -> str:
+        """SELECT of one page reading only the columns of ``fields``.
+
+        ``condition`` is appended to the date filter: the keyset condition of
+        a page, or a filter on row keys. ``:limit`` counts zanaradka rows; with
+        the tabel join a row can come back once per matching tabel row.
+        """
+        columns = dict.fromkeys(
+            [*PAGE_COLUMNS, *(field.column for field in fields if field.column)]
+        )
+        select = ",\n                ".join(
+            f"{VIEW_COLUMNS[column].sql} AS {column}" for column in columns
+        )
+        if not self.reads_tabel(fields):
+            return f"""
+            SELECT
+                {select}
+            FROM zanaradka z
+            WHERE z.data_day = :target_date{condition}
+            ORDER BY {order_by_clause("z")}
+            LIMIT :limit
+        """
+        # A driver can have several tabel rows for a day, each repeating the
+        # zanaradka row: the page limit applies to zanaradka keys, then the
+        # join adds all tabel rows of those keys
+        return f"""
+            SELECT
+                {select}
+            FROM (
+                SELECT z.`key`
+                FROM zanaradka z
+                WHERE z.data_day = :target_date{condition}
+                ORDER BY {order_by_clause("z")}
+                LIMIT :limit
+            ) page
+            JOIN zanaradka z ON z.`key` = page.`key`
+            {TABEL_JOIN}
+            ORDER BY {order_by_clause("z")}, t.`key`
+        """
+
+
+def parse_fields(value: str | None) -> tuple[str, ...] | None:
+    """Parse a comma separated ``fields`` parameter; None or empty means all."""
+    if not value:
+        return None
+    keys = tuple(dict.fromkeys(key.strip() for key in value.split(",") if key.strip()))
+    return keys or None
+
+
+def fetch_view_page(
+    conn: Connection,
+    view: AssignmentView,
+    target_date: date | str,
+    limit: int,
+    cursor: Cursor | None = None,
+    keys: Sequence[str] | None = None,
+) -> tuple[list[dict[str, Any]], Sequence[Any], str | None]:
+    """Query and serialize one page of a view.
+
+    Returns the response rows, the raw rows and the next page cursor.
+    """
+    fields = view.select_fields(keys)
+    keyset, keyset_params = keyset_condition(cursor, "z")
+    result = conn.execute(
+        text(view.query(fields, keyset)),
+        {"target_date": target_date, "limit": limit + 1, **keyset_params},
+    )
+    rows, next_cursor = split_page(result.fetchall(), limit)
+    return view.serializer(fields).serialize(rows), rows, next_cursor
+
+
+def fetch_view_rows(
+    conn: Connection,
+    view: AssignmentView,
+    target_date: date | str,
+    ids: Sequence[int],
+) -> list[dict[str, Any]]:
+    """Query and serialize the rows of a date with the given keys."""
+    if not ids:
+        return []
+    fields = view.fields
+    query = text(view.query(fields, " AND z.`key` IN :ids")).bindparams(
+        bindparam("ids", expanding=True)
+    )
+    result = conn.execute(
+        query, {"target_date": target_date, "ids": list(ids), "limit": len(ids)}
+    )
+    return view.serializer(fields).serialize(result.fetchall())
+
+
+def view_statistics(rows: Sequence[Any]) -> dict[str, int]:
+    """Page statistics of the extended and full views."""
+    total = len(rows)
+    routes = {str(row.route_number) if row.route_number else "" for row in rows}
+    return {
+        "total_assignments": total,
+        "active_assignments": total,
+        "total_routes": len(routes),
+        "completed_assignments": 0,
+    }
+
+
+ASSIGNMENT_VIEWS: dict[str, AssignmentView] = {
+    "simple": AssignmentView(
+        "simple",
+        (
+            Field("id", "id"),
+            Field("route_number", "route_number", TEXT),
+            Field("shift", "shift", TEXT),
+            Field("driver_name", "driver_name", repair=True),
+            Field("vehicle_number", "vehicle_number", TEXT),
+            Field("assignment_date", "assignment_date", ISO_DATE),
+            Field("departure_time", "departure_time", TEXT_OR_NONE),
+            Field("arrival_time", "arrival_time", TEXT_OR_NONE),
+            constant("status", "active"),
+        ),
+    ),
+    "extended": AssignmentView(
+        "extended",
+        (
+            Field("id", "id"),
+            Field("assignment_date", "assignment_date", ISO_DATE),
+            Field("route_number", "route_number", TEXT),
+            Field("brigade", "brigade", TEXT),
+            Field("shift", "shift", TEXT),
+            Field("driver_tab_number", "driver_tab_number", TEXT),
+            Field("driver_name", "driver_name", repair=True),
+            Field("vehicle_number", "vehicle_number", TEXT),
+            Field("departure_time", "departure_time", TEXT_OR_NONE),
+            Field("arrival_time", "arrival_time", TEXT_OR_NONE),
+            Field("waybill_number", "waybill_number", OR_EMPTY),
+            Field("fuel_address", "fuel_address", OR_EMPTY),
+            Field("route_endpoint", "route_endpoint", OR_EMPTY),
+            Field("day_of_week", "day_of_week", OR_EMPTY),
+            Field("route_type", "route_type", OR_EMPTY),
+            Field("parking_place", "parking_place", OR_EMPTY),
+            constant("status", "active"),
+        ),
+        statistics=True,
+    ),
+    "full": AssignmentView(
+        "full",
+        (
+            Field("id", "id"),
+            Field("assignment_date", "assignment_date", ISO_DATE),
+            Field("date_charging", "assignment_date", ISO_DATE),
+            Field("month", "month", TEXT),
+            Field("brigade", "brigade", TEXT),
+            Field("shift", "shift", TEXT),
+            Field("route_type", "route_type", OR_EMPTY),
+            Field("route_number", "route_number", TEXT),
+            Field("internal_number", "brigade", TEXT),
+            Field("vehicle_number", "vehicle_number", TEXT),
+            # Для соответствия оригинальной таблице: номер ПС для колонки Ро
+            # и таб номер для колонки № в
+            Field("vehicle_number_for_ro", "vehicle_number", TEXT),
+            Field("driver_tab_for_internal", "driver_tab_number", TEXT),
+            Field("driver_tab_number", "driver_tab_number", TEXT),
+            Field("driver_name", "driver_name", repair=True),
+            Field("conductor_tab_number", "conductor_tab_number", TEXT),
+            Field("conductor_name", "conductor_name", repair=True),
+            Field("departure_time", "departure_time", TEXT),
+            Field("arrival_time", "arrival_time", TEXT),
+            Field("waybill_number", "waybill_number", OR_EMPTY),
+            Field(
+                "fuel_address",
+                "fuel_address",
+                '{v} if {v} and {v} != "-" else "Barrel"',
+            ),
+            Field("route_endpoint", "route_endpoint", OR_EMPTY),
+            Field("parking_place", "parking_place", '{v} or "Hospital Emergency"'),
+            Field("day_of_week", "day_of_week", TEXT),
+            Field("hour1", "driver_preparation", CLOCK),
+            Field("hour2", "conductor_preparation", CLOCK),
+            Field("hour3", "driver_handover", CLOCK),
+            Field("hour4", "conductor_handover", CLOCK),
+            Field("hour5", "driver_depot_departure", CLOCK),
+            Field("break_1", "break_1", CLOCK),
+            Field("break_2", "break_2", CLOCK),
+            Field("profit_start", "profit_time", CLOCK),
+            Field("profit_end", "profit_hours", TEXT),
+            Field("departure_vzd", "conductor_depot_departure", CLOCK),
+            Field("departure_zgd", "driver_depot_arrival", CLOCK),
+            Field("end_kb", "conductor_depot_arrival", CLOCK),
+            Field("notes", "notes", repair=True),
+            constant("status", "active"),
+            # Поля для полного соответствия MS Access
+            Field("address", "parking_place", OR_EMPTY),
+            Field("driver_waybill", "waybill_number", OR_EMPTY),
+            constant("vehicle_model", ""),  # Нет в базе, заглушка
+            constant("vehicle_bedt", ""),  # Нет в базе, заглушка
+            constant("coal_info", ""),  # Нет в базе, заглушка
+            Field("application", "route_number", TEXT),
+        ),
+        statistics=True,
+    ),
+    "direct": AssignmentView(
+        "direct",
+        (
+            Field("id", "id"),
+            Field("route_number", "route_number", TEXT),
+            Field("brigade", "brigade", TEXT),
+            Field("shift", "shift", TEXT),
+            Field("driver_tab_number", "driver_tab_number", TEXT),
+            Field("driver_name", "driver_name", repair=True),
+            Field("conductor_tab_number", "conductor_tab_number", TEXT),
+            Field("conductor_name", "conductor_name", repair=True),
+            Field("vehicle_number", "vehicle_number", TEXT),
+            Field("waybill_number", "waybill_number", TEXT),
+            Field("assignment_date", "assignment_date", TEXT_OR_NONE),
+            Field("departure_time", "departure_time", TEXT_OR_NONE),
+            Field("arrival_time", "arrival_time", TEXT_OR_NONE),
+            Field("departure_vzd", "route_departure_time", TEXT_OR_NONE),
+            Field("arrival_zgd", "route_end_time", TEXT_OR_NONE),
+            Field("preparation_time", "driver_preparation", TEXT_OR_NONE),
+            Field("end_time", "driver_handover", TEXT_OR_NONE),
+            Field("driver_departure_time", "driver_depot_departure", TEXT_OR_NONE),
+            Field("driver_arrival_time", "driver_depot_arrival", TEXT_OR_NONE),
+            Field("fuel_address", "fuel_address", OR_EMPTY),
+            Field("fuel_number", "fuel_number", 'str({v}) if {v} else "0"'),
+            Field("fuel_actual", "fuel_actual", TEXT),
+            Field("route_type", "route_type", OR_EMPTY),
+            Field("route_endpoint", "route_endpoint", OR_EMPTY),
+            Field("route_endpoint_arrival", "route_endpoint_arrival", OR_EMPTY),
+            Field("break_1", "break_1", TEXT),
+            Field("break_2", "break_2", TEXT),
+            Field("parking_place", "parking_place", OR_EMPTY),
+            Field("notes", "notes", repair=True),
+            Field("day_of_week", "day_of_week", OR_EMPTY),
+            Field("month", "month", TEXT),
+            Field("plan_hours", "plan_hours", TEXT),
+            Field("hour_prep_depo", "hour_prep_depo", TEXT),
+            Field("hour_prep_line", "hour_prep_line", TEXT),
+            Field("hour_prep_driver", "hour_prep_driver", TEXT),
+            Field("hour_work_actual", "hour_work_actual", TEXT),
+            Field("profit_start", "profit_time", TEXT),
+            Field("profit_end", "profit_time", TEXT),
+            constant("status", "active"),
+        ),
+    ),
+}
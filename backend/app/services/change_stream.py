@@ -0,0 +1,284 @@
+"""Push of zanaradka changes to dispatchers as Server-Sent Events.
+
+Every date that is being watched has one :class:`DateChangeFeed` polling the
+database on behalf of all its subscribers, so any number of open dispatcher
+screens on the same day cost one poll per ``CHANGE_STREAM_POLL_SECONDS``.
+A poll is a single cheap query when nothing changed and narrows the work
+down step by step when something did:
+
+1. the date fingerprint (row count, max key and checksum, the one the
+   assignment cache uses) is compared with the previous poll
+2. if it differs, checksums of key buckets (``BUCKET_SIZE`` consecutive keys)
+   show which buckets changed
+3. per-row checksums of those buckets give the inserted, updated and
+   deleted keys
+4. inserted and updated rows are read through the ``full`` view
+
+The change set is encoded once and put on the queue of every subscriber.
+A subscriber that falls ``CHANGE_STREAM_QUEUE_SIZE`` events behind gets a
+``resync`` event instead and should reload the date. Event ids count the
+changes of a feed; missed events are not replayed, a reconnecting client
+gets a new ``ready`` event and reloads.
+"""
+
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator, Iterable
+from datetime import date
+from typing import Any
+
+from sqlalchemy import Connection, Engine, bindparam, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..config import settings
+from ..database import engine
+from ..metrics import (
+    CHANGE_STREAM_FEEDS,
+    CHANGE_STREAM_SUBSCRIBERS,
+    SERVICE_ERRORS,
+    operation_scope,
+)
+from .assignment_cache import ROW_CHECKSUM_SQL, Fingerprint, assignment_cache
+from .assignment_service import fetch_date_fingerprint
+from .assignment_views import ASSIGNMENT_VIEWS, fetch_view_rows
+from .row_serializers import dump_json
+
+# Keys per checksum bucket; keys of a day are mostly consecutive
+BUCKET_SIZE = 64
+
+_BUCKET_SQL = f"`key` - `key` % {BUCKET_SIZE}"
+
+# Sent to a subscriber whose queue overflowed
+_RESYNC = object()
+
+
+def _bucket(key: int) -> int:
+    return key - key % BUCKET_SIZE
+
+
+def fetch_bucket_checksums(
+    conn: Connection, target_date: date
+) -> dict[int, tuple[int, int]]:
+    """Query row count and checksum of every key bucket of a date."""
+    query = text(f"""
+        SELECT
+            {_BUCKET_SQL} as bucket,
+            COUNT(*) as row_count,
+            BIT_XOR({ROW_CHECKSUM_SQL}) as checksum
+        FROM zanaradka
+        WHERE data_day = :target_date
+        GROUP BY {_BUCKET_SQL}
+    """)
+    rows = conn.execute(query, {"target_date": target_date}).fetchall()
+    return {int(row.bucket): (row.row_count, int(row.checksum)) for row in rows}
+
+
+def fetch_row_checksums(
+    conn: Connection, target_date: date, buckets: Iterable[int] | None = None
+) -> dict[int, int]:
+    """Query the checksum of every row of a date, or of some key buckets."""
+    condition = ""
+    params: dict[str, Any] = {"target_date": target_date}
+    if buckets is not None:
+        condition = f"AND {_BUCKET_SQL} IN :buckets"
+        params["buckets"] = list(buckets)
+    query = text(f"""
+        SELECT `key` as id, {ROW_CHECKSUM_SQL} as checksum
+        FROM zanaradka
+        WHERE data_day = :target_date {condition}
+    """)
+    if buckets is not None:
+        query = query.bindparams(bindparam("buckets", expanding=True))
+    rows = conn.execute(query, params).fetchall()
+    return {row.id: int(row.checksum) for row in rows}
+
+
+def _bucket_checksums(rows: dict[int, int]) -> dict[int, tuple[int, int]]:
+    """Bucket counts and checksums of known rows, as the database computes them."""
+    buckets: dict[int, tuple[int, int]] = {}
+    for key, checksum in rows.items():
+        count, combined = buckets.get(_bucket(key), (0, 0))
+        buckets[_bucket(key)] = (count + 1, combined ^ checksum)
+    return buckets
+
+
+def format_event(event: str, data: Any, event_id: int | None = None) -> bytes:
+    """Encode one Server-Sent Event with a JSON payload."""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: ".encode() + dump_json(data) + b"\n\n"
+
+
+class DateChangeFeed:
+    """One poller for a date, fanning its changes out to all subscribers."""
+
+    def __init__(self, target_date: date, bind: Engine) -> None:
+        self.target_date = target_date
+        self.bind = bind
+        self.subscribers: set[asyncio.Queue] = set()
+        self.sequence = 0
+        self.polls = 0
+        self._rows: dict[int, int] | None = None
+        self._fingerprint: Fingerprint | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start polling in the background."""
+        self._task = asyncio.create_task(self._run())
+        CHANGE_STREAM_FEEDS.inc()
+
+    def stop(self) -> asyncio.Task | None:
+        """Stop polling; a poll already running in a thread finishes unused."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            CHANGE_STREAM_FEEDS.dec()
+        return task
+
+    async def _run(self) -> None:
+        while True:
+            changes = await asyncio.to_thread(self.poll)
+            if changes is not None:
+                self.publish("changes", changes)
+            await asyncio.sleep(settings.change_stream_poll_seconds)
+
+    def publish(self, event: str, data: dict[str, Any]) -> None:
+        """Encode an event once and queue it for every subscriber."""
+        self.sequence += 1
+        message = format_event(event, data, self.sequence)
+        for queue in self.subscribers:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Too far behind to catch up event by event
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(_RESYNC)
+
+    def poll(self) -> dict[str, Any] | None:
+        """Check the date for changes; errors are logged, not raised."""
+        operation = "DateChangeFeed.poll"
+        with operation_scope(operation):
+            try:
+                with self.bind.connect() as conn:
+                    self.polls += 1
+                    return self._poll(conn)
+            except SQLAlchemyError as e:
+                print(f"Database error in change stream poll: {e}")
+            except Exception as e:
+                print(f"Error in change stream poll: {e}")
+            SERVICE_ERRORS.inc(operation=operation)
+        return None
+
+    def _poll(self, conn: Connection) -> dict[str, Any] | None:
+        fingerprint = fetch_date_fingerprint(conn, self.target_date)
+        assignment_cache.record_fingerprint(self.target_date, fingerprint)
+        if self._rows is None:
+            self._rows = fetch_row_checksums(conn, self.target_date)
+            self._fingerprint = fingerprint
+            return None
+        if fingerprint == self._fingerprint:
+            return None
+
+        known = _bucket_checksums(self._rows)
+        current = fetch_bucket_checksums(conn, self.target_date)
+        changed = {
+            bucket
+            for bucket in known.keys() | current.keys()
+            if known.get(bucket) != current.get(bucket)
+        }
+        self._fingerprint = fingerprint
+        if not changed:
+            return None
+
+        before = {
+            key: value for key, value in self._rows.items() if _bucket(key) in changed
+        }
+        after = fetch_row_checksums(conn, self.target_date, sorted(changed))
+        inserted = sorted(after.keys() - before.keys())
+        deleted = sorted(before.keys() - after.keys())
+        updated = sorted(
+            key for key in after.keys() & before.keys() if after[key] != before[key]
+        )
+        for key in deleted:
+            del self._rows[key]
+        self._rows.update(after)
+        if not (inserted or updated or deleted):
+            return None
+
+        rows = fetch_view_rows(
+            conn, ASSIGNMENT_VIEWS["full"], self.target_date, inserted + updated
+        )
+        inserted_ids = set(inserted)
+        return {
+            "date": self.target_date.isoformat(),
+            "inserted": [row for row in rows if row["id"] in inserted_ids],
+            "updated": [row for row in rows if row["id"] not in inserted_ids],
+            "deleted": deleted,
+        }
+
+
+class ChangeStreamHub:
+    """Feeds of the watched dates, created on demand and shared by clients."""
+
+    def __init__(self, bind: Engine | None = None) -> None:
+        self.bind = bind if bind is not None else engine
+        self.feeds: dict[date, DateChangeFeed] = {}
+
+    async def stream(self, target_date: date) -> AsyncIterator[bytes]:
+        """Server-Sent Events of a date's changes until the client leaves."""
+        feed = self.feeds.get(target_date)
+        if feed is None:
+            feed = self.feeds[target_date] = DateChangeFeed(target_date, self.bind)
+            feed.start()
+        queue: asyncio.Queue = asyncio.Queue(settings.change_stream_queue_size)
+        feed.subscribers.add(queue)
+        CHANGE_STREAM_SUBSCRIBERS.inc()
+        try:
+            retry_ms = int(settings.change_stream_poll_seconds * 1000)
+            ready = {"date": target_date.isoformat()}
+            yield f"retry: {retry_ms}\n".encode() + format_event(
+                "ready", ready, feed.sequence
+            )
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        queue.get(), settings.change_stream_heartbeat_seconds
+                    )
+                except TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                if message is _RESYNC:
+                    message = format_event(
+                        "resync", {"date": target_date.isoformat()}, feed.sequence
+                    )
+                yield message
+        finally:
+            CHANGE_STREAM_SUBSCRIBERS.dec()
+            feed.subscribers.discard(queue)
+            if not feed.subscribers and self.feeds.get(target_date) is feed:
+                del self.feeds[target_date]
+                feed.stop()
+
+    async def close(self) -> None:
+        """Stop every feed (application shutdown)."""
+        tasks = [feed.stop() for feed in self.feeds.values()]
+        self.feeds.clear()
+        for task in tasks:
+            if task is not None:
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+
+    def status(self) -> dict[str, Any]:
+        """Watched dates with their subscriber and poll counts."""
+        return {
+            feed.target_date.isoformat(): {
+                "subscribers": len(feed.subscribers),
+                "polls": feed.polls,
+                "events": feed.sequence,
+            }
+            for feed in self.feeds.values()
+        }
+
+
+# Global hub instance
+change_hub = ChangeStreamHub()
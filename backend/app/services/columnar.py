@@ -0,0 +1,116 @@
+"""Compact columnar layout of assignment responses (``?layout=columnar``).
+
+A row-layout page repeats every key name per row and carries columns that
+are constant (``status``), empty placeholders or verbatim copies of another
+column (``date_charging``, ``vehicle_number_for_ro``, ``driver_waybill`` and
+``application`` in the full view). The columnar layout sends each distinct
+column once:
+
+- ``columns`` / ``data``: column names and one value array per column
+- ``constants``: columns with the same value in every row
+- ``aliases``: columns identical to another column, by name of the source
+- ``dictionaries``: for repeated strings (route type, endpoints, shift), the
+  distinct values; the data array then holds indexes into that list
+- ``times``: ``HH:MM`` columns sent as minutes since midnight; the value is
+  the placeholder (``""`` or ``None``) that missing times decode back to
+
+Every encoding is lossless for the page it is applied to: decoding gives back
+exactly the rows of the row layout.
+"""
+
+import re
+from typing import Any
+
+LAYOUTS = ("rows", "columnar")
+
+_TIME = re.compile(r"(-?)(\d{2,3}):(\d{2})")
+
+
+def _encode_times(values: list[Any]) -> tuple[list[int | None], Any] | None:
+    """Encode an ``HH:MM`` column as minutes, or None if it is not one."""
+    minutes: list[int | None] = []
+    empty: Any = ...
+    for value in values:
+        if value is None or value == "":
+            if empty is not ... and value != empty:
+                return None
+            empty = value
+            minutes.append(None)
+            continue
+        match = _TIME.fullmatch(value) if isinstance(value, str) else None
+        if match is None:
+            return None
+        sign, hours, mins = match.groups()
+        total = int(hours) * 60 + int(mins)
+        # Only text that decodes back unchanged, e.g. not "07:75" or "-00:00"
+        if f"{sign if total else ''}{total // 60:02d}:{total % 60:02d}" != value:
+            return None
+        minutes.append(-total if sign else total)
+    if empty is ...:
+        empty = None
+    return minutes, empty
+
+
+def to_columnar(rows: list[dict[str, Any]]) -> dict[str, Any]:
+    """Encode a list of row dicts into the columnar layout."""
+    columns: list[str] = []
+    data: list[list[Any]] = []
+    constants: dict[str, Any] = {}
+    aliases: dict[str, str] = {}
+    dictionaries: dict[str, list[Any]] = {}
+    times: dict[str, Any] = {}
+    seen: dict[tuple[Any, ...], str] = {}
+
+    for name in rows[0] if rows else ():
+        values = [row[name] for row in rows]
+        first = values[0]
+        if all(value == first and type(value) is type(first) for value in values):
+            constants[name] = first
+            continue
+
+        try:
+            signature = tuple((type(value), value) for value in values)
+            source = seen.get(signature)
+        except TypeError:
+            signature, source = None, None
+        if source is not None:
+            aliases[name] = source
+            continue
+        if signature is not None:
+            seen[signature] = name
+
+        encoded_times = _encode_times(values)
+        if encoded_times is not None:
+            times[name] = encoded_times[1]
+            data.append(encoded_times[0])
+        elif signature is not None and all(isinstance(value, str) for value in values):
+            distinct = list(dict.fromkeys(values))
+            if len(distinct) * 2 <= len(values):
+                index = {value: i for i, value in enumerate(distinct)}
+                dictionaries[name] = distinct
+                data.append([index[value] for value in values])
+            else:
+                data.append(values)
+        else:
+            data.append(values)
+        columns.append(name)
+
+    return {
+        "row_count": len(rows),
+        "columns": columns,
+        "data": data,
+        "constants": constants,
+        "aliases": aliases,
+        "dictionaries": dictionaries,
+        "times": times,
+    }
+
+
+def columnar_response(
+    response: dict[str, Any], rows_key: str = "assignments"
+) -> dict[str, Any]:
+    """Replace the row list of a response with its columnar encoding."""
+    encoded = {key: value for key, value in response.items() if key != rows_key}
+    encoded["layout"] = "columnar"
+    encoded[rows_key] = to_columnar(response.get(rows_key) or [])
+    return encoded
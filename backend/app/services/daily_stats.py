@@ -0,0 +1,455 @@
+"""Materialized daily statistics of the zanaradka table.
+
+``daily_assignment_stats`` holds per-date totals and
+``daily_route_shift_stats`` per date, route and shift totals. Every per-date
+row stores the fingerprint of the zanaradka rows it was computed from (row
+count, max key and checksum, the same fingerprint the assignment cache uses).
+A refresh queries the fingerprints of all dates in one grouped scan and
+re-aggregates only the dates whose fingerprint changed; summaries of dates
+that no longer have rows are dropped.
+
+The application refreshes the last ``DAILY_STATS_REFRESH_DAYS`` days and all
+future dates every ``DAILY_STATS_REFRESH_SECONDS``. Older history is
+summarized once with the backfill command (from the ``backend`` directory)::
+
+    python -m app.services.daily_stats backfill
+    python -m app.services.daily_stats refresh --days 30
+
+A backfill that is interrupted can simply be started again: dates that were
+already summarized have matching fingerprints and are skipped.
+
+Statistics are served from a summary only while its fingerprint matches the
+date's current one; otherwise they are aggregated live and the date is
+queued for a refresh, so edits are visible immediately on any date.
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import Connection, Engine, bindparam, create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..config import settings
+from ..database import engine
+from ..metrics import SERVICE_ERRORS, operation_scope
+from ..models import DailyAssignmentStats, DailyRouteShiftStats
+from .assignment_cache import ROW_CHECKSUM_SQL, Fingerprint
+
+# Report groupings -> summary columns
+REPORT_GROUPS: dict[str, tuple[str, ...]] = {
+    "route": ("route",),
+    "shift": ("shift",),
+    "route_shift": ("route", "shift"),
+}
+
+
+def _range_clause(column: str, since: date | None, until: date | None) -> str:
+    clause = f"AND {column} >= :since" if since is not None else ""
+    if until is not None:
+        clause += f" AND {column} <= :until"
+    return clause
+
+
+def fetch_source_fingerprints(
+    conn: Connection, since: date | None = None, until: date | None = None
+) -> dict[date, Fingerprint]:
+    """Query the fingerprint of every zanaradka date in one grouped scan."""
+    query = text(f"""
+        SELECT
+            data_day,
+            COUNT(*) as row_count,
+            MAX(`key`) as max_key,
+            BIT_XOR({ROW_CHECKSUM_SQL}) as checksum
+        FROM zanaradka
+        WHERE data_day IS NOT NULL {_range_clause("data_day", since, until)}
+        GROUP BY data_day
+    """)
+    rows = conn.execute(query, {"since": since, "until": until}).fetchall()
+    return {row.data_day: (row.row_count, row.max_key, row.checksum) for row in rows}
+
+
+def _fetch_stored_fingerprints(
+    conn: Connection, since: date | None, until: date | None = None
+) -> dict[date, Fingerprint]:
+    """Query the fingerprints the current summaries were computed from."""
+    query = text(f"""
+        SELECT stat_date, source_rows, source_max_key, source_checksum
+        FROM daily_assignment_stats
+        WHERE 1 = 1 {_range_clause("stat_date", since, until)}
+    """)
+    rows = conn.execute(query, {"since": since, "until": until}).fetchall()
+    return {
+        row.stat_date: (row.source_rows, row.source_max_key, row.source_checksum)
+        for row in rows
+    }
+
+
+def _delete_summaries(conn: Connection, dates: list[date]) -> None:
+    for table in ("daily_assignment_stats", "daily_route_shift_stats"):
+        query = text(f"DELETE FROM {table} WHERE stat_date IN :dates").bindparams(
+            bindparam("dates", expanding=True)
+        )
+        conn.execute(query, {"dates": dates})
+
+
+def _summarize_dates(
+    conn: Connection, dates: list[date], fingerprints: dict[date, Fingerprint]
+) -> None:
+    """Replace the summaries of ``dates`` with freshly aggregated ones."""
+    _delete_summaries(conn, dates)
+
+    per_date = text("""
+        SELECT
+            data_day,
+            COUNT(*) as total_assignments,
+            COUNT(DISTINCT marshrut) as total_routes,
+            COUNT(DISTINCT tabvoditel) as total_drivers,
+            COUNT(DISTINCT `pe№`) as total_vehicles,
+            COUNT(DISTINCT vipusk) as total_brigades,
+            COUNT(DISTINCT smena) as total_shifts
+        FROM zanaradka
+        WHERE data_day IN :dates
+        GROUP BY data_day
+    """).bindparams(bindparam("dates", expanding=True))
+    rows = conn.execute(per_date, {"dates": dates}).fetchall()
+
+    refreshed_at = datetime.now()
+    summaries = []
+    for row in rows:
+        row_count, max_key, checksum = fingerprints[row.data_day]
+        summaries.append(
+            {
+                "stat_date": row.data_day,
+                "total_assignments": row.total_assignments,
+                "total_routes": row.total_routes,
+                "total_drivers": row.total_drivers,
+                "total_vehicles": row.total_vehicles,
+                "total_brigades": row.total_brigades,
+                "total_shifts": row.total_shifts,
+                "source_rows": row_count,
+                "source_max_key": max_key,
+                "source_checksum": checksum,
+                "refreshed_at": refreshed_at,
+            }
+        )
+    if summaries:
+        conn.execute(
+            text("""
+                INSERT INTO daily_assignment_stats (
+                    stat_date, total_assignments, total_routes, total_drivers,
+                    total_vehicles, total_brigades, total_shifts, source_rows,
+                    source_max_key, source_checksum, refreshed_at
+                ) VALUES (
+                    :stat_date, :total_assignments, :total_routes, :total_drivers,
+                    :total_vehicles, :total_brigades, :total_shifts, :source_rows,
+                    :source_max_key, :source_checksum, :refreshed_at
+                )
+            """),
+            summaries,
+        )
+
+    per_route_shift = text("""
+        INSERT INTO daily_route_shift_stats (
+            stat_date, route, shift, assignments_count, drivers_count,
+            vehicles_count, brigades_count, work_seconds, work_rows
+        )
+        SELECT
+            data_day,
+            marshrut,
+            smena,
+            COUNT(*),
+            COUNT(DISTINCT tabvoditel),
+            COUNT(DISTINCT `pe№`),
+            COUNT(DISTINCT vipusk),
+            COALESCE(SUM(TIME_TO_SEC(tzah) - TIME_TO_SEC(tvih)), 0),
+            SUM(CASE WHEN tvih IS NOT NULL AND tzah IS NOT NULL THEN 1 ELSE 0 END)
+        FROM zanaradka
+        WHERE data_day IN :dates
+        GROUP BY data_day, marshrut, smena
+    """).bindparams(bindparam("dates", expanding=True))
+    conn.execute(per_route_shift, {"dates": dates})
+
+
+def refresh_daily_stats(
+    bind: Engine,
+    since: date | None = None,
+    batch_days: int = 31,
+    verbose: bool = False,
+    until: date | None = None,
+) -> dict[str, Any]:
+    """Re-aggregate the dates from ``since`` on (all dates if None) that changed.
+
+    ``until`` limits the check to dates up to and including it.
+
+    Changed dates are summarized ``batch_days`` at a time, one transaction
+    per batch, so a long backfill keeps its progress when it is interrupted.
+    """
+    started = time.perf_counter()
+    with bind.connect() as conn:
+        source = fetch_source_fingerprints(conn, since, until)
+        stored = _fetch_stored_fingerprints(conn, since, until)
+
+    changed = sorted(
+        stat_date
+        for stat_date, fingerprint in source.items()
+        if stored.get(stat_date) != fingerprint
+    )
+    removed = sorted(set(stored) - set(source))
+
+    if removed:
+        with bind.begin() as conn:
+            _delete_summaries(conn, removed)
+
+    for start in range(0, len(changed), batch_days):
+        batch = changed[start : start + batch_days]
+        with bind.begin() as conn:
+            _summarize_dates(conn, batch, source)
+        if verbose:
+            print(
+                f"  summarized {start + len(batch)} of {len(changed)} dates "
+                f"(up to {batch[-1]})"
+            )
+
+    return {
+        "since": since.isoformat() if since else None,
+        "checked_dates": len(source),
+        "recomputed_dates": len(changed),
+        "removed_dates": len(removed),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def _statistics_from_row(row: Any) -> dict[str, Any]:
+    return {
+        "date": row.stat_date.isoformat(),
+        "total_assignments": row.total_assignments,
+        "active_assignments": row.total_assignments,  # Assume all are active
+        "completed_assignments": 0,
+        "total_routes": row.total_routes,
+        "total_drivers": row.total_drivers,
+        "total_vehicles": row.total_vehicles,
+        "total_brigades": row.total_brigades,
+    }
+
+
+def fetch_date_statistics(
+    conn: Connection, target_date: date, fingerprint: Fingerprint | None = None
+) -> dict[str, Any] | None:
+    """Read the summary of one date, or None if it has not been summarized.
+
+    With a ``fingerprint`` of the date's current rows, a summary computed
+    from other rows is stale and None is returned as well.
+    """
+    query = text("""
+        SELECT
+            stat_date, total_assignments, total_routes, total_drivers,
+            total_vehicles, total_brigades, source_rows, source_max_key,
+            source_checksum
+        FROM daily_assignment_stats
+        WHERE stat_date = :target_date
+    """)
+    row = conn.execute(query, {"target_date": target_date}).fetchone()
+    if row is None:
+        return None
+    if fingerprint is not None and fingerprint != (
+        row.source_rows,
+        row.source_max_key,
+        row.source_checksum,
+    ):
+        return None
+    return _statistics_from_row(row)
+
+
+def fetch_daily_report(
+    conn: Connection, date_from: date, date_to: date
+) -> list[dict[str, Any]]:
+    """Read per-date summaries of a date range, newest first."""
+    query = text("""
+        SELECT
+            stat_date, total_assignments, total_routes, total_drivers,
+            total_vehicles, total_brigades, total_shifts, refreshed_at
+        FROM daily_assignment_stats
+        WHERE stat_date BETWEEN :date_from AND :date_to
+        ORDER BY stat_date DESC
+    """)
+    rows = conn.execute(query, {"date_from": date_from, "date_to": date_to})
+    return [
+        {
+            **_statistics_from_row(row),
+            "total_shifts": row.total_shifts,
+            "refreshed_at": row.refreshed_at.isoformat(),
+        }
+        for row in rows.fetchall()
+    ]
+
+
+def fetch_route_shift_report(
+    conn: Connection, date_from: date, date_to: date, group_by: str = "route_shift"
+) -> list[dict[str, Any]]:
+    """Aggregate route/shift summaries of a date range.
+
+    Distinct driver and vehicle counts cannot be added up across days, so
+    the report gives the value of the busiest day instead. Within a day the
+    counts of the grouped route/shift rows are summed.
+    """
+    columns = ", ".join(REPORT_GROUPS[group_by])
+    query = text(f"""
+        SELECT
+            {columns},
+            SUM(assignments) as total_assignments,
+            COUNT(*) as days_active,
+            MAX(drivers) as max_daily_drivers,
+            MAX(vehicles) as max_daily_vehicles,
+            SUM(work_seconds) as work_seconds,
+            SUM(work_rows) as work_rows
+        FROM (
+            SELECT
+                stat_date,
+                {columns},
+                SUM(assignments_count) as assignments,
+                SUM(drivers_count) as drivers,
+                SUM(vehicles_count) as vehicles,
+                SUM(work_seconds) as work_seconds,
+                SUM(work_rows) as work_rows
+            FROM daily_route_shift_stats
+            WHERE stat_date BETWEEN :date_from AND :date_to
+            GROUP BY stat_date, {columns}
+        ) daily
+        GROUP BY {columns}
+        ORDER BY {columns}
+    """)
+    rows = conn.execute(query, {"date_from": date_from, "date_to": date_to})
+
+    report = []
+    for row in rows.fetchall():
+        item = {column: getattr(row, column) for column in REPORT_GROUPS[group_by]}
+        work_rows = int(row.work_rows or 0)
+        item.update(
+            {
+                "total_assignments": int(row.total_assignments or 0),
+                "days_active": row.days_active,
+                "max_daily_drivers": row.max_daily_drivers,
+                "max_daily_vehicles": row.max_daily_vehicles,
+                "avg_work_hours": round(int(row.work_seconds) / work_rows / 3600, 2)
+                if work_rows
+                else None,
+            }
+        )
+        report.append(item)
+    return report
+
+
+class DailyStatsMaintainer:
+    """Keeps the summaries of recent and future dates up to date."""
+
+    def __init__(self, bind: Engine | None = None) -> None:
+        self.bind = bind if bind is not None else engine
+        self.last_result: dict[str, Any] | None = None
+        self.last_error: str | None = None
+        self.last_run_at: datetime | None = None
+        self.runs = 0
+        # Dates queued for an out-of-schedule refresh, refreshed one at a time
+        self._pending: set[date] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="daily-stats"
+        )
+
+    def refresh(self, days: int) -> dict[str, Any] | None:
+        """Refresh dates from ``days`` ago on; errors are logged, not raised."""
+        return self._refresh(date.today() - timedelta(days=days))
+
+    def request_refresh(self, target_date: date) -> None:
+        """Queue a refresh of one date whose summary was found stale.
+
+        Requests for a date that is already queued are ignored.
+        """
+        with self._lock:
+            if target_date in self._pending:
+                return
+            self._pending.add(target_date)
+        self._executor.submit(self._refresh_requested, target_date)
+
+    def _refresh_requested(self, target_date: date) -> None:
+        with self._lock:
+            self._pending.discard(target_date)
+        self._refresh(target_date, target_date)
+
+    def _refresh(self, since: date, until: date | None = None) -> dict[str, Any] | None:
+        operation = "DailyStatsMaintainer.refresh"
+        with operation_scope(operation):
+            try:
+                result = refresh_daily_stats(self.bind, since, until=until)
+            except SQLAlchemyError as e:
+                print(f"Database error in daily stats refresh: {e}")
+                self.last_error = str(e)
+            except Exception as e:
+                print(f"Error in daily stats refresh: {e}")
+                self.last_error = str(e)
+            else:
+                self.runs += 1
+                self.last_result = result
+                self.last_error = None
+                self.last_run_at = datetime.now()
+                return result
+            SERVICE_ERRORS.inc(operation=operation)
+        return None
+
+    async def run_forever(self, interval: float, days: int) -> None:
+        """Refresh in a worker thread every ``interval`` seconds."""
+        while True:
+            await asyncio.to_thread(self.refresh, days)
+            await asyncio.sleep(interval)
+
+    def status(self) -> dict[str, Any]:
+        """Outcome of the last refresh."""
+        return {
+            "enabled": settings.daily_stats_enabled,
+            "runs": self.runs,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+        }
+
+
+# Global maintainer instance
+daily_stats_maintainer = DailyStatsMaintainer()
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Daily statistics summaries")
+    parser.add_argument("command", choices=("backfill", "refresh"))
+    parser.add_argument("--url", help="Database URL (defaults to the app settings)")
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=settings.daily_stats_refresh_days,
+        help="Past days checked by 'refresh'",
+    )
+    parser.add_argument("--batch-days", type=int, default=31)
+    args = parser.parse_args()
+
+    bind = create_engine(args.url) if args.url else engine
+    # Make sure the summary tables exist before the first backfill
+    for model in (DailyAssignmentStats, DailyRouteShiftStats):
+        model.__table__.create(bind, checkfirst=True)
+
+    since = None
+    if args.command == "refresh":
+        since = date.today() - timedelta(days=args.days)
+    result = refresh_daily_stats(bind, since, args.batch_days, verbose=True)
+    print(
+        f"Checked {result['checked_dates']} dates, recomputed "
+        f"{result['recomputed_dates']}, removed {result['removed_dates']} "
+        f"in {result['seconds']}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
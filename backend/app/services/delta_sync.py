@@ -0,0 +1,137 @@
+"""Row-hash snapshots of assignment lists for delta sync (``?since=``).
+
+Whenever the service builds the first page of an assignment list it records
+a snapshot of it: the hash of every serialized row by row id. The response
+carries the snapshot's ``version``. A client that refreshes with
+``since=<version>`` gets only the rows added or changed since that snapshot
+and the ids of the removed ones, plus the new version, so the usual refresh
+of an unchanged or slightly changed day transfers a few rows instead of the
+whole list.
+
+Versions are hashes of the list content, so an unchanged list keeps its
+version. The index keeps the last ``delta_sync_versions`` snapshots of up to
+``delta_sync_max_lists`` lists (view, date, limit and fields); when the
+client's version is no longer known the whole list is sent with
+``"full": true``.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Any
+
+from ..config import settings
+from .assignment_cache import Fingerprint
+from .row_serializers import dump_json
+
+ListKey = tuple[Any, ...]
+# Row id -> hash of the serialized row
+RowHashes = dict[Any, bytes]
+
+
+def row_hashes(rows: Sequence[dict[str, Any]]) -> RowHashes:
+    """Hash every serialized row by its id.
+
+    Rows sharing an id (a zanaradka row joined with several tabel rows) get
+    one combined hash, so a change to any of them marks the id as changed.
+    """
+    hashes: RowHashes = {}
+    for row in rows:
+        row_hash = hashlib.blake2b(dump_json(row), digest_size=8).digest()
+        previous = hashes.get(row["id"])
+        if previous is not None:
+            row_hash = hashlib.blake2b(previous + row_hash, digest_size=8).digest()
+        hashes[row["id"]] = row_hash
+    return hashes
+
+
+def snapshot_version(hashes: RowHashes) -> str:
+    """Version token of a snapshot: a hash over its ids and row hashes."""
+    digest = hashlib.blake2b(digest_size=8)
+    for row_id, row_hash in hashes.items():
+        digest.update(dump_json(row_id))
+        digest.update(row_hash)
+    return digest.hexdigest()
+
+
+def diff_snapshots(old: RowHashes, new: RowHashes) -> tuple[list[Any], list[Any]]:
+    """Ids of rows added or changed in ``new`` and ids of rows removed from ``old``."""
+    changed = [
+        row_id for row_id, row_hash in new.items() if old.get(row_id) != row_hash
+    ]
+    removed = [row_id for row_id in old if row_id not in new]
+    return changed, removed
+
+
+class SnapshotIndex:
+    """Recent snapshots of assignment lists, LRU bounded by list count."""
+
+    def __init__(self, max_lists: int, versions: int) -> None:
+        self.max_lists = max_lists
+        self.versions = versions
+        # list key -> (version -> row hashes), oldest version first
+        self._lists: OrderedDict[ListKey, OrderedDict[str, RowHashes]] = OrderedDict()
+        # list key -> (latest version, fingerprint it was built from)
+        self._latest: dict[ListKey, tuple[str, Fingerprint | None]] = {}
+        self._lock = threading.Lock()
+        self.deltas = 0
+        self.full_resends = 0
+
+    def record(
+        self,
+        key: ListKey,
+        rows: Sequence[dict[str, Any]],
+        fingerprint: Fingerprint | None = None,
+    ) -> tuple[str, RowHashes]:
+        """Store the snapshot of a list and return its version and row hashes."""
+        hashes = row_hashes(rows)
+        version = snapshot_version(hashes)
+        with self._lock:
+            snapshots = self._lists.pop(key, None) or OrderedDict()
+            snapshots.pop(version, None)
+            snapshots[version] = hashes
+            while len(snapshots) > self.versions:
+                snapshots.popitem(last=False)
+            self._lists[key] = snapshots
+            self._latest[key] = (version, fingerprint)
+            while len(self._lists) > self.max_lists:
+                oldest, _ = self._lists.popitem(last=False)
+                self._latest.pop(oldest, None)
+        return version, hashes
+
+    def get(self, key: ListKey, version: str) -> RowHashes | None:
+        """Row hashes of a recorded snapshot, or None if it is unknown."""
+        with self._lock:
+            snapshots = self._lists.get(key)
+            return snapshots.get(version) if snapshots is not None else None
+
+    def latest(self, key: ListKey) -> tuple[str, Fingerprint | None] | None:
+        """Latest version of a list and the date fingerprint it was built from."""
+        with self._lock:
+            return self._latest.get(key)
+
+    def count(self, full: bool) -> None:
+        """Count an answered delta request."""
+        with self._lock:
+            if full:
+                self.full_resends += 1
+            else:
+                self.deltas += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Return snapshot counts and how delta requests were answered."""
+        with self._lock:
+            return {
+                "lists": len(self._lists),
+                "snapshots": sum(len(s) for s in self._lists.values()),
+                "deltas": self.deltas,
+                "full_resends": self.full_resends,
+            }
+
+
+# Global snapshot index
+snapshot_index = SnapshotIndex(
+    max_lists=settings.delta_sync_max_lists,
+    versions=settings.delta_sync_versions,
+)
@@ -0,0 +1,319 @@
+"""One-time bulk repair of mojibake stored in the legacy tables.
+
+Scans each table in primary-key order, one chunk at a time, repairs text
+columns with the same heuristics as :func:`fix_ukrainian_encoding` and
+writes the changed values back with batched UPDATEs. Every change is first
+appended to a JSONL rollback journal. After each committed chunk, the last
+key is saved in a checkpoint file, so an interrupted run continues where it
+stopped.
+
+Once the data is clean, set ``ENCODING_REPAIR_ON_READ=false`` to skip the
+repair on the read path.
+
+Usage (from the ``backend`` directory)::
+
+    python -m app.services.mojibake_repair dry-run
+    python -m app.services.mojibake_repair apply
+    python -m app.services.mojibake_repair rollback
+"""
+
+import argparse
+import json
+import os
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Connection, Engine, create_engine, inspect, text
+
+from ..database import engine, quote_identifier
+from .text_encoding import repair_text
+
+# Table -> (primary key column, text columns that may hold mojibake)
+REPAIR_TARGETS: dict[str, tuple[str, tuple[str, ...]]] = {
+    "zanaradka": ("key", ("fiovoditel", "fioconduktor", "fioinstr", "Soobhenie")),
+    "tabel": ("key", ("fio_vod", "fio_tab", "Prim")),
+    "sprpersonal": ("Tab№", ("FIO",)),
+    "sprmarshrut": ("Key", ("ZaprAdr",)),
+}
+
+SAMPLE_LIMIT = 10
+
+
+@dataclass
+class ColumnReport:
+    """Repair counters of one column."""
+
+    scanned: int = 0
+    repaired: int = 0
+    samples: list[dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class RepairJob:
+    """Resumable repair run writing its state into ``work_dir``."""
+
+    bind: Engine
+    work_dir: Path
+    chunk_size: int = 5000
+    dry_run: bool = True
+    tables: tuple[str, ...] = tuple(REPAIR_TARGETS)
+
+    @property
+    def checkpoint_path(self) -> Path:
+        return self.work_dir / "checkpoint.json"
+
+    @property
+    def journal_path(self) -> Path:
+        return self.work_dir / "journal.jsonl"
+
+    @property
+    def report_path(self) -> Path:
+        name = "dry_run_report.json" if self.dry_run else "apply_report.json"
+        return self.work_dir / name
+
+    def _load_checkpoint(self) -> dict[str, Any]:
+        if self.dry_run or not self.checkpoint_path.exists():
+            return {}
+        return json.loads(self.checkpoint_path.read_text(encoding="utf-8"))
+
+    def _save_checkpoint(self, checkpoint: dict[str, Any]) -> None:
+        tmp_path = self.checkpoint_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(checkpoint, ensure_ascii=False), "utf-8")
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _existing_columns(self, conn: Connection, table: str) -> tuple[str, ...]:
+        key_column, columns = REPAIR_TARGETS[table]
+        inspector = inspect(conn)
+        if not inspector.has_table(table):
+            return ()
+        available = {column["name"] for column in inspector.get_columns(table)}
+        if key_column not in available:
+            return ()
+        return tuple(column for column in columns if column in available)
+
+    def run(self) -> dict[str, Any]:
+        """Scan (and unless dry-run, repair) every configured table."""
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        checkpoint = self._load_checkpoint()
+        report: dict[str, Any] = {"dry_run": self.dry_run, "tables": {}}
+
+        for table in self.tables:
+            state = checkpoint.setdefault(table, {"last_key": None, "done": False})
+            if state["done"]:
+                report["tables"][table] = {"skipped": "already completed"}
+                continue
+            report["tables"][table] = self._run_table(table, state, checkpoint)
+
+        self.report_path.write_text(
+            json.dumps(report, ensure_ascii=False, indent=2, default=str), "utf-8"
+        )
+        return report
+
+    def _run_table(
+        self, table: str, state: dict[str, Any], checkpoint: dict[str, Any]
+    ) -> dict[str, Any]:
+        key_column, _ = REPAIR_TARGETS[table]
+        with self.bind.connect() as conn:
+            columns = self._existing_columns(conn, table)
+        if not columns:
+            state["done"] = True
+            return {"skipped": "table or columns not found"}
+
+        key_sql = quote_identifier(key_column)
+        table_sql = quote_identifier(table)
+        column_sql = ", ".join(quote_identifier(column) for column in columns)
+        reports = {column: ColumnReport() for column in columns}
+        chunks = 0
+
+        while True:
+            after = state["last_key"]
+            where = f"WHERE {key_sql} > :after" if after is not None else ""
+            query = text(f"""
+                SELECT {key_sql} as row_key, {column_sql}
+                FROM {table_sql}
+                {where}
+                ORDER BY {key_sql}
+                LIMIT :chunk_size
+            """)
+
+            with self.bind.begin() as conn:
+                rows = conn.execute(
+                    query, {"after": after, "chunk_size": self.chunk_size}
+                ).fetchall()
+                if not rows:
+                    break
+
+                changes = self._repair_chunk(table, key_column, columns, rows, reports)
+                if changes and not self.dry_run:
+                    self._journal(changes)
+                    self._write_changes(conn, table_sql, key_sql, changes)
+
+            state["last_key"] = rows[-1].row_key
+            chunks += 1
+            if not self.dry_run:
+                self._save_checkpoint(checkpoint)
+            print(f"  {table}: {chunks} chunks, up to key {state['last_key']}")
+
+        state["done"] = True
+        if not self.dry_run:
+            self._save_checkpoint(checkpoint)
+
+        return {
+            "chunks": chunks,
+            "columns": {
+                column: {
+                    "scanned": column_report.scanned,
+                    "repaired": column_report.repaired,
+                    "samples": column_report.samples,
+                }
+                for column, column_report in reports.items()
+            },
+        }
+
+    def _repair_chunk(
+        self,
+        table: str,
+        key_column: str,
+        columns: tuple[str, ...],
+        rows: list[Any],
+        reports: dict[str, ColumnReport],
+    ) -> list[dict[str, Any]]:
+        changes = []
+        for row in rows:
+            for index, column in enumerate(columns, start=1):
+                value = row[index]
+                if not value or not isinstance(value, str):
+                    continue
+                reports[column].scanned += 1
+                fixed = repair_text(value)
+                if fixed == value:
+                    continue
+                reports[column].repaired += 1
+                change = {
+                    "table": table,
+                    "key_column": key_column,
+                    "key": row.row_key,
+                    "column": column,
+                    "old": value,
+                    "new": fixed,
+                }
+                if len(reports[column].samples) < SAMPLE_LIMIT:
+                    reports[column].samples.append(change)
+                changes.append(change)
+        return changes
+
+    def _journal(self, changes: list[dict[str, Any]]) -> None:
+        """Append changes to the rollback journal before they are committed."""
+        with self.journal_path.open("a", encoding="utf-8") as journal:
+            for change in changes:
+                # ASCII escapes keep C1 characters of mojibake off the line
+                journal.write(json.dumps(change, default=str))
+                journal.write("\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    @staticmethod
+    def _write_changes(
+        conn: Connection, table_sql: str, key_sql: str, changes: list[dict[str, Any]]
+    ) -> None:
+        """Batched UPDATEs, one statement per column.
+
+        The old value is part of the WHERE clause, so rows edited since the
+        scan are left alone.
+        """
+        by_column: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        for change in changes:
+            by_column[change["column"]].append(
+                {"key": change["key"], "old": change["old"], "new": change["new"]}
+            )
+        for column, params in by_column.items():
+            column_sql = quote_identifier(column)
+            conn.execute(
+                text(f"""
+                    UPDATE {table_sql} SET {column_sql} = :new
+                    WHERE {key_sql} = :key AND {column_sql} = :old
+                """),
+                params,
+            )
+
+
+def rollback(bind: Engine, work_dir: Path, chunk_size: int = 5000) -> int:
+    """Restore the old values recorded in the journal, newest change first.
+
+    The journal is archived and the checkpoint removed afterwards, so a later
+    ``apply`` starts from scratch.
+    """
+    journal_path = work_dir / "journal.jsonl"
+    lines = journal_path.read_text(encoding="utf-8").split("\n")
+    changes = [json.loads(line) for line in reversed(lines) if line.strip()]
+
+    for start in range(0, len(changes), chunk_size):
+        grouped: dict[tuple[str, str, str], list[dict[str, Any]]] = defaultdict(list)
+        for change in changes[start : start + chunk_size]:
+            group = (change["table"], change["key_column"], change["column"])
+            grouped[group].append(
+                {"key": change["key"], "old": change["old"], "new": change["new"]}
+            )
+        with bind.begin() as conn:
+            for (table, key_column, column), params in grouped.items():
+                column_sql = quote_identifier(column)
+                conn.execute(
+                    text(f"""
+                        UPDATE {quote_identifier(table)} SET {column_sql} = :old
+                        WHERE {quote_identifier(key_column)} = :key
+                            AND {column_sql} = :new
+                    """),
+                    params,
+                )
+
+    archived = 1
+    while (work_dir / f"journal.rolled-back-{archived}.jsonl").exists():
+        archived += 1
+    journal_path.rename(work_dir / f"journal.rolled-back-{archived}.jsonl")
+    (work_dir / "checkpoint.json").unlink(missing_ok=True)
+    return len(changes)
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Bulk mojibake repair")
+    parser.add_argument("command", choices=("dry-run", "apply", "rollback"))
+    parser.add_argument("--url", help="Database URL (defaults to the app settings)")
+    parser.add_argument("--work-dir", type=Path, default=Path("mojibake_repair"))
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument(
+        "--table",
+        action="append",
+        choices=tuple(REPAIR_TARGETS),
+        help="Limit the run to these tables",
+    )
+    args = parser.parse_args()
+
+    bind = create_engine(args.url) if args.url else engine
+
+    if args.command == "rollback":
+        restored = rollback(bind, args.work_dir, args.chunk_size)
+        print(f"Restored {restored} values from {args.work_dir}")
+        return
+
+    job = RepairJob(
+        bind=bind,
+        work_dir=args.work_dir,
+        chunk_size=args.chunk_size,
+        dry_run=args.command == "dry-run",
+        tables=tuple(args.table or REPAIR_TARGETS),
+    )
+    report = job.run()
+    for table, table_report in report["tables"].items():
+        for column, column_report in table_report.get("columns", {}).items():
+            print(
+                f"{table}.{column}: {column_report['repaired']} of "
+                f"{column_report['scanned']} values repaired"
+            )
+    print(f"Report written to {job.report_path}")
+
+
+if __name__ == "__main__":
+    main()
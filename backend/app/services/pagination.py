@@ -0,0 +1,102 @@
+"""Keyset (cursor) pagination over the zanaradka ``(marshrut, smena, key)`` order.
+
+A cursor is the ordering tuple of the last row of a page, encoded as
+URL-safe base64 JSON so clients treat it as an opaque token. The next page
+continues strictly after that tuple, so deep pages never need OFFSET scans.
+"""
+
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from typing import Any
+
+# Ordering of every assignment view; `key` makes it total
+PAGE_ORDER_COLUMNS = ("marshrut", "smena", "`key`")
+
+Cursor = tuple[Any, ...]
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode ordering values of the last row into an opaque cursor."""
+    payload = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str | None) -> Cursor | None:
+    """Decode a cursor produced by :func:`encode_cursor`."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(values, list) or len(values) != len(PAGE_ORDER_COLUMNS):
+        raise InvalidCursorError(f"Invalid cursor: {cursor}")
+    return tuple(values)
+
+
+def keyset_condition(
+    cursor: Cursor | None, table_alias: str = ""
+) -> tuple[str, dict[str, Any]]:
+    """Build an ``AND ...`` clause selecting rows after the cursor.
+
+    NULLs sort first in MySQL ascending order, so ``NULL`` cursor values turn
+    "greater than" into ``IS NOT NULL`` and equality into ``IS NULL``.
+    """
+    if cursor is None:
+        return "", {}
+
+    prefix = f"{table_alias}." if table_alias else ""
+    params: dict[str, Any] = {}
+    branches = []
+    for position in range(len(PAGE_ORDER_COLUMNS)):
+        terms = []
+        for index in range(position + 1):
+            name = f"{prefix}{PAGE_ORDER_COLUMNS[index]}"
+            value = cursor[index]
+            param = f"cursor_{index}"
+            if value is None:
+                terms.append(
+                    f"{name} IS NOT NULL" if index == position else f"{name} IS NULL"
+                )
+            else:
+                operator = ">" if index == position else "="
+                terms.append(f"{name} {operator} :{param}")
+                params[param] = value
+        branches.append("(" + " AND ".join(terms) + ")")
+
+    return " AND (" + " OR ".join(branches) + ")", params
+
+
+def order_by_clause(table_alias: str = "") -> str:
+    """Build the ORDER BY list matching :func:`keyset_condition`."""
+    prefix = f"{table_alias}." if table_alias else ""
+    return ", ".join(f"{prefix}{column}" for column in PAGE_ORDER_COLUMNS)
+
+
+def split_page(rows: Sequence[Any], limit: int) -> tuple[Sequence[Any], str | None]:
+    """Trim a fetch of ``limit + 1`` keys to one page and build the next cursor.
+
+    Rows must expose ``route_number``, ``shift`` and ``id`` aliases holding the
+    raw ``marshrut``, ``smena`` and ``key`` values. Adjacent rows with the same
+    ``id`` (one per joined tabel row) count as one and stay on the same page.
+    """
+    if limit <= 0:
+        return rows[:0], None
+    keys = 0
+    previous = None
+    for index, row in enumerate(rows):
+        if index == 0 or row.id != previous:
+            if keys == limit:
+                page = rows[:index]
+                last = page[-1]
+                return page, encode_cursor((last.route_number, last.shift, last.id))
+            keys += 1
+            previous = row.id
+    return rows, None
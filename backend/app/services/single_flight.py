@@ -0,0 +1,54 @@
+"""Coalescing of identical concurrent calls (single-flight).
+
+At shift change many dispatchers open the same date within a second and
+each request would run the same query. :class:`SingleFlight` lets the first
+call for a key run and makes every identical call that arrives while it is
+in flight wait for the same result instead of querying again.
+
+The call runs in its own task, so a caller that gives up (a client that
+disconnects) does not cancel it for the others. Callers share the result
+object, so it must not be mutated: coalesce calls returning bytes, tuples
+or values that are only serialized.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, TypeVar
+
+from ..metrics import COALESCED_CALLS
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Runs one call per key at a time and shares its result."""
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced: dict[str, int] = {}
+
+    async def do(
+        self, operation: str, key: Hashable, call: Callable[[], Awaitable[T]]
+    ) -> T:
+        """Await ``call()``, or the identical call already running for ``key``."""
+        flight_key = (operation, key)
+        task = self._calls.get(flight_key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(call())
+            self._calls[flight_key] = task
+            task.add_done_callback(lambda _: self._calls.pop(flight_key, None))
+        else:
+            self.coalesced[operation] = self.coalesced.get(operation, 0) + 1
+            COALESCED_CALLS.inc(operation=operation)
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict[str, Any]:
+        """Calls started, calls answered by one in flight, and per operation."""
+        return {
+            "in_flight": len(self._calls),
+            "calls": self.calls,
+            "coalesced": sum(self.coalesced.values()),
+            "coalesced_by_operation": dict(self.coalesced),
+        }
@@ -0,0 +1,73 @@
+"""Streaming NDJSON/CSV encoding of admin table browser exports.
+
+Chunks of rows produced by :func:`app.database.stream_in_database` are
+encoded one at a time, so an export of a whole table like zanaradka never
+holds more than one chunk in memory. Values are converted exactly like the
+JSON ``/admin/table-data`` response: ``None`` stays null, dates become ISO
+strings and everything else is passed through ``str``.
+"""
+
+import codecs
+import csv
+import io
+import json
+from collections.abc import AsyncIterator, Sequence
+from datetime import date
+from typing import Any
+
+# Streaming format -> (media type, file extension)
+EXPORT_FORMATS: dict[str, tuple[str, str]] = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+}
+
+
+def export_value(value: Any) -> str | None:
+    """Convert a column value the same way the JSON table view does."""
+    if value is None:
+        return None
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_ndjson(keys: list[str], rows: Sequence[Sequence[Any]]) -> bytes:
+    """Encode rows as one JSON object per line."""
+    return "".join(
+        json.dumps(
+            {key: export_value(value) for key, value in zip(keys, row, strict=True)},
+            ensure_ascii=False,
+        )
+        + "\n"
+        for row in rows
+    ).encode("utf-8")
+
+
+def encode_csv(rows: Sequence[Sequence[Any]]) -> bytes:
+    """Encode rows as CSV lines; NULL becomes an empty field."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\r\n")
+    for row in rows:
+        writer.writerow(["" if value is None else export_value(value) for value in row])
+    return buffer.getvalue().encode("utf-8")
+
+
+async def encode_chunks(
+    export_format: str,
+    first: tuple[list[str], Sequence[Any]],
+    rest: AsyncIterator[tuple[list[str], Sequence[Any]]],
+) -> AsyncIterator[bytes]:
+    """Encode the first (already fetched) chunk and then the remaining ones.
+
+    CSV output starts with a UTF-8 byte order mark, so Excel detects the
+    encoding of Cyrillic names, followed by the header line.
+    """
+    keys, rows = first
+    if export_format == "csv":
+        yield codecs.BOM_UTF8 + encode_csv([keys]) + encode_csv(rows)
+        async for _, rows in rest:
+            yield encode_csv(rows)
+    else:
+        yield encode_ndjson(keys, rows)
+        async for _, rows in rest:
+            yield encode_ndjson(keys, rows)
@@ -0,0 +1,92 @@
+"""Exact row counts for the admin table browser, computed in the background.
+
+``/admin/tables`` answers from ``information_schema`` estimates. Exact
+``COUNT(*)`` values are expensive on large tables like zanaradka, so they are
+computed by a background job, one table at a time, and cached per database.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import Connection, text
+
+from ..config import settings
+from ..database import qualified_name, run_in_database
+
+
+def _fetch_table_names(conn: Connection, database_name: str) -> list[str]:
+    """Query base table names of a database."""
+    query = text("""
+        SELECT TABLE_NAME as name
+        FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = :database_name
+            AND TABLE_TYPE = 'BASE TABLE'
+        ORDER BY TABLE_NAME
+    """)
+    result = conn.execute(query, {"database_name": database_name})
+    return [row.name for row in result.fetchall()]
+
+
+def _fetch_exact_count(conn: Connection, database_name: str, table_name: str) -> int:
+    """Count rows of one schema-qualified table."""
+    query = text(f"SELECT COUNT(*) FROM {qualified_name(database_name, table_name)}")
+    return int(conn.execute(query).scalar() or 0)
+
+
+class ExactRowCounts:
+    """Cache of exact row counts per database with background refresh."""
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._counts: dict[str, dict[str, int]] = {}
+        self._computed_at: dict[str, tuple[datetime, float]] = {}
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+
+    def get(self, database_name: str) -> dict[str, Any] | None:
+        """Return cached counts of a database, or None if never computed."""
+        counts = self._counts.get(database_name)
+        if counts is None:
+            return None
+        computed_at, computed_monotonic = self._computed_at[database_name]
+        return {
+            "counts": counts,
+            "computed_at": computed_at.isoformat(),
+            "stale": time.monotonic() - computed_monotonic > self.ttl_seconds,
+        }
+
+    def is_refreshing(self, database_name: str) -> bool:
+        """Check whether a refresh job is running for a database."""
+        task = self._tasks.get(database_name)
+        return task is not None and not task.done()
+
+    def schedule_refresh(self, database_name: str) -> bool:
+        """Start a refresh job unless one is already running."""
+        if self.is_refreshing(database_name):
+            return False
+        self._tasks[database_name] = asyncio.create_task(self._refresh(database_name))
+        return True
+
+    async def _refresh(self, database_name: str) -> None:
+        """Count every table, one connection checkout per table."""
+        try:
+            tables = await run_in_database(
+                database_name, _fetch_table_names, database_name
+            )
+            counts: dict[str, int] = {}
+            for table in tables:
+                try:
+                    counts[table] = await run_in_database(
+                        database_name, _fetch_exact_count, database_name, table
+                    )
+                except Exception as e:
+                    print(f"Error counting rows of {database_name}.{table}: {e}")
+            self._counts[database_name] = counts
+            self._computed_at[database_name] = (datetime.now(), time.monotonic())
+        except Exception as e:
+            print(f"Error refreshing exact row counts of {database_name}: {e}")
+
+
+# Global exact row count cache
+exact_row_counts = ExactRowCounts(ttl_seconds=settings.table_count_cache_ttl_seconds)
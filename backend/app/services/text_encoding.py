@@ -0,0 +1,98 @@
+"""Repair of Ukrainian text stored as mojibake in the legacy database.
+
+Driver, conductor and note columns partly hold UTF-8 bytes that were decoded
+as latin-1 on the way in. The same few hundred employee names repeat across
+every row, so repairs are memoized in a bounded LRU cache, and the batch API
+repairs a whole column while resolving each distinct value only once.
+
+After the bulk repair job (``mojibake_repair``) has cleaned the tables,
+``ENCODING_REPAIR_ON_READ=false`` turns the read-path functions into no-ops.
+"""
+
+import re
+from collections.abc import Iterable
+from functools import lru_cache
+
+from ..config import settings
+
+# Characters that UTF-8 encoded Cyrillic turns into when read as latin-1
+_MOJIBAKE_MARKERS = re.compile("[ÐÑÒÓÔÕÃ°º½¾¿»¼]")
+_CYRILLIC = re.compile("[\u0400-\u04ff]")
+
+
+@lru_cache(maxsize=settings.encoding_repair_cache_size)
+def _repair(text: str) -> str:
+    """Repair one non-empty string; results are memoized."""
+    if _MOJIBAKE_MARKERS.search(text) is None:
+        return text
+
+    try:
+        # The data appears to be UTF-8 bytes interpreted as latin-1
+        fixed_text = text.encode("latin-1").decode("utf-8")
+        if _CYRILLIC.search(fixed_text):
+            return fixed_text
+    except (UnicodeDecodeError, UnicodeEncodeError):
+        try:
+            # Alternative: try cp1251 encoding
+            fixed_text = text.encode("latin-1").decode("cp1251")
+            if _CYRILLIC.search(fixed_text):
+                return fixed_text
+        except (UnicodeDecodeError, UnicodeEncodeError):
+            pass
+
+    # Another approach: try windows-1252 to utf-8
+    try:
+        fixed_text = text.encode("windows-1252").decode("utf-8")
+        if _CYRILLIC.search(fixed_text):
+            return fixed_text
+    except (UnicodeDecodeError, UnicodeEncodeError):
+        pass
+
+    return text
+
+
+def repair_text(text: str) -> str:
+    """Repair a value regardless of ``ENCODING_REPAIR_ON_READ``."""
+    if not text or not isinstance(text, str):
+        return text
+    return _repair(text)
+
+
+def fix_ukrainian_encoding(text: str) -> str:
+    """Try to fix Ukrainian text encoding issues."""
+    if not settings.encoding_repair_on_read:
+        return text
+    return repair_text(text)
+
+
+def fix_ukrainian_encoding_batch(values: Iterable[str | None]) -> list[str]:
+    """Repair a column of values; ``None`` becomes an empty string.
+
+    Distinct values are resolved once per call through a local dict, so a
+    page of rows costs one cache lookup per distinct name.
+    """
+    if not settings.encoding_repair_on_read:
+        return [value or "" for value in values]
+
+    resolved: dict[str, str] = {}
+    repaired = []
+    for value in values:
+        if not value:
+            repaired.append("")
+            continue
+        fixed = resolved.get(value)
+        if fixed is None:
+            fixed = resolved[value] = _repair(value)
+        repaired.append(fixed)
+    return repaired
+
+
+def repair_cache_info() -> dict[str, int]:
+    """Return hit/miss counters of the repair cache."""
+    info = _repair.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize or 0,
+    }
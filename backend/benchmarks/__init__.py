@@ -0,0 +1,8 @@
+"""Synthetic dataset generator and benchmark harness for the dispatcher backend.
+
+Run from the ``backend`` directory::
+
+    python -m benchmarks.datagen --sqlite /tmp/khtrm_bench.db --rows 182494
+    python -m benchmarks.run --sqlite /tmp/khtrm_bench.db --output before.json
+    python -m benchmarks.run --compare before.json after.json
+"""
@@ -0,0 +1,500 @@
+"""Synthetic zanaradka dataset generator.
+
+Builds ``zanaradka``, ``tabel``, ``sprmarshrut``, ``sprpersonal`` and
+``sprpe`` with the column names, types and indexes of the production
+database (see ``local_db_analysis/full_analysis_*.json`` at the repository
+root). Every day gets one row per route release and shift, like the real
+dispatcher schedule, until the requested row count is reached. The last
+generated day is ``--end-date`` (today by default), so the service defaults
+hit populated data.
+
+A share of ``fiovoditel`` / ``fioconduktor`` values is stored as mojibake
+(UTF-8 bytes read as latin-1), which ``fix_ukrainian_encoding`` repairs.
+
+Usage (from the ``backend`` directory)::
+
+    python -m benchmarks.datagen --sqlite /tmp/khtrm_bench.db --rows 182494
+    python -m benchmarks.datagen --url mysql+pymysql://u:p@127.0.0.1/bench \\
+        --rows 10000000 --replace
+"""
+
+import argparse
+import random
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import (
+    Column,
+    Date,
+    Engine,
+    Index,
+    Integer,
+    MetaData,
+    Numeric,
+    SmallInteger,
+    String,
+    Table,
+    create_engine,
+    func,
+    select,
+)
+
+# Production row counts (backend/scripts/database_analysis.json)
+DEFAULT_ROWS = 182_494
+DEFAULT_EMPLOYEES = 966
+DEFAULT_VEHICLES = 218
+DEFAULT_ROUTES = 40
+
+metadata = MetaData()
+
+# Name columns are wider than production varchar(50): mojibake doubles the
+# byte length of Cyrillic text and must fit in strict-mode MySQL
+zanaradka = Table(
+    "zanaradka",
+    metadata,
+    Column("key", Integer, primary_key=True, autoincrement=False),
+    Column("marshrut", SmallInteger),
+    Column("vipusk", SmallInteger),
+    Column("smena", String(6)),
+    Column("tabvoditelZ", Integer),
+    Column("tabvoditel", Integer),
+    Column("fiovoditel", String(128)),
+    Column("tabinstr", Integer),
+    Column("fioinstr", String(50)),
+    Column("tabconduktorZ", Integer),
+    Column("tabconduktor", Integer),
+    Column("fioconduktor", String(128)),
+    Column("sost", SmallInteger),
+    Column("pe№", Integer),
+    Column("tvih", String(5)),
+    Column("tvihmarsrut", String(5)),
+    Column("kpvih", String(10)),
+    Column("tzah", String(5)),
+    Column("tend", String(5)),
+    Column("kpzah", String(10)),
+    Column("tob1", String(5)),
+    Column("tob2", String(5)),
+    Column("putlist№", String(50)),
+    Column("den_nedeli", String(15)),
+    Column("data_day", Date),
+    Column("priznak", String(3)),
+    Column("tipvipusk", String(6)),
+    Column("mestootst", String(10)),
+    Column("tna4otst", String(5)),
+    Column("tkonotst", String(5)),
+    Column("data_file", String(20)),
+    Column("print", SmallInteger),
+    Column("tPodgotovkaVod", String(5)),
+    Column("tPodgotovkaKon", String(5)),
+    Column("tSda4aVod", String(5)),
+    Column("tSda4aKon", String(5)),
+    Column("tVihdepoVod", String(5)),
+    Column("tVihdepoKon", String(5)),
+    Column("tZahdepoVod", String(5)),
+    Column("tZahdepoKon", String(5)),
+    Column("Soobhenie", String(255)),
+    Column("del", SmallInteger),
+    Column("zaprv", Integer),
+    Column("zaprFakt", Integer),
+    Column("ZaprAdr", String(30)),
+    Column("fl1", Integer),
+    Index("tabvoditel", "tabvoditel"),
+)
+
+tabel = Table(
+    "tabel",
+    metadata,
+    Column("key", Integer, primary_key=True, autoincrement=False),
+    Column("status", String(10)),
+    Column("data_mes", Date),
+    Column("data_day", Date),
+    Column("tab", Integer),
+    Column("fio_tab", String(128)),
+    Column("marshrut", SmallInteger),
+    Column("vipusk", SmallInteger),
+    Column("smena", SmallInteger),
+    Column("tipvipusk", String(2)),
+    Column("pe№", Integer),
+    Column("time_fakt_line", Integer),
+    Column("time_pr_depo", Integer),
+    Column("time_pr_line", Integer),
+    Column("time_pr_vod", Integer),
+    Column("plan_chas", Numeric(6, 2)),
+    Column("tvih", String(5)),
+    Column("tzah", String(5)),
+    Column("key_zan", Integer),
+    Index("data_day", "data_day"),
+)
+
+sprmarshrut = Table(
+    "sprmarshrut",
+    metadata,
+    Column("Key", Integer, primary_key=True, autoincrement=False),
+    Column("Marshrut", Integer),
+    Column("Vipusk", SmallInteger),
+    Column("ZaprAdr", String(30)),
+    Index("Marshrut", "Marshrut"),
+)
+
+sprpersonal = Table(
+    "sprpersonal",
+    metadata,
+    Column("Tab№", Integer, primary_key=True, autoincrement=False),
+    Column("1CTab№", String(10)),
+    Column("FIO", String(50)),
+    Column("Priznak", SmallInteger),
+    Column("Blok", SmallInteger),
+)
+
+sprpe = Table(
+    "sprpe",
+    metadata,
+    Column("Pe", Integer, primary_key=True, autoincrement=False),
+    Column("kodPe", String(30)),
+    Column("PeTemp", String(8)),
+    Column("Nkod", SmallInteger),
+    Column("Blok", SmallInteger),
+)
+
+SURNAMES = (
+    "Меркушев", "Ліщина", "Масалаб", "Волков", "Славський", "Коваленко",
+    "Бондаренко", "Ткаченко", "Шевченко", "Кравченко", "Олійник", "Мельник",
+    "Поліщук", "Руденко", "Савченко", "Литвиненко", "Мороз", "Гончаренко",
+    "Пономаренко", "Захарченко", "Кузьменко", "Павленко", "Марченко", "Лисенко",
+)  # fmt: skip
+FIRST_NAMES = (
+    "Анатолій", "Віктор", "Геннадій", "Микола", "Юрій", "Олександр", "Сергій",
+    "Володимир", "Іван", "Петро", "Андрій", "Олег", "Василь", "Дмитро",
+)  # fmt: skip
+PATRONYMICS = (
+    "Олексійович", "Миколайович", "Іванович", "Володимирович", "Петрович",
+    "Сергійович", "Васильович", "Андрійович", "Олександрович", "Юрійович",
+)  # fmt: skip
+WEEKDAYS = ("понедельник", "вторник", "среда", "четверг", "пятница", "суббота", "воскресенье")  # fmt: skip
+STOPS = (" ул.Светла", "Бол.скорой", "Салтівка", "Вокзал", "Холодна гора", "ХТЗ")
+DEPOT_ADDRESSES = ("-", "Плехановская 85/87", "Шевченко 315")
+NOTES = ("Парадная форма", "Резерв", "Обкатка", "Заміна ПЕ")
+
+
+def to_mojibake(value: str) -> str:
+    """Store text the way it arrives broken: UTF-8 bytes decoded as latin-1."""
+    return value.encode("utf-8").decode("latin-1")
+
+
+def _clock(minutes: int) -> str:
+    minutes %= 24 * 60
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+@dataclass
+class DatasetSpec:
+    """Scale and shape of a generated dataset."""
+
+    rows: int = DEFAULT_ROWS
+    employees: int = DEFAULT_EMPLOYEES
+    vehicles: int = DEFAULT_VEHICLES
+    routes: int = DEFAULT_ROUTES
+    end_date: date = field(default_factory=date.today)
+    mojibake_ratio: float = 0.3
+    second_shift_ratio: float = 0.6
+    tabel_ratio: float = 0.87
+    seed: int = 42
+
+
+class DatasetGenerator:
+    """Generate reference tables and per-day assignment rows."""
+
+    def __init__(self, spec: DatasetSpec) -> None:
+        self.spec = spec
+        self.random = random.Random(spec.seed)
+        self.employees = self._build_employees()
+        self.vehicles = [1000 + index for index in range(spec.vehicles)]
+        self.releases = self._build_releases()
+        self.slots = [
+            (route, vipusk, fuel_address, smena)
+            for route, vipusk, fuel_address in self.releases
+            for smena in (1, 2)
+            if smena == 1 or self.random.random() < spec.second_shift_ratio
+        ]
+
+    def _build_employees(self) -> list[tuple[int, str]]:
+        employees = []
+        for index in range(self.spec.employees):
+            name = " ".join(
+                (
+                    self.random.choice(SURNAMES),
+                    self.random.choice(FIRST_NAMES),
+                    self.random.choice(PATRONYMICS),
+                )
+            )
+            employees.append((3000 + index, name))
+        return employees
+
+    def _build_releases(self) -> list[tuple[int, int, str]]:
+        """Route releases (marshrut, vipusk, fuel address) like sprmarshrut."""
+        route_numbers = sorted(self.random.sample(range(1, 300), self.spec.routes))
+        releases = []
+        for route in route_numbers:
+            for vipusk in range(1, self.random.randint(4, 11)):
+                releases.append((route, vipusk, self.random.choice(DEPOT_ADDRESSES)))
+        return releases
+
+    def reference_rows(self) -> dict[Table, list[dict[str, Any]]]:
+        """Rows of sprmarshrut, sprpersonal and sprpe."""
+        return {
+            sprmarshrut: [
+                {"Key": index + 1, "Marshrut": route, "Vipusk": vipusk, "ZaprAdr": addr}
+                for index, (route, vipusk, addr) in enumerate(self.releases)
+            ],
+            sprpersonal: [
+                {
+                    "Tab№": tab,
+                    "1CTab№": f"СД-{tab:07d}",
+                    "FIO": name,
+                    "Priznak": 0,
+                    "Blok": 0,
+                }
+                for tab, name in self.employees
+            ],
+            sprpe: [
+                {
+                    "Pe": vehicle,
+                    "kodPe": f"PE-{vehicle}",
+                    "PeTemp": f"АХ{vehicle:04d}АА",
+                    "Nkod": 2,
+                    "Blok": 0,
+                }
+                for vehicle in self.vehicles
+            ],
+        }
+
+    def days(self) -> list[date]:
+        """Dates covered by the dataset, oldest first."""
+        count = max(1, -(-self.spec.rows // len(self.slots)))
+        first = self.spec.end_date - timedelta(days=count - 1)
+        return [first + timedelta(days=offset) for offset in range(count)]
+
+    def _name(self, name: str) -> str:
+        if self.random.random() < self.spec.mojibake_ratio:
+            return to_mojibake(name)
+        return name
+
+    def assignment_rows(
+        self,
+    ) -> Iterator[tuple[dict[str, Any], dict[str, Any] | None]]:
+        """Yield ``(zanaradka row, tabel row or None)`` pairs, oldest day first."""
+        rnd = self.random
+        key = 500_000
+        tabel_key = 560_000
+        days = self.days()
+        # The first day is partial so that the newest days are complete
+        skip = len(days) * len(self.slots) - self.spec.rows
+
+        for day in days:
+            for route, vipusk, fuel_address, smena in self.slots:
+                if skip > 0:
+                    skip -= 1
+                    continue
+                key += 1
+
+                tab, name = rnd.choice(self.employees)
+                conductor_tab, conductor_name = (
+                    rnd.choice(self.employees) if rnd.random() < 0.2 else (0, None)
+                )
+                start = (4 * 60 + 30 if smena == 1 else 13 * 60) + rnd.randint(0, 180)
+                end = start + 7 * 60 + rnd.randint(0, 150)
+                has_rest = rnd.random() < 0.05
+
+                row = {
+                    "key": key,
+                    "marshrut": route,
+                    "vipusk": vipusk,
+                    "smena": str(smena),
+                    "tabvoditelZ": 0,
+                    "tabvoditel": tab,
+                    "fiovoditel": self._name(name),
+                    "tabinstr": 0,
+                    "fioinstr": "na",
+                    "tabconduktorZ": 0,
+                    "tabconduktor": conductor_tab,
+                    "fioconduktor": self._name(conductor_name)
+                    if conductor_name
+                    else None,
+                    "sost": 1,
+                    "pe№": rnd.choice(self.vehicles),
+                    "tvih": _clock(start),
+                    "tvihmarsrut": _clock(start - 10),
+                    "kpvih": "Депо",
+                    "tzah": _clock(end),
+                    "tend": _clock(end),
+                    "kpzah": rnd.choice(STOPS),
+                    "tob1": _clock(rnd.randint(20, 35)),
+                    "tob2": "00:00",
+                    "putlist№": f"{day:%d%m%y}-{route}{vipusk}{smena}",
+                    "den_nedeli": WEEKDAYS[day.weekday()],
+                    "data_day": day,
+                    "priznak": None,
+                    "tipvipusk": "ДС" if rnd.random() < 0.9 else "РС",
+                    "mestootst": "Депо" if has_rest else None,
+                    "tna4otst": _clock(start + 240) if has_rest else None,
+                    "tkonotst": _clock(start + 270) if has_rest else None,
+                    "data_file": f"{day:%d.%m.%Y}",
+                    "print": 0,
+                    "tPodgotovkaVod": "00:10",
+                    "tPodgotovkaKon": "00:5",
+                    "tSda4aVod": "00:00",
+                    "tSda4aKon": "00:5",
+                    "tVihdepoVod": _clock(start - 10),
+                    "tVihdepoKon": _clock(start - 5),
+                    "tZahdepoVod": _clock(end),
+                    "tZahdepoKon": _clock(end + 5),
+                    "Soobhenie": rnd.choice(NOTES) if rnd.random() < 0.1 else None,
+                    "del": 0,
+                    "zaprv": 0,
+                    "zaprFakt": 0,
+                    "ZaprAdr": fuel_address,
+                    "fl1": 0,
+                }
+
+                timesheet = None
+                if rnd.random() < self.spec.tabel_ratio:
+                    tabel_key += 1
+                    timesheet = {
+                        "key": tabel_key,
+                        "status": "Закрыт",
+                        "data_mes": day.replace(day=1),
+                        "data_day": day,
+                        "tab": tab,
+                        "fio_tab": name,
+                        "marshrut": route,
+                        "vipusk": vipusk,
+                        "smena": smena,
+                        "tipvipusk": "ДС",
+                        "pe№": row["pe№"],
+                        "time_fakt_line": (end - start) * 60,
+                        "time_pr_depo": 0,
+                        "time_pr_line": 0,
+                        "time_pr_vod": 600,
+                        "plan_chas": Decimal(rnd.choice(("0.00", "8.00"))),
+                        "tvih": row["tvih"],
+                        "tzah": row["tzah"],
+                        "key_zan": key,
+                    }
+                yield row, timesheet
+
+
+def generate_dataset(
+    bind: Engine,
+    spec: DatasetSpec,
+    replace: bool = False,
+    batch_size: int = 5000,
+) -> dict[str, Any]:
+    """Create the tables on ``bind`` and fill them; return a summary."""
+    if replace:
+        metadata.drop_all(bind)
+    metadata.create_all(bind)
+
+    generator = DatasetGenerator(spec)
+    started = time.perf_counter()
+
+    with bind.begin() as conn:
+        for table, rows in generator.reference_rows().items():
+            conn.execute(table.delete())
+            conn.execute(table.insert(), rows)
+
+    assignments: list[dict[str, Any]] = []
+    timesheets: list[dict[str, Any]] = []
+    inserted = 0
+
+    def flush() -> None:
+        with bind.begin() as conn:
+            if assignments:
+                conn.execute(zanaradka.insert(), assignments)
+            if timesheets:
+                conn.execute(tabel.insert(), timesheets)
+        assignments.clear()
+        timesheets.clear()
+
+    for row, timesheet in generator.assignment_rows():
+        assignments.append(row)
+        if timesheet is not None:
+            timesheets.append(timesheet)
+        if len(assignments) >= batch_size:
+            inserted += len(assignments)
+            flush()
+            print(f"  {inserted:,} / {spec.rows:,} rows", end="\r", flush=True)
+    inserted += len(assignments)
+    flush()
+
+    with bind.connect() as conn:
+        first_day, last_day, total = conn.execute(
+            select(
+                func.min(zanaradka.c.data_day),
+                func.max(zanaradka.c.data_day),
+                func.count(),
+            )
+        ).one()
+
+    return {
+        "rows": total,
+        "first_day": str(first_day),
+        "last_day": str(last_day),
+        "days": len(generator.days()),
+        "rows_per_day": len(generator.slots),
+        "employees": spec.employees,
+        "vehicles": spec.vehicles,
+        "seed": spec.seed,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--sqlite", help="Path of a SQLite stand-in database")
+    target.add_argument("--url", help="SQLAlchemy URL of a (local) MySQL database")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--employees", type=int, default=DEFAULT_EMPLOYEES)
+    parser.add_argument("--vehicles", type=int, default=DEFAULT_VEHICLES)
+    parser.add_argument("--routes", type=int, default=DEFAULT_ROUTES)
+    parser.add_argument("--end-date", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--mojibake-ratio", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument(
+        "--replace", action="store_true", help="Drop existing tables first"
+    )
+    args = parser.parse_args()
+
+    if args.sqlite:
+        from .sqlite_compat import create_sqlite_engine
+
+        bind = create_sqlite_engine(args.sqlite)
+    else:
+        bind = create_engine(args.url, connect_args={"charset": "utf8mb4"})
+
+    spec = DatasetSpec(
+        rows=args.rows,
+        employees=args.employees,
+        vehicles=args.vehicles,
+        routes=args.routes,
+        end_date=args.end_date,
+        mojibake_ratio=args.mojibake_ratio,
+        seed=args.seed,
+    )
+    print(f"Generating {spec.rows:,} zanaradka rows...")
+    summary = generate_dataset(
+        bind, spec, replace=args.replace, batch_size=args.batch_size
+    )
+    print()
+    for name, value in summary.items():
+        print(f"  {name}: {value}")
+
+
+if __name__ == "__main__":
+    main()
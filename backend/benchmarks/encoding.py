@@ -0,0 +1,157 @@
+"""Micro-benchmark of the mojibake repair used on every assignment row.
+
+Compares the original per-call implementation with the memoized
+``fix_ukrainian_encoding`` and the column-wise
+``fix_ukrainian_encoding_batch`` on a column shaped like production
+``fiovoditel``: 182k values drawn from 966 employee names, a share of them
+stored as mojibake.
+
+Usage (from the ``backend`` directory)::
+
+    python -m benchmarks.encoding
+    python -m benchmarks.encoding --rows 1000000 --output encoding.json
+"""
+
+import argparse
+import json
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from app.services.text_encoding import (
+    _repair,
+    fix_ukrainian_encoding,
+    fix_ukrainian_encoding_batch,
+    repair_cache_info,
+)
+
+from .datagen import DEFAULT_ROWS, DatasetGenerator, DatasetSpec, to_mojibake
+from .run import summarize
+
+_LEGACY_MARKERS = ["Ð", "Ñ", "Ò", "Ó", "Ô", "Õ", "Ã", "°", "º", "½", "¾", "¿", "»", "¼"]
+
+
+def legacy_fix_ukrainian_encoding(text: str) -> str:
+    """The implementation before memoization, kept as the baseline."""
+    if not text or not isinstance(text, str):
+        return text
+
+    if any(char in text for char in _LEGACY_MARKERS):
+        try:
+            fixed_text = text.encode("latin-1").decode("utf-8")
+            if any("\u0400" <= char <= "\u04ff" for char in fixed_text):
+                return fixed_text
+        except (UnicodeDecodeError, UnicodeEncodeError):
+            try:
+                fixed_text = text.encode("latin-1").decode("cp1251")
+                if any("\u0400" <= char <= "\u04ff" for char in fixed_text):
+                    return fixed_text
+            except (UnicodeDecodeError, UnicodeEncodeError):
+                pass
+
+        try:
+            fixed_text = text.encode("windows-1252").decode("utf-8")
+            if any("\u0400" <= char <= "\u04ff" for char in fixed_text):
+                return fixed_text
+        except (UnicodeDecodeError, UnicodeEncodeError):
+            pass
+
+    return text
+
+
+def build_column(rows: int, mojibake_ratio: float, seed: int) -> list[str]:
+    """Driver name column with production-like repetition and breakage."""
+    generator = DatasetGenerator(DatasetSpec(rows=rows, seed=seed))
+    rnd = generator.random
+    names = [name for _, name in generator.employees]
+    return [
+        to_mojibake(name) if rnd.random() < mojibake_ratio else name
+        for name in (rnd.choice(names) for _ in range(rows))
+    ]
+
+
+def time_column(
+    repair: Callable[[list[str]], list[str]], column: list[str], iterations: int
+) -> dict[str, Any]:
+    """Time repairing the whole column and report the per-row cost."""
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        repair(column)
+        timings.append(time.perf_counter() - started)
+    result = summarize(timings)
+    result["ns_per_row"] = round(result["median_ms"] * 1e6 / len(column), 1)
+    return result
+
+
+def in_pages(page_size: int) -> Callable[[list[str]], list[str]]:
+    """Batch repair applied page by page, like the assignment endpoints do."""
+
+    def repair(column: list[str]) -> list[str]:
+        repaired: list[str] = []
+        for start in range(0, len(column), page_size):
+            repaired.extend(
+                fix_ukrainian_encoding_batch(column[start : start + page_size])
+            )
+        return repaired
+
+    return repair
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark mojibake repair")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--mojibake-ratio", type=float, default=0.3)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, help="Where to write the JSON report")
+    args = parser.parse_args()
+
+    column = build_column(args.rows, args.mojibake_ratio, args.seed)
+    expected = [legacy_fix_ukrainian_encoding(value) for value in column]
+    if fix_ukrainian_encoding_batch(column) != expected:
+        raise SystemExit("Batch repair differs from the legacy implementation")
+
+    cases: dict[str, Callable[[list[str]], list[str]]] = {
+        "legacy_per_row": lambda values: [
+            legacy_fix_ukrainian_encoding(value) for value in values
+        ],
+        "memoized_per_row": lambda values: [
+            fix_ukrainian_encoding(value) for value in values
+        ],
+        "batch_page_100": in_pages(100),
+        "batch_page_1000": in_pages(1000),
+        "batch_column": fix_ukrainian_encoding_batch,
+    }
+
+    _repair.cache_clear()
+    results = {}
+    for name, repair in cases.items():
+        results[name] = time_column(repair, column, args.iterations)
+        print(f"  {name:<20} {results[name]['ns_per_row']:>8} ns/row")
+
+    baseline = results["legacy_per_row"]["ns_per_row"]
+    for result in results.values():
+        result["speedup"] = round(baseline / result["ns_per_row"], 2)
+
+    report = {
+        "meta": {
+            "rows": args.rows,
+            "distinct_values": len(set(column)),
+            "mojibake_ratio": args.mojibake_ratio,
+            "iterations": args.iterations,
+            "repair_cache": repair_cache_info(),
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(
+            json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+"""EXPLAIN-based index advisor for the dispatcher queries.
+
+Runs every query the assignment service, the assignment views (including
+the ``direct`` view behind ``/direct-assignments``), the daily statistics
+and the change stream issue for one date, captures the SQL they send and
+explains each statement: ``EXPLAIN FORMAT=JSON`` on MySQL, ``EXPLAIN QUERY
+PLAN`` on the SQLite stand-in. Full table scans, filesorts and temporary
+tables are flagged per query.
+
+The composite indexes in ``INDEX_CANDIDATES`` are checked against the
+schema; with ``--write-migration`` the missing ones are written as a new
+Alembic revision in ``backend/migrations/versions``, to be applied with
+``uv run alembic upgrade head``.
+
+Usage (from the ``backend`` directory)::
+
+    python -m benchmarks.index_advisor --url mysql+pymysql://u:p@127.0.0.1/khtrm
+    python -m benchmarks.index_advisor --sqlite /tmp/khtrm_bench.db \\
+        --write-migration --output explain.json
+"""
+
+import argparse
+import json
+import re
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from alembic.script import ScriptDirectory
+from app.services.assignment_service import (
+    assignment_service,
+    count_assignments,
+    fetch_date_fingerprint,
+)
+from app.services.assignment_views import (
+    ASSIGNMENT_VIEWS,
+    fetch_view_page,
+    fetch_view_rows,
+)
+from app.services.change_stream import fetch_bucket_checksums, fetch_row_checksums
+from app.services.daily_stats import fetch_date_statistics, fetch_source_fingerprints
+from app.services.pagination import decode_cursor
+from sqlalchemy import Connection, Engine, create_engine, event, inspect, text
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[1] / "migrations"
+
+Call = Callable[[Connection], Any]
+
+
+@dataclass(frozen=True)
+class IndexCandidate:
+    """Composite index serving a family of dispatcher queries."""
+
+    name: str
+    table: str
+    columns: tuple[str, ...]
+    serves: str
+
+
+INDEX_CANDIDATES = (
+    IndexCandidate(
+        "ix_zanaradka_day_route_shift",
+        "zanaradka",
+        ("data_day", "marshrut", "smena"),
+        "data_day = :d ORDER BY marshrut, smena, key of every assignment view",
+    ),
+    IndexCandidate(
+        "ix_tabel_day_tab",
+        "tabel",
+        ("data_day", "tab"),
+        "LEFT JOIN tabel ON (tab, data_day) of the direct and full views",
+    ),
+)
+
+
+@dataclass
+class QueryReport:
+    """Explained statements of one workload call."""
+
+    name: str
+    statements: list[dict[str, Any]] = field(default_factory=list)
+    error: str | None = None
+
+
+def workload(conn: Connection, target_date: date) -> list[tuple[str, Call]]:
+    """The dispatcher queries of one date, named after their caller."""
+    calls: list[tuple[str, Call]] = []
+    for name, view in ASSIGNMENT_VIEWS.items():
+        calls.append(
+            (
+                f"{name} view page",
+                lambda c, view=view: fetch_view_page(c, view, target_date, 100),
+            )
+        )
+    full = ASSIGNMENT_VIEWS["full"]
+    assignments, _, next_cursor = fetch_view_page(conn, full, target_date, 20)
+    if next_cursor is not None:
+        cursor = decode_cursor(next_cursor)
+        calls.append(
+            (
+                "full view next page",
+                lambda c: fetch_view_page(c, full, target_date, 100, cursor),
+            )
+        )
+    ids = [row["id"] for row in assignments[:5]]
+    calls += [
+        ("count for with_total", lambda c: count_assignments(c, target_date)),
+        ("date fingerprint", lambda c: fetch_date_fingerprint(c, target_date)),
+        (
+            "available dates",
+            lambda c: assignment_service._fetch_available_dates(c, 30),
+        ),
+        (
+            "live statistics",
+            lambda c: assignment_service._fetch_live_statistics(c, target_date),
+        ),
+        ("summary statistics", lambda c: fetch_date_statistics(c, target_date)),
+        (
+            "daily stats refresh",
+            lambda c: fetch_source_fingerprints(c, target_date - timedelta(days=7)),
+        ),
+        (
+            "change stream buckets",
+            lambda c: fetch_bucket_checksums(c, target_date),
+        ),
+        ("change stream rows", lambda c: fetch_row_checksums(c, target_date)),
+        (
+            "change stream changed rows",
+            lambda c: fetch_view_rows(c, full, target_date, ids),
+        ),
+    ]
+    return calls
+
+
+def capture(bind: Engine, call: Call) -> tuple[list[tuple[str, Any]], str | None]:
+    """Run a call and return the DBAPI statements it sent, plus any error."""
+    sent: list[tuple[str, Any]] = []
+
+    def record(
+        conn: Any, cursor: Any, statement: str, parameters: Any, *_: Any
+    ) -> None:
+        sent.append((statement, parameters))
+
+    with bind.connect() as conn:
+        event.listen(conn, "before_cursor_execute", record)
+        try:
+            call(conn)
+        except Exception as e:
+            return sent, str(e).splitlines()[0]
+        finally:
+            event.remove(conn, "before_cursor_execute", record)
+    return sent, None
+
+
+def _walk(node: Any) -> list[dict[str, Any]]:
+    """All objects of a JSON plan, depth first."""
+    if isinstance(node, dict):
+        found = [node]
+        for value in node.values():
+            found += _walk(value)
+        return found
+    if isinstance(node, list):
+        return [item for value in node for item in _walk(value)]
+    return []
+
+
+def mysql_findings(plan: dict[str, Any]) -> tuple[list[str], list[str]]:
+    """Problems and used indexes of an ``EXPLAIN FORMAT=JSON`` plan."""
+    findings, keys = [], []
+    for node in _walk(plan):
+        table = node.get("table")
+        if isinstance(table, dict):
+            name = table.get("table_name", "?")
+            rows = table.get("rows_examined_per_scan")
+            if table.get("access_type") == "ALL":
+                findings.append(f"full scan of {name} (~{rows} rows)")
+            elif table.get("access_type") == "index":
+                findings.append(f"full index scan of {name} (~{rows} rows)")
+            if table.get("key"):
+                keys.append(f"{name}.{table['key']}")
+        if node.get("using_filesort"):
+            findings.append("filesort")
+        if node.get("using_temporary_table"):
+            findings.append("temporary table")
+    return findings, keys
+
+
+def sqlite_findings(details: Sequence[str]) -> tuple[list[str], list[str]]:
+    """Problems and used indexes of an ``EXPLAIN QUERY PLAN`` result."""
+    findings, keys = [], []
+    for detail in details:
+        if detail.startswith("SCAN ") and "COVERING INDEX" not in detail:
+            findings.append(f"full scan: {detail}")
+        if "TEMP B-TREE FOR ORDER BY" in detail:
+            findings.append("filesort")
+        elif "TEMP B-TREE" in detail:
+            findings.append(f"temporary table: {detail}")
+        match = re.search(r"USING (?:COVERING )?INDEX (\w+)", detail)
+        if match:
+            keys.append(match.group(1))
+    return findings, keys
+
+
+def explain(conn: Connection, statement: str, parameters: Any) -> dict[str, Any]:
+    """Explain one captured statement with its original parameters."""
+    if conn.dialect.name == "mysql":
+        result = conn.exec_driver_sql(f"EXPLAIN FORMAT=JSON {statement}", parameters)
+        findings, keys = mysql_findings(json.loads(result.scalar_one()))
+    else:
+        result = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        findings, keys = sqlite_findings([row[-1] for row in result])
+    return {
+        "sql": " ".join(statement.split()),
+        "findings": list(dict.fromkeys(findings)),
+        "indexes": list(dict.fromkeys(keys)),
+    }
+
+
+def explain_workload(bind: Engine, target_date: date) -> list[QueryReport]:
+    """Capture and explain the statements of every workload call."""
+    with bind.connect() as conn:
+        calls = workload(conn, target_date)
+    reports = []
+    for name, call in calls:
+        report = QueryReport(name)
+        sent, report.error = capture(bind, call)
+        with bind.connect() as conn:
+            for statement, parameters in sent:
+                try:
+                    report.statements.append(explain(conn, statement, parameters))
+                except Exception as e:
+                    report.error = report.error or str(e).splitlines()[0]
+        reports.append(report)
+    return reports
+
+
+def existing_indexes(bind: Engine, table: str) -> list[tuple[str, ...]]:
+    """Column lists of the primary key and indexes of a table."""
+    inspector = inspect(bind)
+    if not inspector.has_table(table):
+        return []
+    indexes = [tuple(index["column_names"]) for index in inspector.get_indexes(table)]
+    primary = inspector.get_pk_constraint(table).get("constrained_columns")
+    if primary:
+        indexes.append(tuple(primary))
+    return indexes
+
+
+def missing_candidates(bind: Engine) -> list[IndexCandidate]:
+    """Candidates no existing index starts with."""
+    missing = []
+    for candidate in INDEX_CANDIDATES:
+        width = len(candidate.columns)
+        indexes = existing_indexes(bind, candidate.table)
+        if indexes and not any(
+            columns[:width] == candidate.columns for columns in indexes
+        ):
+            missing.append(candidate)
+    return missing
+
+
+def render_migration(
+    candidates: Sequence[IndexCandidate], revision: str, down_revision: str | None
+) -> str:
+    """Source of an Alembic revision creating the given indexes."""
+    indexes = "".join(
+        f"    # {c.serves}\n"
+        f"    ({json.dumps(c.name)}, {json.dumps(c.table)}, {json.dumps(c.columns)}),\n"
+        for c in candidates
+    )
+    down = json.dumps(down_revision) if down_revision else None
+    created = "".join(
+        f"- {c.name} on {c.table}({', '.join(c.columns)})\n" for c in candidates
+    )
+    return f'''"""Composite indexes for the dispatcher queries
+
+{created}
+Revision ID: {revision}
+Revises: {down_revision or "-"}
+Create Date: {datetime.now():%Y-%m-%d %H:%M:%S}
+
+Written by ``python -m benchmarks.index_advisor --write-migration``. Indexes
+whose columns an existing index already starts with are skipped, so the
+revision is safe on databases where they were added by hand. MySQL builds
+them in place without blocking reads or writes.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = {json.dumps(revision)}
+down_revision: str | Sequence[str] | None = {down}
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# (index name, table, columns)
+INDEXES = (
+{indexes})
+
+
+def _existing(table: str) -> dict[str, list[str]] | None:
+    """Indexes of a table by name, None when only emitting SQL (--sql)."""
+    if op.get_context().as_sql:
+        return None
+    indexes = sa.inspect(op.get_bind()).get_indexes(table)
+    return {{index["name"]: index["column_names"] for index in indexes}}
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        existing = _existing(table) or {{}}
+        if not any(indexed[: len(columns)] == columns for indexed in existing.values()):
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        existing = _existing(table)
+        if existing is None or name in existing:
+            op.drop_index(name, table_name=table)
+'''
+
+
+def write_migration(candidates: Sequence[IndexCandidate]) -> Path:
+    """Write a revision for the candidates after the current head."""
+    head = ScriptDirectory(str(MIGRATIONS_DIR)).get_current_head()
+    revision = f"{int(head) + 1:04d}" if head and head.isdigit() else "0001"
+    path = MIGRATIONS_DIR / "versions" / f"{revision}_dispatcher_indexes.py"
+    path.write_text(render_migration(candidates, revision, head), encoding="utf-8")
+    return path
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Explain the dispatcher queries")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--sqlite", help="Path of a SQLite stand-in database")
+    target.add_argument("--url", help="SQLAlchemy URL of a MySQL database")
+    parser.add_argument(
+        "--date", type=date.fromisoformat, help="Defaults to the last date"
+    )
+    parser.add_argument(
+        "--write-migration",
+        action="store_true",
+        help="Write an Alembic revision for the missing indexes",
+    )
+    parser.add_argument("--output", type=Path, help="Where to write the JSON report")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        from .sqlite_compat import create_sqlite_engine
+
+        bind = create_sqlite_engine(args.sqlite)
+    else:
+        bind = create_engine(args.url, connect_args={"charset": "utf8mb4"})
+
+    target_date = args.date
+    if target_date is None:
+        with bind.connect() as conn:
+            last_date = conn.execute(
+                text("SELECT MAX(data_day) FROM zanaradka")
+            ).scalar()
+        # SQLite returns the date as text
+        target_date = date.fromisoformat(str(last_date))
+
+    reports = explain_workload(bind, target_date)
+    print(f"Explained dispatcher queries of {target_date} ({bind.dialect.name})")
+    for report in reports:
+        findings = [f for s in report.statements for f in s["findings"]]
+        status = "; ".join(dict.fromkeys(findings)) or "ok"
+        if report.error:
+            status = f"error: {report.error}"
+        print(f"  {report.name:<28} {status}")
+
+    missing = missing_candidates(bind)
+    for candidate in missing:
+        print(
+            f"Missing index {candidate.name} on "
+            f"{candidate.table}({', '.join(candidate.columns)}): {candidate.serves}"
+        )
+    if not missing:
+        print("All candidate indexes exist")
+    elif args.write_migration:
+        print(f"Migration written to {write_migration(missing)}")
+
+    if args.output:
+        report = {
+            "meta": {"date": target_date.isoformat(), "dialect": bind.dialect.name},
+            "queries": [vars(report) for report in reports],
+            "missing_indexes": [vars(candidate) for candidate in missing],
+        }
+        args.output.write_text(
+            json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""Benchmark harness for the assignment service and dispatcher endpoints.
+
+Times ``AssignmentService`` methods directly on an injected engine and the
+HTTP endpoints through the ASGI app, then writes a JSON report so runs can
+be compared.
+
+Usage (from the ``backend`` directory)::
+
+    python -m benchmarks.run --sqlite /tmp/khtrm_bench.db --output before.json
+    python -m benchmarks.run --url mysql+pymysql://u:p@127.0.0.1:3306/bench
+    python -m benchmarks.run --compare before.json after.json
+
+The ``--url`` database should be filled with ``benchmarks.datagen`` first.
+Endpoints that need ``information_schema`` or ``DATE_SUB`` are skipped on
+the SQLite stand-in.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Engine, create_engine, make_url, text
+
+MYSQL_ONLY = "needs MySQL (information_schema / DATE_SUB)"
+
+
+@dataclass
+class BenchmarkCase:
+    """One timed operation."""
+
+    name: str
+    run: Callable[[], Any]
+    mysql_only: bool = False
+
+
+@dataclass
+class BenchmarkReport:
+    """Timings of a benchmark run plus the environment they were taken in."""
+
+    meta: dict[str, Any]
+    results: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {"meta": self.meta, "results": self.results},
+            ensure_ascii=False,
+            indent=2,
+        )
+
+
+def summarize(timings: list[float]) -> dict[str, Any]:
+    """Summary statistics of timings given in seconds, reported in ms."""
+    ordered = sorted(timings)
+    p95_index = max(0, round(0.95 * len(ordered)) - 1)
+    return {
+        "iterations": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[p95_index] * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def time_case(case: BenchmarkCase, iterations: int, warmup: int) -> dict[str, Any]:
+    """Run a case ``warmup`` times untimed, then ``iterations`` times timed."""
+    for _ in range(warmup):
+        case.run()
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        case.run()
+        timings.append(time.perf_counter() - started)
+    return summarize(timings)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _busiest_date(bind: Engine) -> tuple[date, int, int]:
+    """Date with the most assignments, its row count and the table total."""
+    with bind.connect() as conn:
+        row = conn.execute(
+            text("""
+                SELECT data_day, COUNT(*) as row_count
+                FROM zanaradka
+                GROUP BY data_day
+                ORDER BY row_count DESC, data_day DESC
+                LIMIT 1
+            """)
+        ).one()
+        total = conn.execute(text("SELECT COUNT(*) FROM zanaradka")).scalar()
+    return row.data_day, row.row_count, int(total or 0)
+
+
+def _expect_ok(response: Any) -> Any:
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.status_code}: {response.text[:200]}")
+    return response
+
+
+def build_cases(
+    bind: Engine, target_date: date, database_name: str | None
+) -> list[BenchmarkCase]:
+    """Service and endpoint cases for one dataset."""
+    from app import database
+    from app.main import create_app
+    from app.services.assignment_service import AssignmentService
+    from fastapi.testclient import TestClient
+
+    service = AssignmentService(bind)
+    # Endpoints borrow connections from the application engine
+    database.engine = bind
+    client = TestClient(create_app())
+    day = target_date.isoformat()
+
+    def get(path: str, **params: Any) -> Callable[[], Any]:
+        return lambda: _expect_ok(client.get(f"/api/dispatcher{path}", params=params))
+
+    cases = [
+        BenchmarkCase(
+            "service.get_simple_assignments[100]",
+            lambda: service.get_simple_assignments(target_date, limit=100),
+        ),
+        BenchmarkCase(
+            "service.get_simple_assignments[1000]",
+            lambda: service.get_simple_assignments(target_date, limit=1000),
+        ),
+        BenchmarkCase(
+            "service.get_extended_assignments[1000]",
+            lambda: service.get_extended_assignments(target_date, limit=1000),
+        ),
+        BenchmarkCase(
+            "service.get_full_assignments[100]",
+            lambda: service.get_full_assignments(target_date, limit=100),
+        ),
+        BenchmarkCase(
+            "service.get_full_assignments[1000]",
+            lambda: service.get_full_assignments(target_date, limit=1000),
+        ),
+        BenchmarkCase(
+            "service.get_statistics",
+            lambda: service.get_statistics(target_date),
+        ),
+        BenchmarkCase(
+            "service.get_available_dates",
+            lambda: service.get_available_dates(days_back=30),
+            mysql_only=True,
+        ),
+        BenchmarkCase(
+            "api.direct_assignments[100]",
+            get("/direct-assignments", assignment_date=day, limit=100),
+        ),
+        BenchmarkCase(
+            "api.direct_assignments[1000]",
+            get("/direct-assignments", assignment_date=day, limit=1000),
+        ),
+        BenchmarkCase("api.admin_databases", get("/admin/databases"), mysql_only=True),
+    ]
+    if database_name:
+        cases += [
+            BenchmarkCase(
+                "api.admin_tables",
+                get("/admin/tables", database_name=database_name),
+                mysql_only=True,
+            ),
+            BenchmarkCase(
+                "api.admin_table_fields[zanaradka]",
+                get(
+                    "/admin/table-fields",
+                    database_name=database_name,
+                    table_name="zanaradka",
+                ),
+                mysql_only=True,
+            ),
+            BenchmarkCase(
+                "api.admin_table_data[zanaradka,100]",
+                get(
+                    "/admin/table-data",
+                    database_name=database_name,
+                    table_name="zanaradka",
+                    limit=100,
+                ),
+                mysql_only=True,
+            ),
+        ]
+    return cases
+
+
+def run_benchmarks(
+    bind: Engine,
+    backend: str,
+    iterations: int,
+    warmup: int,
+    only: list[str] | None = None,
+) -> BenchmarkReport:
+    """Time every case against ``bind`` and collect a report."""
+    target_date, rows_on_date, total_rows = _busiest_date(bind)
+    database_name = bind.url.database if backend == "mysql" else None
+
+    report = BenchmarkReport(
+        meta={
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "backend": backend,
+            "database": bind.url.render_as_string(hide_password=True),
+            "target_date": target_date.isoformat(),
+            "rows_on_date": rows_on_date,
+            "total_rows": total_rows,
+            "iterations": iterations,
+            "warmup": warmup,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "git_commit": _git_commit(),
+        }
+    )
+
+    for case in build_cases(bind, target_date, database_name):
+        if only and not any(pattern in case.name for pattern in only):
+            continue
+        if case.mysql_only and backend != "mysql":
+            report.results[case.name] = {"skipped": MYSQL_ONLY}
+            continue
+        try:
+            report.results[case.name] = time_case(case, iterations, warmup)
+        except Exception as e:
+            report.results[case.name] = {"error": str(e)}
+        result = report.results[case.name]
+        print(f"  {case.name:<42} {result.get('median_ms', result)} ms")
+
+    return report
+
+
+def compare_reports(before_path: Path, after_path: Path) -> None:
+    """Print median timings of two reports side by side."""
+    before = json.loads(before_path.read_text(encoding="utf-8"))["results"]
+    after = json.loads(after_path.read_text(encoding="utf-8"))["results"]
+    print(f"{'case':<42} {'before ms':>10} {'after ms':>10} {'change':>8}")
+    for name in sorted(set(before) | set(after)):
+        old = before.get(name, {}).get("median_ms")
+        new = after.get(name, {}).get("median_ms")
+        if old is None or new is None:
+            print(f"{name:<42} {old or '-':>10} {new or '-':>10}")
+            continue
+        change = (new - old) / old * 100 if old else 0.0
+        print(f"{name:<42} {old:>10.3f} {new:>10.3f} {change:>+7.1f}%")
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Run dispatcher benchmarks")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--sqlite", help="Path of a SQLite stand-in database")
+    target.add_argument("--url", help="SQLAlchemy URL of a (local) MySQL database")
+    target.add_argument("--compare", nargs=2, type=Path, metavar=("BEFORE", "AFTER"))
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument(
+        "--only", action="append", help="Run cases whose name contains this"
+    )
+    parser.add_argument("--output", type=Path, help="Where to write the JSON report")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_reports(*args.compare)
+        return
+
+    if args.sqlite:
+        from .sqlite_compat import create_sqlite_engine
+
+        bind = create_sqlite_engine(args.sqlite)
+        backend = "sqlite"
+    else:
+        # Settings are read at import time; point the app at the same server
+        os.environ["DATABASE_URL"] = args.url
+        os.environ["DATABASE_ASYNC"] = "false"
+        bind = create_engine(make_url(args.url), connect_args={"charset": "utf8mb4"})
+        backend = "mysql"
+
+    print(f"Running benchmarks on {backend}...")
+    report = run_benchmarks(bind, backend, args.iterations, args.warmup, args.only)
+
+    output = args.output or Path(
+        f"benchmarks/results/{datetime.now():%Y%m%d-%H%M%S}-{backend}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(report.to_json(), encoding="utf-8")
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""Micro-benchmark of the full assignment view's row serialization.
+
+Compares the hand-written per-row dict building with ``json.dumps`` that
+``_fetch_full_assignments`` used before against the generated serializer
+of the ``full`` view with orjson, plus the two mixed combinations to
+show where the time goes. Rows come from the real full-view query on a
+database filled by ``benchmarks.datagen``; only conversion to JSON bytes
+is timed.
+
+Usage (from the ``backend`` directory)::
+
+    python -m benchmarks.serializers --sqlite /tmp/khtrm_bench.db
+    python -m benchmarks.serializers --url mysql+pymysql://u:p@127.0.0.1/bench \\
+        --limit 1000 --output serializers.json
+"""
+
+import argparse
+import json
+import time
+from collections.abc import Callable, Sequence
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+from app.services.assignment_views import ASSIGNMENT_VIEWS
+from app.services.row_serializers import dump_json
+from app.services.text_encoding import fix_ukrainian_encoding_batch
+from sqlalchemy import Engine, create_engine, text
+
+from .run import summarize
+
+
+def legacy_full_assignments(rows: Sequence[Any]) -> list[dict[str, Any]]:
+    """The row loop of the full view before generated serializers.
+
+    Reads the columns under their view registry names.
+    """
+    driver_names = fix_ukrainian_encoding_batch(row.driver_name for row in rows)
+    conductor_names = fix_ukrainian_encoding_batch(row.conductor_name for row in rows)
+    notes = fix_ukrainian_encoding_batch(row.notes for row in rows)
+
+    assignments = []
+    for row, driver_name, conductor_name, note in zip(
+        rows, driver_names, conductor_names, notes, strict=True
+    ):
+        assignments.append(
+            {
+                "id": row.id,
+                "assignment_date": row.assignment_date.isoformat()
+                if row.assignment_date
+                else None,
+                "date_charging": row.assignment_date.isoformat()
+                if row.assignment_date
+                else None,
+                "month": str(row.month) if row.month else "",
+                "brigade": str(row.brigade) if row.brigade else "",
+                "shift": str(row.shift) if row.shift else "",
+                "route_type": row.route_type or "",
+                "route_number": str(row.route_number) if row.route_number else "",
+                "internal_number": str(row.brigade) if row.brigade else "",
+                "vehicle_number": str(row.vehicle_number) if row.vehicle_number else "",
+                "vehicle_number_for_ro": str(row.vehicle_number)
+                if row.vehicle_number
+                else "",
+                "driver_tab_for_internal": str(row.driver_tab_number)
+                if row.driver_tab_number
+                else "",
+                "driver_tab_number": str(row.driver_tab_number)
+                if row.driver_tab_number
+                else "",
+                "driver_name": driver_name,
+                "conductor_tab_number": str(row.conductor_tab_number)
+                if row.conductor_tab_number
+                else "",
+                "conductor_name": conductor_name,
+                "departure_time": str(row.departure_time) if row.departure_time else "",
+                "arrival_time": str(row.arrival_time) if row.arrival_time else "",
+                "waybill_number": row.waybill_number or "",
+                "fuel_address": row.fuel_address
+                if row.fuel_address and row.fuel_address != "-"
+                else "Barrel",
+                "route_endpoint": row.route_endpoint or "",
+                "parking_place": row.parking_place or "Hospital Emergency",
+                "day_of_week": str(row.day_of_week) if row.day_of_week else "",
+                "hour1": str(row.driver_preparation)
+                if row.driver_preparation and row.driver_preparation != "00:00"
+                else "",
+                "hour2": str(row.conductor_preparation)
+                if row.conductor_preparation and row.conductor_preparation != "00:00"
+                else "",
+                "hour3": str(row.driver_handover)
+                if row.driver_handover and row.driver_handover != "00:00"
+                else "",
+                "hour4": str(row.conductor_handover)
+                if row.conductor_handover and row.conductor_handover != "00:00"
+                else "",
+                "hour5": str(row.driver_depot_departure)
+                if row.driver_depot_departure and row.driver_depot_departure != "00:00"
+                else "",
+                "break_1": str(row.break_1)
+                if row.break_1 and row.break_1 != "00:00"
+                else "",
+                "break_2": str(row.break_2)
+                if row.break_2 and row.break_2 != "00:00"
+                else "",
+                "profit_start": str(row.profit_time)
+                if row.profit_time and row.profit_time != "00:00"
+                else "",
+                "profit_end": str(row.profit_hours)
+                if row.profit_hours and row.profit_hours != 0
+                else "",
+                "departure_vzd": str(row.conductor_depot_departure)
+                if row.conductor_depot_departure
+                and row.conductor_depot_departure != "00:00"
+                else "",
+                "departure_zgd": str(row.driver_depot_arrival)
+                if row.driver_depot_arrival and row.driver_depot_arrival != "00:00"
+                else "",
+                "end_kb": str(row.conductor_depot_arrival)
+                if row.conductor_depot_arrival
+                and row.conductor_depot_arrival != "00:00"
+                else "",
+                "notes": note,
+                "status": "active",
+                "address": row.parking_place or "",
+                "driver_waybill": row.waybill_number or "",
+                "vehicle_model": "",
+                "vehicle_bedt": "",
+                "coal_info": "",
+                "application": str(row.route_number) if row.route_number else "",
+            }
+        )
+    return assignments
+
+
+def legacy_dump_json(data: Any) -> bytes:
+    """The stdlib encoding used before orjson."""
+    return json.dumps(
+        data, ensure_ascii=False, separators=(",", ":"), default=str
+    ).encode("utf-8")
+
+
+def fetch_full_rows(bind: Engine, target_date: date, limit: int) -> list[Any]:
+    """Run the full-view query for one page of rows."""
+    view = ASSIGNMENT_VIEWS["full"]
+    with bind.connect() as conn:
+        result = conn.execute(
+            text(view.query(view.fields, "")),
+            {"target_date": target_date, "limit": limit},
+        )
+        return result.fetchall()
+
+
+def time_pipeline(
+    serialize: Callable[[Sequence[Any]], list[dict[str, Any]]],
+    dump: Callable[[Any], bytes],
+    rows: Sequence[Any],
+    iterations: int,
+) -> dict[str, Any]:
+    """Time turning rows into response bytes and report the per-row cost."""
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        dump({"assignments": serialize(rows)})
+        timings.append(time.perf_counter() - started)
+    result = summarize(timings)
+    result["us_per_row"] = round(result["median_ms"] * 1000 / len(rows), 2)
+    return result
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark row serialization")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--sqlite", help="Path of a SQLite stand-in database")
+    target.add_argument("--url", help="SQLAlchemy URL of a (local) MySQL database")
+    parser.add_argument(
+        "--date", type=date.fromisoformat, help="Defaults to the last date"
+    )
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--output", type=Path, help="Where to write the JSON report")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        from .sqlite_compat import create_sqlite_engine
+
+        bind = create_sqlite_engine(args.sqlite)
+    else:
+        bind = create_engine(args.url, connect_args={"charset": "utf8mb4"})
+
+    target_date = args.date
+    if target_date is None:
+        with bind.connect() as conn:
+            last_date = conn.execute(
+                text("SELECT MAX(data_day) FROM zanaradka")
+            ).scalar()
+        # SQLite returns the date as text
+        target_date = date.fromisoformat(str(last_date))
+    rows = fetch_full_rows(bind, target_date, args.limit)
+    if not rows:
+        raise SystemExit(f"No zanaradka rows on {target_date}")
+
+    full_rows = ASSIGNMENT_VIEWS["full"].serializer(ASSIGNMENT_VIEWS["full"].fields)
+    expected = legacy_dump_json({"assignments": legacy_full_assignments(rows)})
+    if dump_json({"assignments": full_rows.serialize(rows)}) != expected:
+        raise SystemExit("Generated serializer output differs from the legacy loop")
+
+    cases = {
+        "legacy_loop_json": (legacy_full_assignments, legacy_dump_json),
+        "legacy_loop_orjson": (legacy_full_assignments, dump_json),
+        "generated_json": (full_rows.serialize, legacy_dump_json),
+        "generated_orjson": (full_rows.serialize, dump_json),
+    }
+    print(f"Serializing {len(rows)} full-view rows of {target_date}")
+    results = {}
+    for name, (serialize, dump) in cases.items():
+        results[name] = time_pipeline(serialize, dump, rows, args.iterations)
+        print(f"  {name:<20} {results[name]['us_per_row']:>8} us/row")
+
+    baseline = results["legacy_loop_json"]["us_per_row"]
+    for result in results.values():
+        result["speedup"] = round(baseline / result["us_per_row"], 2)
+
+    report = {
+        "meta": {
+            "date": target_date.isoformat(),
+            "rows": len(rows),
+            "fields": len(full_rows.fields),
+            "iterations": args.iterations,
+            "response_bytes": len(expected),
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(
+            json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""SQLite stand-in for the MySQL database used by the benchmarks.
+
+Registers the MySQL functions that the dispatcher queries use, so the same
+SQL text runs unchanged against a local SQLite file. ``DATE`` and
+``DATETIME`` columns are converted to ``datetime`` objects like the MySQL
+driver does.
+
+Not covered: ``DATE_SUB(NOW(), INTERVAL n DAY)`` (``get_available_dates``),
+``information_schema`` and ``DESCRIBE`` (admin endpoints). The harness skips
+those cases on SQLite.
+"""
+
+import sqlite3
+import zlib
+from datetime import date, datetime
+from typing import Any
+
+from sqlalchemy import Engine, create_engine, event
+
+
+def _time_to_sec(value: Any) -> int | None:
+    """MySQL TIME_TO_SEC for ``HH:MM`` / ``HH:MM:SS`` strings."""
+    if value is None or value == "":
+        return None
+    text = str(value).strip()
+    sign = -1 if text.startswith("-") else 1
+    parts = text.lstrip("-").split(":")
+    try:
+        numbers = [int(part or 0) for part in parts] + [0, 0]
+    except ValueError:
+        return 0
+    return sign * (numbers[0] * 3600 + numbers[1] * 60 + numbers[2])
+
+
+def _sec_to_time(seconds: Any) -> str | None:
+    """MySQL SEC_TO_TIME, returned as ``[-]HH:MM:SS``."""
+    if seconds is None:
+        return None
+    total = int(seconds)
+    sign = "-" if total < 0 else ""
+    hours, rest = divmod(abs(total), 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{sign}{hours:02d}:{minutes:02d}:{secs:02d}"
+
+
+def _time_format(value: Any, pattern: str) -> str | None:
+    """MySQL TIME_FORMAT supporting the ``%H``, ``%i`` and ``%s`` specifiers."""
+    seconds = _time_to_sec(value)
+    if seconds is None:
+        return None
+    sign = "-" if seconds < 0 else ""
+    hours, rest = divmod(abs(seconds), 3600)
+    minutes, secs = divmod(rest, 60)
+    formatted = (
+        pattern.replace("%H", f"{hours:02d}")
+        .replace("%i", f"{minutes:02d}")
+        .replace("%s", f"{secs:02d}")
+    )
+    return sign + formatted
+
+
+def _month(value: Any) -> int | None:
+    if value is None:
+        return None
+    return int(str(value)[5:7])
+
+
+def _crc32(value: Any) -> int | None:
+    if value is None:
+        return None
+    return zlib.crc32(str(value).encode("utf-8"))
+
+
+def _concat_ws(separator: str, *values: Any) -> str:
+    return separator.join(str(value) for value in values if value is not None)
+
+
+class _BitXor:
+    """MySQL BIT_XOR aggregate."""
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def step(self, value: Any) -> None:
+        if value is not None:
+            self.value ^= int(value)
+
+    def finalize(self) -> int:
+        return self.value
+
+
+def register_mysql_functions(dbapi_connection: sqlite3.Connection) -> None:
+    """Register MySQL function shims on a raw SQLite connection."""
+    dbapi_connection.create_function("TIME_TO_SEC", 1, _time_to_sec)
+    dbapi_connection.create_function("SEC_TO_TIME", 1, _sec_to_time)
+    dbapi_connection.create_function("TIME_FORMAT", 2, _time_format)
+    dbapi_connection.create_function("MONTH", 1, _month)
+    dbapi_connection.create_function("CRC32", 1, _crc32)
+    dbapi_connection.create_function("CONCAT_WS", -1, _concat_ws)
+    dbapi_connection.create_aggregate("BIT_XOR", 1, _BitXor)
+
+
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, datetime.isoformat)
+sqlite3.register_converter("DATE", lambda raw: date.fromisoformat(raw.decode()))
+sqlite3.register_converter("DATETIME", lambda raw: datetime.fromisoformat(raw.decode()))
+
+
+def create_sqlite_engine(path: str) -> Engine:
+    """Create an engine on a SQLite file that understands the MySQL queries."""
+    bind = create_engine(
+        f"sqlite:///{path}",
+        connect_args={
+            "detect_types": sqlite3.PARSE_DECLTYPES,
+            "check_same_thread": False,
+        },
+    )
+
+    @event.listens_for(bind, "connect")
+    def on_connect(dbapi_connection: sqlite3.Connection, _: Any) -> None:
+        register_mysql_functions(dbapi_connection)
+
+    return bind
@@ -0,0 +1,68 @@
+"""Alembic environment of the KHTRM backend.
+
+Migrations run against the application database (``DATABASE_URL`` or the
+``MYSQL_*`` settings) unless ``-x url=...`` is given. Autogenerate only
+compares the tables of the application models: the legacy dispatcher tables
+(zanaradka, tabel, ...) are not modelled and must never be dropped, so
+changes to them are written by hand (see ``benchmarks.index_advisor``).
+"""
+
+from logging.config import fileConfig
+from typing import Any
+
+from alembic import context
+from app.config import settings
+from app.models import Base
+from sqlalchemy import create_engine, pool
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def database_url() -> str:
+    """URL given with ``-x url=...``, else the application database."""
+    return context.get_x_argument(as_dictionary=True).get(
+        "url", settings.effective_database_url
+    )
+
+
+def include_name(name: str | None, type_: str, parent_names: dict[str, Any]) -> bool:
+    """Limit autogenerate to the tables of the application models."""
+    if type_ == "table":
+        return name in target_metadata.tables
+    return True
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL without connecting (``alembic upgrade --sql``)."""
+    context.configure(
+        url=database_url(),
+        target_metadata=target_metadata,
+        include_name=include_name,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run the migrations on a connection to the database."""
+    connectable = create_engine(database_url(), poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_name=include_name,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
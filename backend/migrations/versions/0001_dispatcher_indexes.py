@@ -0,0 +1,55 @@
+"""Composite indexes for the dispatcher queries
+
+- ix_zanaradka_day_route_shift on zanaradka(data_day, marshrut, smena)
+- ix_tabel_day_tab on tabel(data_day, tab)
+
+Revision ID: 0001
+Revises: -
+Create Date: 2026-10-18 09:40:08
+
+Written by ``python -m benchmarks.index_advisor --write-migration``. Indexes
+whose columns an existing index already starts with are skipped, so the
+revision is safe on databases where they were added by hand. MySQL builds
+them in place without blocking reads or writes.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: str | Sequence[str] | None = None
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# (index name, table, columns)
+INDEXES = (
+    # data_day = :d ORDER BY marshrut, smena, key of every assignment view
+    ("ix_zanaradka_day_route_shift", "zanaradka", ["data_day", "marshrut", "smena"]),
+    # LEFT JOIN tabel ON (tab, data_day) of the direct and full views
+    ("ix_tabel_day_tab", "tabel", ["data_day", "tab"]),
+)
+
+
+def _existing(table: str) -> dict[str, list[str]] | None:
+    """Indexes of a table by name, None when only emitting SQL (--sql)."""
+    if op.get_context().as_sql:
+        return None
+    indexes = sa.inspect(op.get_bind()).get_indexes(table)
+    return {index["name"]: index["column_names"] for index in indexes}
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        existing = _existing(table) or {}
+        if not any(indexed[: len(columns)] == columns for indexed in existing.values()):
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        existing = _existing(table)
+        if existing is None or name in existing:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,43 @@
+"""The extraction script's zanaradka SELECT against the SQLite stand-in schema."""
+
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+from benchmarks.datagen import DatasetSpec, generate_dataset
+from benchmarks.sqlite_compat import create_sqlite_engine
+from sqlalchemy import Engine
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+
+from assignment_rows import ASSIGNMENT_SELECT, convert_assignment  # noqa: E402
+
+DAY = date(2025, 7, 1)
+
+
+@pytest.fixture
+def engine(tmp_path: Path) -> Engine:
+    bind = create_sqlite_engine(str(tmp_path / "khtrm.db"))
+    generate_dataset(bind, DatasetSpec(rows=200, routes=10, end_date=DAY))
+    return bind
+
+
+def test_select_reads_existing_columns(engine: Engine) -> None:
+    with engine.connect() as conn:
+        rows = (
+            conn.exec_driver_sql(ASSIGNMENT_SELECT + " ORDER BY `key`").mappings().all()
+        )
+        source = conn.exec_driver_sql(
+            "SELECT `key`, marshrut, tvih, `pe№` FROM zanaradka ORDER BY `key`"
+        ).all()
+
+    assignments = [convert_assignment(dict(row)) for row in rows]
+    assert len(assignments) == len(source) == 200
+    first = assignments[0]
+    key, route_number, departure_time, vehicle_number = source[0]
+    assert first["source_key"] == key
+    assert first["route_number"] == route_number
+    assert first["departure_time"] == departure_time
+    assert first["vehicle_number"] == str(vehicle_number)
+    assert date.fromisoformat(first["assignment_date"]).month == first["month"]
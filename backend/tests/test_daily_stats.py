@@ -0,0 +1,58 @@
+"""Statistics served from the daily summary only while it matches the rows."""
+
+from datetime import date
+from pathlib import Path
+
+import pytest
+from app.models import DailyAssignmentStats, DailyRouteShiftStats
+from app.services.assignment_service import AssignmentService
+from app.services.daily_stats import fetch_date_statistics, refresh_daily_stats
+from benchmarks.datagen import DatasetSpec, generate_dataset
+from benchmarks.sqlite_compat import create_sqlite_engine
+from sqlalchemy import Engine, text
+
+OLD_DAY = date(2025, 6, 23)
+DAY = date(2025, 7, 1)
+
+
+@pytest.fixture
+def engine(tmp_path: Path) -> Engine:
+    bind = create_sqlite_engine(str(tmp_path / "khtrm.db"))
+    generate_dataset(bind, DatasetSpec(rows=1000, routes=10, end_date=DAY))
+    for model in (DailyAssignmentStats, DailyRouteShiftStats):
+        model.__table__.create(bind, checkfirst=True)
+    refresh_daily_stats(bind)
+    return bind
+
+
+def _delete_first_row(bind: Engine, target_date: date) -> None:
+    with bind.begin() as conn:
+        conn.execute(
+            text("""
+                DELETE FROM zanaradka WHERE `key` = (
+                    SELECT MIN(`key`) FROM zanaradka WHERE data_day = :day
+                )
+            """),
+            {"day": target_date},
+        )
+
+
+@pytest.mark.parametrize("target_date", [DAY, OLD_DAY])
+def test_statistics_follow_edits_and_refresh_stale_summary(
+    engine: Engine, target_date: date
+) -> None:
+    service = AssignmentService(engine)
+    service.cache.clear()
+    before = service.get_statistics(target_date)["total_assignments"]
+
+    _delete_first_row(engine, target_date)
+    # The cached fingerprint would be re-queried after the revalidate interval
+    service.cache.clear()
+
+    assert service.get_statistics(target_date)["total_assignments"] == before - 1
+
+    service.stats_maintainer._executor.shutdown(wait=True)
+    with engine.connect() as conn:
+        summary = fetch_date_statistics(conn, target_date)
+    assert summary is not None
+    assert summary["total_assignments"] == before - 1
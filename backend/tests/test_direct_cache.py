@@ -0,0 +1,75 @@
+"""/direct-assignments served through the cache, keyed by the tabel rows too."""
+
+import asyncio
+import json
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import pytest
+from app.services.assignment_service import AssignmentService
+from benchmarks.datagen import DatasetSpec, generate_dataset
+from benchmarks.sqlite_compat import create_sqlite_engine
+from sqlalchemy import Engine, text
+
+DAY = date(2025, 7, 1)
+FIELDS = ("id", "driver_tab_number", "plan_hours")
+
+
+@pytest.fixture
+def service(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> AssignmentService:
+    bind = create_sqlite_engine(str(tmp_path / "khtrm.db"))
+    generate_dataset(
+        bind, DatasetSpec(rows=400, routes=30, end_date=DAY, tabel_ratio=1.0)
+    )
+    service = AssignmentService(bind)
+    service.cache.clear()
+    # Re-query the fingerprints on every request
+    monkeypatch.setattr(service.cache, "revalidate_seconds", -1)
+    return service
+
+
+def _edit_tabel(bind: Engine, tab_number: str) -> None:
+    """Change the plan hours of a driver on DAY; zanaradka is untouched."""
+    with bind.begin() as conn:
+        conn.execute(
+            text(
+                "UPDATE tabel SET plan_chas = 99 WHERE tab = :tab AND data_day = :day"
+            ),
+            {"tab": tab_number, "day": DAY},
+        )
+
+
+def _page(service: AssignmentService) -> dict[str, Any]:
+    body, _ = asyncio.run(
+        service.get_assignments_json_async("direct", DAY, 50, fields=FIELDS)
+    )
+    return json.loads(body)
+
+
+def test_tabel_edit_changes_cached_page_and_delta(service: AssignmentService) -> None:
+    first = _page(service)
+    hits = service.cache.hits
+    assert _page(service) == first
+    assert service.cache.hits == hits + 1
+
+    _edit_tabel(service.engine, first["assignments"][0]["driver_tab_number"])
+
+    edited = _page(service)
+    changed = [
+        row["id"]
+        for old, row in zip(first["assignments"], edited["assignments"], strict=True)
+        if old != row
+    ]
+    assert first["assignments"][0]["id"] in changed
+
+    delta = json.loads(
+        asyncio.run(
+            service.get_assignments_delta_async(
+                "direct", DAY, 50, first["version"], FIELDS
+            )
+        )
+    )
+    assert not delta["full"]
+    assert [row["id"] for row in delta["assignments"]] == changed
+    assert delta["version"] == edited["version"]
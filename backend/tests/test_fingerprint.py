@@ -0,0 +1,51 @@
+"""Row checksums behind the cache fingerprint, daily stats and change stream."""
+
+from collections.abc import Callable
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import pytest
+from app.services.assignment_service import fetch_date_fingerprint
+from app.services.change_stream import fetch_row_checksums
+from app.services.daily_stats import fetch_source_fingerprints
+from benchmarks.datagen import DatasetSpec, generate_dataset
+from benchmarks.sqlite_compat import create_sqlite_engine
+from sqlalchemy import Connection, Engine, text
+
+DAY = date(2025, 7, 1)
+
+
+@pytest.fixture
+def engine(tmp_path: Path) -> Engine:
+    bind = create_sqlite_engine(str(tmp_path / "khtrm.db"))
+    generate_dataset(bind, DatasetSpec(rows=100, routes=20, end_date=DAY))
+    return bind
+
+
+@pytest.mark.parametrize(
+    "fetch",
+    [
+        lambda conn: fetch_date_fingerprint(conn, DAY),
+        lambda conn: fetch_source_fingerprints(conn)[DAY],
+        lambda conn: fetch_row_checksums(conn, DAY),
+    ],
+    ids=["date", "daily_stats", "change_stream"],
+)
+def test_value_moved_between_nullable_columns_changes_checksum(
+    engine: Engine, fetch: Callable[[Connection], Any]
+) -> None:
+    def move(tob1: str | None, tob2: str | None) -> Any:
+        with engine.begin() as conn:
+            conn.execute(
+                text("""
+                    UPDATE zanaradka SET tob1 = :tob1, tob2 = :tob2
+                    WHERE `key` = (
+                        SELECT MIN(`key`) FROM zanaradka WHERE data_day = :day
+                    )
+                """),
+                {"tob1": tob1, "tob2": tob2, "day": DAY},
+            )
+            return fetch(conn)
+
+    assert move(None, "00:30") != move("00:30", None)
@@ -0,0 +1,95 @@
+"""Keyset pagination of the assignment views over the SQLite stand-in."""
+
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import pytest
+from app.services.assignment_views import (
+    ASSIGNMENT_VIEWS,
+    TABEL_JOIN,
+    fetch_view_page,
+)
+from app.services.pagination import decode_cursor
+from benchmarks.datagen import DatasetSpec, generate_dataset, tabel
+from benchmarks.sqlite_compat import create_sqlite_engine
+from sqlalchemy import Engine, text
+
+DAY = date(2025, 7, 1)
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory: pytest.TempPathFactory) -> Engine:
+    """Two days of assignments; every third tabel row of DAY is repeated."""
+    path = Path(tmp_path_factory.mktemp("pagination")) / "khtrm.db"
+    bind = create_sqlite_engine(str(path))
+    generate_dataset(
+        bind, DatasetSpec(rows=400, routes=30, end_date=DAY, tabel_ratio=1.0)
+    )
+    with bind.begin() as conn:
+        # Plain SQL: the stand-in already converts DATE columns to dates
+        rows = conn.execute(
+            text("SELECT * FROM tabel WHERE data_day = :target_date"),
+            {"target_date": DAY},
+        ).mappings()
+        next_key = conn.execute(text("SELECT MAX(`key`) FROM tabel")).scalar_one() + 1
+        duplicates = [
+            {**row, "key": next_key + index}
+            for index, row in enumerate(rows.all()[::3])
+        ]
+        conn.execute(tabel.insert(), duplicates)
+    return bind
+
+
+def page_all(bind: Engine, view: str, limit: int) -> list[dict[str, Any]]:
+    """Rows of DAY collected by following the cursors from the first page."""
+    assignments: list[dict[str, Any]] = []
+    cursor = None
+    with bind.connect() as conn:
+        while True:
+            page, _, next_cursor = fetch_view_page(
+                conn, ASSIGNMENT_VIEWS[view], DAY, limit, cursor
+            )
+            assignments.extend(page)
+            if next_cursor is None:
+                return assignments
+            cursor = decode_cursor(next_cursor)
+
+
+@pytest.mark.parametrize("limit", [1, 7, 50, 1000])
+def test_direct_view_pages_keep_duplicate_tabel_rows(
+    engine: Engine, limit: int
+) -> None:
+    with engine.connect() as conn:
+        expected = conn.execute(
+            text(f"""
+                SELECT COUNT(*) FROM zanaradka z
+                {TABEL_JOIN}
+                WHERE z.data_day = :target_date
+            """),
+            {"target_date": DAY},
+        ).scalar_one()
+        assignments = conn.execute(
+            text("SELECT COUNT(*) FROM zanaradka WHERE data_day = :target_date"),
+            {"target_date": DAY},
+        ).scalar_one()
+    assert expected > assignments
+
+    rows = page_all(engine, "direct", limit)
+
+    assert len(rows) == expected
+    assert len({row["id"] for row in rows}) == assignments
+
+
+@pytest.mark.parametrize("limit", [1, 7, 1000])
+def test_simple_view_pages_cover_every_row_once(engine: Engine, limit: int) -> None:
+    with engine.connect() as conn:
+        expected = conn.execute(
+            text("SELECT COUNT(*) FROM zanaradka WHERE data_day = :target_date"),
+            {"target_date": DAY},
+        ).scalar_one()
+
+    ids = [row["id"] for row in page_all(engine, "simple", limit)]
+
+    assert len(ids) == expected
+    assert len(set(ids)) == expected
@@ -337,6 +337,10 @@ export interface AssignmentsResponse {
   assignments: Assignment[];
   total_count: number;
   date: string;
+  // Keyset pagination: cursor of the next page, null on the last page
+  next_cursor?: string | null;
+  // Total rows for the date, only when requested with with_total=true
+  total_available?: number;
   statistics?: {
     total_assignments: number;
     active_assignments: number;
@@ -345,6 +349,28 @@ export interface AssignmentsResponse {
   };
 }
 
+// Page of rows in the compact ?layout=columnar format
+export interface ColumnarPage {
+  row_count: number;
+  // Encoded columns and one value array per column
+  columns: string[];
+  data: unknown[][];
+  // Columns with the same value in every row
+  constants: Record<string, unknown>;
+  // Columns identical to another column, by name of the source
+  aliases: Record<string, string>;
+  // Dictionary-encoded columns: data holds indexes into these values
+  dictionaries: Record<string, unknown[]>;
+  // HH:MM columns sent as minutes since midnight, with their empty value
+  times: Record<string, string | null>;
+}
+
+export interface ColumnarAssignmentsResponse
+  extends Omit<AssignmentsResponse, "assignments"> {
+  layout: "columnar";
+  assignments: ColumnarPage;
+}
+
 export interface MSAccessAssignmentsResponse {
   assignments: MSAccessAssignment[];
   total_count: number;
@@ -0,0 +1,40 @@
+import type { ColumnarPage } from "@/types/dispatcher";
+
+// Format minutes since midnight back to the "HH:MM" text of the row layout
+const formatMinutes = (value: number): string => {
+  const total = Math.abs(value);
+  const hours = String(Math.floor(total / 60)).padStart(2, "0");
+  const minutes = String(total % 60).padStart(2, "0");
+  return `${value < 0 ? "-" : ""}${hours}:${minutes}`;
+};
+
+// Decode a ?layout=columnar page into the rows of the default layout
+export function decodeColumnar<T>(page: ColumnarPage): T[] {
+  const columns = page.columns.map((name, index) => {
+    const values = page.data[index];
+    const dictionary = page.dictionaries[name];
+    if (dictionary) {
+      return values.map((value) => dictionary[value as number]);
+    }
+    if (name in page.times) {
+      const empty = page.times[name];
+      return values.map((value) =>
+        value === null ? empty : formatMinutes(value as number),
+      );
+    }
+    return values;
+  });
+
+  const rows: T[] = [];
+  for (let i = 0; i < page.row_count; i++) {
+    const row: Record<string, unknown> = { ...page.constants };
+    page.columns.forEach((name, index) => {
+      row[name] = columns[index][i];
+    });
+    for (const [name, source] of Object.entries(page.aliases)) {
+      row[name] = row[source];
+    }
+    rows.push(row as T);
+  }
+  return rows;
+}
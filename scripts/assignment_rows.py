@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Assignment Rows
+Выборка нарядов из zanaradka и преобразование строк в формат модели Assignment
+
+Колонки те же, что читает бэкенд (backend/app/services/assignment_views.py),
+поля модели сопоставлены им так же, как в представлении "full". Полей модели,
+которых нет в zanaradka (application_number, fuel_route, vehicle_model,
+vehicle_bedt, coal_info, vehicle_type_pc, state_number_pc), в выгрузке нет;
+profit_start/profit_end бэкенд вычисляет из времен выхода, захода и перерывов.
+"""
+
+from typing import Any
+
+# Колонки zanaradka; к запросу дописываются WHERE/ORDER BY
+ASSIGNMENT_SELECT = """
+    SELECT
+        -- Ключ строки, отметка инкрементальной выгрузки
+        `key` as source_key,
+
+        -- Наряд
+        marshrut as route_number,
+        vipusk as brigade,
+        smena as shift,
+        tipvipusk as route_type,
+        data_day as assignment_date,
+        MONTH(data_day) as month,
+        den_nedeli as day_of_week,
+
+        -- Персонал
+        tabvoditel as driver_tab_number,
+        fiovoditel as driver_name,
+        tabconduktor as conductor_tab_number,
+        fioconduktor as conductor_name,
+
+        -- Подвижной состав и документы
+        `pe№` as vehicle_number,
+        `putlist№` as waybill_number,
+
+        -- Выход и заход
+        tvih as departure_time,
+        tzah as arrival_time,
+        tvihmarsrut as route_departure_time,
+        tend as route_end_time,
+        kpvih as route_endpoint,
+        kpzah as route_endpoint_arrival,
+        mestootst as parking_place,
+
+        -- Перерывы
+        tob1 as break_1,
+        tob2 as break_2,
+        tna4otst as break_start,
+        tkonotst as break_end,
+
+        -- Подготовка, сдача, выезд и заезд в депо
+        tPodgotovkaVod as driver_preparation,
+        tPodgotovkaKon as conductor_preparation,
+        tSda4aVod as driver_handover,
+        tSda4aKon as conductor_handover,
+        tVihdepoVod as driver_depot_departure,
+        tVihdepoKon as conductor_depot_departure,
+        tZahdepoVod as driver_depot_arrival,
+        tZahdepoKon as conductor_depot_arrival,
+
+        -- Заправка
+        ZaprAdr as fuel_address,
+        zaprv as fuel_number,
+        zaprFakt as fuel_actual,
+
+        -- Примечания и удаление
+        Soobhenie as notes,
+        `del` as is_deleted
+
+    FROM zanaradka
+"""
+
+
+def _text(value: Any) -> str | None:
+    """Значение строкой, пустое - None"""
+    return str(value) if value else None
+
+
+def convert_assignment(row: dict[str, Any]) -> dict[str, Any]:
+    """Преобразовать строку ASSIGNMENT_SELECT в формат модели Assignment"""
+    assignment_date = row["assignment_date"]
+    return {
+        "source_key": row["source_key"],
+        "route_number": row["route_number"],
+        "brigade": _text(row["brigade"]),
+        "internal_number": _text(row["brigade"]),
+        "shift": _text(row["shift"]),
+        "route_type": row["route_type"],
+        "assignment_date": assignment_date.isoformat() if assignment_date else None,
+        "month": row["month"],
+        "day_of_week": row["day_of_week"],
+        "driver_tab_number": _text(row["driver_tab_number"]),
+        "driver_name": row["driver_name"],
+        "conductor_tab_number": _text(row["conductor_tab_number"]),
+        "conductor_name": row["conductor_name"],
+        "vehicle_number": _text(row["vehicle_number"]),
+        "waybill_number": row["waybill_number"],
+        "driver_waybill": row["waybill_number"],
+        "departure_time": _text(row["departure_time"]),
+        "arrival_time": _text(row["arrival_time"]),
+        "route_departure_time": _text(row["route_departure_time"]),
+        "route_end_time": _text(row["route_end_time"]),
+        "route_endpoint": row["route_endpoint"],
+        "route_endpoint_arrival": row["route_endpoint_arrival"],
+        "address": row["parking_place"],
+        "break_1": _text(row["break_1"]),
+        "break_2": _text(row["break_2"]),
+        "break_start": _text(row["break_start"]),
+        "break_end": _text(row["break_end"]),
+        # Часы и времена депо - как в представлении "full" бэкенда
+        "hour1": _text(row["driver_preparation"]),
+        "hour2": _text(row["conductor_preparation"]),
+        "hour3": _text(row["driver_handover"]),
+        "hour4": _text(row["conductor_handover"]),
+        "hour5": _text(row["driver_depot_departure"]),
+        "departure_vzd": _text(row["conductor_depot_departure"]),
+        "departure_zgd": _text(row["driver_depot_arrival"]),
+        "end_kb": _text(row["conductor_depot_arrival"]),
+        "fuel_address": row["fuel_address"],
+        "fuel_number": row["fuel_number"],
+        "fuel_actual": row["fuel_actual"],
+        "notes": row["notes"],
+        "is_deleted": bool(row["is_deleted"]),
+        "status": "deleted" if row["is_deleted"] else "active",
+    }
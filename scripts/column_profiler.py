@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Single-Pass Column Profiler
+Профиль столбцов таблицы за один проход вместо запросов по каждому полю
+
+Строки читаются пакетами, для каждого столбца одновременно считаются:
+- количество NULL и непустых значений
+- приблизительное число уникальных значений (HyperLogLog)
+- самые частые значения (Space-Saving)
+- минимум и максимум
+
+Точность задается параметрами:
+- precision: 2^precision регистров HyperLogLog на столбец, стандартная
+  ошибка числа уникальных 1.04 / sqrt(2^precision) (14 -> ~0.8%)
+- top_k_capacity: счетчиков Space-Saving на столбец; завышение частоты
+  каждого значения не больше N / top_k_capacity, пока уникальных значений
+  не больше top_k_capacity, частоты точные
+
+Значения сравниваются как значения Python, без правил сортировки MySQL
+(регистр и пробелы в конце строк различаются).
+"""
+
+import hashlib
+import heapq
+import math
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+DEFAULT_PRECISION = 14
+DEFAULT_TOP_K_CAPACITY = 1000
+DEFAULT_TOP_K = 50
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def _hash64(value: Any) -> int:
+    data = value if isinstance(value, bytes) else str(value).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """Оценка числа уникальных значений в 2^precision байтах"""
+
+    def __init__(self, precision: int = DEFAULT_PRECISION) -> None:
+        if not 4 <= precision <= 18:
+            raise ValueError("precision должен быть от 4 до 18")
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size)
+        self._rest_bits = 64 - precision
+        self._rest_mask = (1 << self._rest_bits) - 1
+
+    def add(self, value: Any) -> None:
+        x = _hash64(value)
+        index = x >> self._rest_bits
+        rank = self._rest_bits - (x & self._rest_mask).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        """Оценка с поправкой linear counting для малых значений"""
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0**-r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(self.size)
+
+
+class SpaceSaving:
+    """Самые частые значения потока, не больше capacity счетчиков"""
+
+    def __init__(self, capacity: int = DEFAULT_TOP_K_CAPACITY) -> None:
+        self.capacity = capacity
+        self.counts: dict[Any, int] = {}
+        self.errors: dict[Any, int] = {}
+        self.total = 0
+
+    def update(self, counts: dict[Any, int]) -> None:
+        """Учет пакета частот {значение: количество}
+
+        Пакет обрабатывается как подряд идущие повторы значений: известные
+        значения увеличиваются, новые занимают свободные счетчики, затем
+        вытесняют минимальный, наследуя его частоту как погрешность.
+        """
+        new_values = []
+        for value, count in counts.items():
+            self.total += count
+            if value in self.counts:
+                self.counts[value] += count
+            elif len(self.counts) < self.capacity:
+                self.counts[value] = count
+                self.errors[value] = 0
+            else:
+                new_values.append((value, count))
+        if not new_values:
+            return
+
+        heap = [
+            (count, i, value) for i, (value, count) in enumerate(self.counts.items())
+        ]
+        heapq.heapify(heap)
+        order = len(heap)
+        for value, count in new_values:
+            min_count, _, evicted = heap[0]
+            del self.counts[evicted]
+            del self.errors[evicted]
+            self.counts[value] = min_count + count
+            self.errors[value] = min_count
+            order += 1
+            heapq.heapreplace(heap, (min_count + count, order, value))
+
+    def max_error(self) -> int:
+        """Наибольшее возможное завышение частоты среди счетчиков"""
+        if len(self.counts) < self.capacity:
+            return max(self.errors.values(), default=0)
+        return min(self.counts.values())
+
+    def top(self, k: int = DEFAULT_TOP_K) -> list[dict[str, Any]]:
+        """k самых частых: частота сверху и ее возможное завышение"""
+        items = sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))
+        return [
+            {"value": value, "count": count, "error": self.errors[value]}
+            for value, count in items[:k]
+        ]
+
+
+class ColumnProfile:
+    """Статистика одного столбца"""
+
+    def __init__(
+        self,
+        precision: int = DEFAULT_PRECISION,
+        top_k_capacity: int = DEFAULT_TOP_K_CAPACITY,
+    ) -> None:
+        self.total_count = 0
+        self.null_count = 0
+        self.min_value: Any = None
+        self.max_value: Any = None
+        self.distinct = HyperLogLog(precision)
+        self.frequent = SpaceSaving(top_k_capacity)
+
+    def update(self, values: Sequence[Any]) -> None:
+        self.total_count += len(values)
+        counts = Counter(value for value in values if value is not None)
+        self.null_count += len(values) - sum(counts.values())
+        if not counts:
+            return
+
+        for value in counts:
+            self.distinct.add(value)
+        low = min(counts)
+        high = max(counts)
+        if self.min_value is None or low < self.min_value:
+            self.min_value = low
+        if self.max_value is None or high > self.max_value:
+            self.max_value = high
+
+        # Как в запросе частот: пустые строки не учитываются
+        counts.pop("", None)
+        self.frequent.update(counts)
+
+    def result(self, top_k: int = DEFAULT_TOP_K) -> dict[str, Any]:
+        """Результат в формате прежних запросов GROUP BY и COUNT DISTINCT"""
+        return {
+            "unique_values": self.frequent.top(top_k),
+            "statistics": {
+                "unique_count": self.distinct.count(),
+                "non_null_count": self.total_count - self.null_count,
+                "total_count": self.total_count,
+                "null_count": self.null_count,
+                "min_value": self.min_value,
+                "max_value": self.max_value,
+            },
+            "approximation": {
+                "unique_count_relative_error": round(self.distinct.relative_error, 4),
+                "top_values_max_error": self.frequent.max_error(),
+            },
+        }
+
+
+class ColumnProfiler:
+    """Профиль нескольких столбцов, строки подаются пакетами кортежей"""
+
+    def __init__(
+        self,
+        columns: Iterable[str],
+        precision: int = DEFAULT_PRECISION,
+        top_k_capacity: int = DEFAULT_TOP_K_CAPACITY,
+    ) -> None:
+        self.columns = list(columns)
+        self.profiles = [ColumnProfile(precision, top_k_capacity) for _ in self.columns]
+        self.rows = 0
+
+    def update(self, rows: Sequence[Sequence[Any]]) -> None:
+        """Учет пакета строк (последовательностей в порядке columns)"""
+        if not rows:
+            return
+        self.rows += len(rows)
+        for profile, values in zip(self.profiles, zip(*rows)):  # noqa: B905
+            profile.update(values)
+
+    def results(self, top_k: int = DEFAULT_TOP_K) -> dict[str, dict[str, Any]]:
+        return {
+            column: profile.result(top_k)
+            for column, profile in zip(self.columns, self.profiles)  # noqa: B905
+        }
+
+
+def profile_cursor(
+    cursor: Any,
+    columns: Iterable[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    **options: Any,
+) -> ColumnProfiler:
+    """Профиль результата выполненного запроса, читаемого через fetchmany"""
+    profiler = ColumnProfiler(columns, **options)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        profiler.update(rows)
+    return profiler
@@ -4,19 +4,35 @@ Enhanced Database Analysis Tool
 Анализ структуры базы данных диспетчера для улучшения веб-интерфейса
 """
 
-import json
+import argparse
 import os
+import time
 from datetime import datetime
 from typing import Any
 
 import mysql.connector
+from jsonl_writer import JsonlWriter, output_path, write_sections
 from mysql.connector import Error
+from parallel_tables import DEFAULT_MAX_WORKERS, TableWorkerPool
+from table_sampler import (
+    DEFAULT_CONFIDENCE,
+    SAMPLE_METHODS,
+    Z_SCORES,
+    field_statistics,
+    sample_table,
+)
 
 
 class DatabaseAnalyzer:
     """Класс для анализа структуры базы данных диспетчера"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        sample_fraction: float | None = None,
+        sample_method: str = "blocks",
+        confidence: float = DEFAULT_CONFIDENCE,
+    ):
         """Инициализация с настройками подключения"""
         self.config = {
             "host": "91.222.248.216",
@@ -30,6 +46,13 @@ class DatabaseAnalyzer:
         }
         self.connection = None
         self.cursor = None
+        # Ограничение параллельных соединений для анализа по таблицам и полям
+        self.max_workers = max_workers
+        self.timings = {}
+        # Выборочный режим: значения полей по доле строк (см. table_sampler)
+        self.sample_fraction = sample_fraction
+        self.sample_method = sample_method
+        self.confidence = confidence
 
     def connect(self) -> bool:
         """Подключение к базе данных"""
@@ -50,15 +73,16 @@ class DatabaseAnalyzer:
             self.connection.close()
         print("📝 Соединение с базой данных закрыто")
 
-    def get_table_structure(self, table_name: str) -> dict[str, Any]:
+    def get_table_structure(self, table_name: str, cursor=None) -> dict[str, Any]:
         """Получение структуры таблицы"""
+        cursor = cursor or self.cursor
         try:
             # Получение структуры таблицы
-            self.cursor.execute(f"DESCRIBE {table_name}")
-            structure = self.cursor.fetchall()
+            cursor.execute(f"DESCRIBE {table_name}")
+            structure = cursor.fetchall()
 
             # Получение подробной информации о столбцах
-            self.cursor.execute(f"""
+            cursor.execute(f"""
                 SELECT
                     COLUMN_NAME,
                     DATA_TYPE,
@@ -71,15 +95,15 @@ class DatabaseAnalyzer:
                 AND TABLE_NAME = '{table_name}'
                 ORDER BY ORDINAL_POSITION
             """)
-            detailed_structure = self.cursor.fetchall()
+            detailed_structure = cursor.fetchall()
 
             # Получение индексов
-            self.cursor.execute(f"SHOW INDEX FROM {table_name}")
-            indexes = self.cursor.fetchall()
+            cursor.execute(f"SHOW INDEX FROM {table_name}")
+            indexes = cursor.fetchall()
 
             # Подсчет записей
-            self.cursor.execute(f"SELECT COUNT(*) as count FROM {table_name}")
-            count_result = self.cursor.fetchone()
+            cursor.execute(f"SELECT COUNT(*) as count FROM {table_name}")
+            count_result = cursor.fetchone()
             row_count = count_result["count"] if count_result else 0
 
             return {
@@ -94,9 +118,10 @@ class DatabaseAnalyzer:
             return {}
 
     def get_field_values(
-        self, table_name: str, field_name: str, limit: int = 20
+        self, table_name: str, field_name: str, limit: int = 20, cursor=None
     ) -> list[dict[str, Any]]:
         """Получение уникальных значений поля"""
+        cursor = cursor or self.cursor
         try:
             # Для поля с символом №, используем обратные кавычки
             field_query = f"`{field_name}`" if "№" in field_name else field_name
@@ -111,17 +136,18 @@ class DatabaseAnalyzer:
                 LIMIT {limit}
             """
 
-            self.cursor.execute(query)
-            return self.cursor.fetchall()
+            cursor.execute(query)
+            return cursor.fetchall()
 
         except Error as e:
             print(f"❌ Ошибка получения значений поля {field_name}: {e}")
             return []
 
     def get_sample_data(
-        self, table_name: str, date_filter: str = None, limit: int = 10
+        self, table_name: str, date_filter: str = None, limit: int = 10, cursor=None
     ) -> list[dict[str, Any]]:
         """Получение примеров данных"""
+        cursor = cursor or self.cursor
         try:
             if date_filter:
                 query = f"""
@@ -137,8 +163,8 @@ class DatabaseAnalyzer:
                     LIMIT {limit}
                 """
 
-            self.cursor.execute(query)
-            return self.cursor.fetchall()
+            cursor.execute(query)
+            return cursor.fetchall()
 
         except Error as e:
             print(f"❌ Ошибка получения примеров данных: {e}")
@@ -167,11 +193,25 @@ class DatabaseAnalyzer:
             "putlist№",
         ]
 
-        # Анализ значений полей
-        field_analysis = {}
-        for field in key_fields:
-            print(f"   Анализ поля: {field}")
-            field_analysis[field] = self.get_field_values("zanaradka", field)
+        # Анализ значений полей: по выборке или параллельно по полям
+        sampled_statistics = None
+        if self.sample_fraction:
+            field_analysis, sampled_statistics = self.sample_field_values(
+                "zanaradka", key_fields
+            )
+        else:
+            print(f"   Анализ {len(key_fields)} полей ({self.max_workers} потоков)...")
+            with TableWorkerPool(self.config, self.max_workers) as pool:
+                field_analysis, timings = pool.run(
+                    {
+                        field: lambda cursor, field=field: self.get_field_values(
+                            "zanaradka", field, cursor=cursor
+                        )
+                        for field in key_fields
+                    }
+                )
+            self.report_timings(timings)
+            self.timings["zanaradka_fields"] = timings
 
         # Примеры данных
         sample_data = self.get_sample_data("zanaradka", limit=5)
@@ -204,28 +244,78 @@ class DatabaseAnalyzer:
             "sample_data": sample_data,
             "date_specific_data": date_specific_data,
             "date_statistics": date_statistics,
+            "sampled_field_statistics": sampled_statistics,
+        }
+
+    def sample_field_values(
+        self, table_name: str, fields: list[str], limit: int = 20
+    ) -> tuple[dict[str, Any], dict[str, Any]]:
+        """Частые значения и статистика полей по выборке строк"""
+        print(
+            f"   Выборка {self.sample_fraction:.1%} строк {table_name} "
+            f"({self.sample_method})..."
+        )
+        started = time.perf_counter()
+        try:
+            sample = sample_table(
+                self.cursor,
+                table_name,
+                fields,
+                fraction=self.sample_fraction,
+                method=self.sample_method,
+            )
+        except Error as e:
+            print(f"❌ Ошибка выборки из таблицы {table_name}: {e}")
+            return {}, {}
+
+        info = sample.info()
+        info["seconds"] = round(time.perf_counter() - started, 3)
+        info["confidence"] = self.confidence
+        self.timings[f"sample_{table_name}"] = info
+        print(f"   Получено {info['rows']} строк за {info['seconds']} с")
+
+        statistics = field_statistics(sample, self.confidence, top_k=limit)
+        values = {
+            field: stats.pop("unique_values") for field, stats in statistics.items()
         }
+        return values, statistics
 
     def analyze_related_tables(self) -> dict[str, Any]:
         """Анализ связанных таблиц"""
         print("📊 Анализ связанных таблиц...")
 
-        related_tables = ["sprmarshrut", "sprpersonal", "sprpe"]
-        analysis = {}
+        related_tables = ["sprmarshrut", "sprpersonal", "sprpe", "tabel"]
 
-        for table in related_tables:
-            print(f"   Анализ таблицы: {table}")
-            try:
-                structure = self.get_table_structure(table)
-                sample_data = self.get_sample_data(table, limit=5)
+        def analyze_table(table: str):
+            def task(cursor):
+                return {
+                    "structure": self.get_table_structure(table, cursor=cursor),
+                    "sample_data": self.get_sample_data(table, limit=5, cursor=cursor),
+                }
 
-                analysis[table] = {"structure": structure, "sample_data": sample_data}
-            except Error as e:
-                print(f"❌ Ошибка анализа таблицы {table}: {e}")
-                analysis[table] = {"error": str(e)}
+            return task
 
+        print(f"   Анализ {len(related_tables)} таблиц ({self.max_workers} потоков)...")
+        with TableWorkerPool(self.config, self.max_workers) as pool:
+            analysis, timings = pool.run(
+                {table: analyze_table(table) for table in related_tables}
+            )
+
+        self.report_timings(timings)
+        self.timings["related_tables"] = timings
         return analysis
 
+    def report_timings(self, timings: dict[str, dict[str, Any]]):
+        """Вывод времени и скорости чтения по таблицам/полям"""
+        for name, timing in timings.items():
+            if "error" in timing:
+                print(f"   ❌ {name}: {timing['error']}")
+            else:
+                print(
+                    f"   ⏱️ {name}: {timing['seconds']} с, {timing['rows']} строк "
+                    f"({timing['rows_per_second']} строк/с)"
+                )
+
     def create_field_mapping(self) -> dict[str, Any]:
         """Создание карты полей между БД и веб-интерфейсом"""
         print("📊 Создание карты полей...")
@@ -326,7 +416,10 @@ class DatabaseAnalyzer:
         return recommendations
 
     def save_analysis_results(
-        self, analysis_data: dict[str, Any], output_dir: str = "python_db_analysis"
+        self,
+        analysis_data: dict[str, Any],
+        output_dir: str = "python_db_analysis",
+        compression: str | None = None,
     ):
         """Сохранение результатов анализа"""
         print(f"💾 Сохранение результатов в папку: {output_dir}")
@@ -335,11 +428,11 @@ class DatabaseAnalyzer:
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
-        # Сохранение в JSON для программной обработки
-        with open(
-            os.path.join(output_dir, "full_analysis.json"), "w", encoding="utf-8"
-        ) as f:
-            json.dump(analysis_data, f, ensure_ascii=False, indent=2, default=str)
+        # Сохранение в JSONL для программной обработки, по разделу на запись
+        with JsonlWriter(
+            output_path(output_dir, "full_analysis", compression), compression
+        ) as writer:
+            write_sections(writer, analysis_data)
 
         # Сохранение читаемого отчета
         with open(
@@ -427,6 +520,7 @@ class DatabaseAnalyzer:
                 "recommendations": self.generate_improvement_recommendations(
                     zanaradka_analysis
                 ),
+                "timings": self.timings,
             }
 
             # Сохранение результатов
@@ -467,8 +561,24 @@ def main():
         print("Установите его командой: pip install mysql-connector-python")
         return False
 
+    parser = argparse.ArgumentParser(description="Анализ базы данных диспетчера")
+    parser.add_argument(
+        "--sample",
+        type=float,
+        help="Доля строк для выборочного анализа полей (например 0.01)",
+    )
+    parser.add_argument("--sample-method", choices=SAMPLE_METHODS, default="blocks")
+    parser.add_argument(
+        "--confidence", type=float, choices=sorted(Z_SCORES), default=DEFAULT_CONFIDENCE
+    )
+    args = parser.parse_args()
+
     # Запуск анализа
-    analyzer = DatabaseAnalyzer()
+    analyzer = DatabaseAnalyzer(
+        sample_fraction=args.sample,
+        sample_method=args.sample_method,
+        confidence=args.confidence,
+    )
     success = analyzer.run_full_analysis()
 
     if success:
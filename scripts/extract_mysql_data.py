@@ -13,7 +13,10 @@ from pathlib import Path
 from typing import Any
 
 import mysql.connector
+from assignment_rows import ASSIGNMENT_SELECT, convert_assignment
+from jsonl_writer import EXTENSIONS, JsonlWriter, output_path, write_sections
 from mysql.connector import Error
+from parallel_tables import DEFAULT_MAX_WORKERS, TableWorkerPool
 
 # Configure logging
 logging.basicConfig(
@@ -33,13 +36,31 @@ DB_CONFIG = {
     "charset": "utf8mb4",
 }
 
+# Incremental extraction: rows per fetchmany batch and per chunk file
+DEFAULT_BATCH_SIZE = 5000
+CHECKPOINT_FILE = "assignments_checkpoint.json"
+CHUNKS_DIR = "assignment_chunks"
+
+# Reference tables: result key -> (table, row limit)
+REFERENCE_TABLES = {
+    "routes": ("sprmarshrut", 100),
+    "personnel": ("sprpersonal", 1000),
+    "vehicles": ("sprpe", 500),
+    "timesheet": ("tabel", 1000),
+}
+
 
 class MySQLDataExtractor:
-    def __init__(self):
+    def __init__(self, compression: str | None = None):
         self.connection = None
         self.cursor = None
         self.output_dir = Path("extracted_mysql_data")
         self.output_dir.mkdir(exist_ok=True)
+        self.checkpoint_file = self.output_dir / CHECKPOINT_FILE
+        self.chunks_dir = self.output_dir / CHUNKS_DIR
+        self.reference_timings = {}
+        # Compression of JSONL output: None, "gzip" or "zstd"
+        self.compression = compression
 
     def connect_to_database(self) -> bool:
         """Connect to MySQL database"""
@@ -140,84 +161,7 @@ class MySQLDataExtractor:
         try:
             logger.info("🔄 Extracting assignments data...")
 
-            # Build query with all fields matching enhanced Assignment model
-            query = """
-                SELECT
-                    -- Basic identification
-                    marshrut as route_number,
-                    vipusk as route_release,
-                    smena as shift,
-                    data_day as assignment_date,
-                    MONTH(data_day) as month,
-
-                    -- Personnel information
-                    tabvoditel as driver_tab_number,
-                    fiovoditel as driver_name,
-                    tabconduktor as conductor_tab_number,
-                    fioconduktor as conductor_name,
-
-                    -- Vehicle information
-                    pe№ as vehicle_number,
-
-                    -- Time information
-                    tvih as departure_time,
-                    tzah as arrival_time,
-
-                    -- Documentation
-                    putlist№ as waybill_number,
-
-                    -- Additional fields that might exist in the table
-                    -- These field names are guessed based on MS Access interface
-                    -- You may need to adjust these based on actual table structure
-
-                    -- Try to map MS Access fields to MySQL fields
-                    -- This mapping might need adjustment based on actual table structure
-                    brigade as brigade,
-                    application as application_number,
-                    address as address,
-                    type as route_type,
-                    internal_num as internal_number,
-                    fuel_route as fuel_route,
-                    fuel_address as fuel_address,
-                    driver_waybill as driver_waybill,
-
-                    -- Working hours (if they exist as separate fields)
-                    hour1 as hour1,
-                    hour2 as hour2,
-                    hour3 as hour3,
-                    hour4 as hour4,
-                    hour5 as hour5,
-
-                    -- Departure/arrival times
-                    departure_vzd as departure_vzd,
-                    departure_zgd as departure_zgd,
-                    end_kb as end_kb,
-
-                    -- Breaks
-                    break_1 as break_1,
-                    break_2 as break_2,
-
-                    -- Profitability
-                    profit_start as profit_start,
-                    profit_end as profit_end,
-
-                    -- Vehicle details
-                    vehicle_model as vehicle_model,
-                    vehicle_bedt as vehicle_bedt,
-                    coal_info as coal_info,
-                    vehicle_type_pc as vehicle_type_pc,
-                    state_number_pc as state_number_pc,
-
-                    -- Route endpoint
-                    route_endpoint as route_endpoint,
-
-                    -- Status and notes
-                    status as status,
-                    notes as notes
-
-                FROM zanaradka
-                WHERE 1=1
-            """
+            query = ASSIGNMENT_SELECT + " WHERE 1=1"
 
             # Add date filters if provided
             params = []
@@ -238,71 +182,11 @@ class MySQLDataExtractor:
             self.cursor.execute(query, params)
 
             # Fetch all results
-            assignments = []
             rows = self.cursor.fetchall()
 
             logger.info(f"Processing {len(rows)} assignment records...")
 
-            for row in rows:
-                # Convert MySQL result to our enhanced format
-                assignment = {
-                    "route_number": row.get("route_number"),
-                    "route_release": row.get("route_release"),
-                    "shift": str(row.get("shift")) if row.get("shift") else None,
-                    "assignment_date": row.get("assignment_date").isoformat()
-                    if row.get("assignment_date")
-                    else None,
-                    "month": row.get("month"),
-                    "brigade": row.get("brigade"),
-                    "application_number": row.get("application_number"),
-                    "address": row.get("address"),
-                    "route_type": row.get("route_type"),
-                    "internal_number": row.get("internal_number"),
-                    "fuel_route": row.get("fuel_route"),
-                    "fuel_address": row.get("fuel_address"),
-                    "driver_waybill": row.get("driver_waybill"),
-                    "driver_tab_number": row.get("driver_tab_number"),
-                    "driver_name": row.get("driver_name"),
-                    "conductor_tab_number": row.get("conductor_tab_number"),
-                    "conductor_name": row.get("conductor_name"),
-                    "vehicle_number": row.get("vehicle_number"),
-                    "vehicle_model": row.get("vehicle_model"),
-                    "vehicle_bedt": row.get("vehicle_bedt"),
-                    "coal_info": row.get("coal_info"),
-                    "vehicle_type_pc": row.get("vehicle_type_pc"),
-                    "state_number_pc": row.get("state_number_pc"),
-                    "departure_time": str(row.get("departure_time"))
-                    if row.get("departure_time")
-                    else None,
-                    "arrival_time": str(row.get("arrival_time"))
-                    if row.get("arrival_time")
-                    else None,
-                    "hour1": str(row.get("hour1")) if row.get("hour1") else None,
-                    "hour2": str(row.get("hour2")) if row.get("hour2") else None,
-                    "hour3": str(row.get("hour3")) if row.get("hour3") else None,
-                    "hour4": str(row.get("hour4")) if row.get("hour4") else None,
-                    "hour5": str(row.get("hour5")) if row.get("hour5") else None,
-                    "waybill_number": row.get("waybill_number"),
-                    "departure_vzd": str(row.get("departure_vzd"))
-                    if row.get("departure_vzd")
-                    else None,
-                    "departure_zgd": str(row.get("departure_zgd"))
-                    if row.get("departure_zgd")
-                    else None,
-                    "end_kb": str(row.get("end_kb")) if row.get("end_kb") else None,
-                    "break_1": str(row.get("break_1")) if row.get("break_1") else None,
-                    "break_2": str(row.get("break_2")) if row.get("break_2") else None,
-                    "profit_start": str(row.get("profit_start"))
-                    if row.get("profit_start")
-                    else None,
-                    "profit_end": str(row.get("profit_end"))
-                    if row.get("profit_end")
-                    else None,
-                    "route_endpoint": row.get("route_endpoint"),
-                    "status": row.get("status", "active"),
-                    "notes": row.get("notes"),
-                }
-                assignments.append(assignment)
+            assignments = [convert_assignment(row) for row in rows]
 
             logger.info(f"✅ Successfully extracted {len(assignments)} assignments")
 
@@ -321,60 +205,162 @@ class MySQLDataExtractor:
             logger.error(f"❌ Failed to extract assignments data: {e}")
             return {"error": str(e)}
 
-    def extract_reference_data(self) -> dict[str, Any]:
-        """Extract reference data from related tables"""
+    def load_checkpoint(self) -> dict[str, Any]:
+        """Load the high-water mark of the incremental extraction"""
+        if not self.checkpoint_file.exists():
+            return {"last_key": None, "last_date": None, "total_rows": 0, "chunks": []}
+        with open(self.checkpoint_file, encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_checkpoint(self, checkpoint: dict[str, Any]):
+        """Persist the high-water mark, replacing the file atomically"""
+        checkpoint["updated_at"] = datetime.now().isoformat()
+        tmp_file = self.checkpoint_file.with_suffix(".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.checkpoint_file)
+
+    def write_assignment_chunk(self, assignments: list[dict[str, Any]]) -> str:
+        """Write one batch of assignments to its own JSONL chunk file"""
+        self.chunks_dir.mkdir(exist_ok=True)
+        first_key = assignments[0]["source_key"]
+        last_key = assignments[-1]["source_key"]
+        chunk_file = output_path(
+            self.chunks_dir,
+            f"assignments_{first_key:010d}_{last_key:010d}",
+            self.compression,
+        )
+
+        # The index sidecar is written last: a chunk without it is incomplete,
+        # and the next run rewrites the same file from the same key
+        with JsonlWriter(chunk_file, self.compression) as writer:
+            writer.write_many("assignments", assignments, "assignment_date")
+        return Path(chunk_file).name
+
+    def extract_assignments_incremental(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        start_date: str | None = None,
+    ) -> dict[str, Any]:
+        """Extract assignments added since the last run into chunk files
+
+        Rows are read in `key` order from the persisted high-water mark and
+        written in batches of `batch_size`; the checkpoint is saved after every
+        chunk, so an interrupted run resumes where it stopped. `start_date`
+        only bounds the first run. Rows changed in place below the mark are
+        not picked up again; delete the checkpoint file for a full re-run.
+        """
+        checkpoint = self.load_checkpoint()
+        new_rows = 0
+        new_chunks = []
         try:
-            logger.info("🔄 Extracting reference data...")
-
-            reference_data = {}
-
-            # Extract routes (sprmarshrut)
-            try:
-                self.cursor.execute("SELECT * FROM sprmarshrut LIMIT 100")
-                routes = self.cursor.fetchall()
-                reference_data["routes"] = routes
-                logger.info(f"✅ Extracted {len(routes)} routes")
-            except Error as e:
-                logger.warning(f"⚠️ Failed to extract routes: {e}")
-
-            # Extract personnel (sprpersonal)
-            try:
-                self.cursor.execute("SELECT * FROM sprpersonal LIMIT 1000")
-                personnel = self.cursor.fetchall()
-                reference_data["personnel"] = personnel
-                logger.info(f"✅ Extracted {len(personnel)} personnel records")
-            except Error as e:
-                logger.warning(f"⚠️ Failed to extract personnel: {e}")
-
-            # Extract vehicles (sprpe)
-            try:
-                self.cursor.execute("SELECT * FROM sprpe LIMIT 500")
-                vehicles = self.cursor.fetchall()
-                reference_data["vehicles"] = vehicles
-                logger.info(f"✅ Extracted {len(vehicles)} vehicles")
-            except Error as e:
-                logger.warning(f"⚠️ Failed to extract vehicles: {e}")
-
-            return reference_data
+            logger.info(
+                f"🔄 Extracting assignments after key {checkpoint['last_key']} "
+                f"(last date {checkpoint['last_date']})..."
+            )
+
+            query = ASSIGNMENT_SELECT + " WHERE `key` > %s"
+            params = [checkpoint["last_key"] or 0]
+            if checkpoint["last_key"] is None and start_date:
+                query += " AND data_day >= %s"
+                params.append(start_date)
+            query += " ORDER BY `key`"
+
+            # Unbuffered cursor: rows stream from the server batch by batch
+            self.cursor.execute(query, params)
+            while True:
+                rows = self.cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+
+                assignments = [convert_assignment(row) for row in rows]
+                chunk_name = self.write_assignment_chunk(assignments)
+
+                dates = [
+                    a["assignment_date"] for a in assignments if a["assignment_date"]
+                ]
+                if dates:
+                    checkpoint["last_date"] = max(checkpoint["last_date"] or "", *dates)
+                checkpoint["last_key"] = assignments[-1]["source_key"]
+                checkpoint["total_rows"] += len(assignments)
+                checkpoint["chunks"].append(chunk_name)
+                self.save_checkpoint(checkpoint)
+
+                new_rows += len(assignments)
+                new_chunks.append(chunk_name)
+                logger.info(
+                    f"📦 {chunk_name}: {len(assignments)} rows "
+                    f"(up to key {checkpoint['last_key']})"
+                )
+
+            logger.info(
+                f"✅ Extracted {new_rows} new assignments in {len(new_chunks)} chunks"
+            )
+            return {
+                "new_rows": new_rows,
+                "chunks": new_chunks,
+                "checkpoint": checkpoint,
+                "extraction_timestamp": datetime.now().isoformat(),
+            }
 
         except Error as e:
-            logger.error(f"❌ Failed to extract reference data: {e}")
-            return {"error": str(e)}
+            logger.error(
+                f"❌ Incremental extraction stopped at key "
+                f"{checkpoint['last_key']}: {e}"
+            )
+            return {"error": str(e), "new_rows": new_rows, "chunks": new_chunks}
+
+    def extract_reference_data(
+        self, max_workers: int = DEFAULT_MAX_WORKERS
+    ) -> dict[str, Any]:
+        """Extract reference data from related tables in parallel"""
+        logger.info(
+            f"🔄 Extracting reference data ({len(REFERENCE_TABLES)} tables, "
+            f"{max_workers} workers)..."
+        )
+
+        def fetch_table(table: str, limit: int):
+            def task(cursor):
+                cursor.execute(f"SELECT * FROM {table} LIMIT {limit}")
+                return cursor.fetchall()
+
+            return task
+
+        tasks = {
+            name: fetch_table(table, limit)
+            for name, (table, limit) in REFERENCE_TABLES.items()
+        }
+        with TableWorkerPool(DB_CONFIG, max_workers) as pool:
+            results, self.reference_timings = pool.run(tasks)
+
+        reference_data = {}
+        for name, rows in results.items():
+            table = REFERENCE_TABLES[name][0]
+            timing = self.reference_timings[name]
+            if "error" in timing:
+                logger.warning(f"⚠️ Failed to extract {table}: {timing['error']}")
+                continue
+            reference_data[name] = rows
+            logger.info(
+                f"✅ Extracted {timing['rows']} rows from {table} in "
+                f"{timing['seconds']}s ({timing['rows_per_second']} rows/s)"
+            )
+        return reference_data
 
     def save_extraction_results(self, data: dict[str, Any], filename: str = None):
-        """Save extraction results to JSON file"""
+        """Save extraction results as JSONL with a per-table/date index"""
         try:
             if filename is None:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"mysql_extraction_{timestamp}.json"
+                filename = f"mysql_extraction_{timestamp}"
 
-            output_file = self.output_dir / filename
+            output_file = output_path(self.output_dir, filename, self.compression)
 
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+            with JsonlWriter(output_file, self.compression) as writer:
+                write_sections(writer, data, {"assignments": "assignment_date"})
 
             logger.info(f"✅ Extraction results saved to: {output_file}")
-            return str(output_file)
+            return output_file
 
         except Exception as e:
             logger.error(f"❌ Failed to save extraction results: {e}")
@@ -471,7 +457,9 @@ class MySQLDataExtractor:
         except Error as e:
             logger.error(f"Error closing database connection: {e}")
 
-    def run_full_extraction(self, limit: int | None = 1000):
+    def run_full_extraction(
+        self, limit: int | None = 1000, max_workers: int = DEFAULT_MAX_WORKERS
+    ):
         """Run complete data extraction process"""
         try:
             logger.info("🚀 Starting full MySQL data extraction...")
@@ -493,7 +481,7 @@ class MySQLDataExtractor:
             assignments_data = self.extract_assignments_data(limit=limit)
 
             # Extract reference data
-            reference_data = self.extract_reference_data()
+            reference_data = self.extract_reference_data(max_workers=max_workers)
 
             # Combine all data
             extraction_results = {
@@ -503,7 +491,11 @@ class MySQLDataExtractor:
                         "host": DB_CONFIG["host"],
                         "database": DB_CONFIG["database"],
                     },
-                    "extraction_parameters": {"limit": limit},
+                    "extraction_parameters": {
+                        "limit": limit,
+                        "max_workers": max_workers,
+                    },
+                    "reference_timings": self.reference_timings,
                 },
                 "connection_test": connection_test,
                 "table_analysis": table_analysis,
@@ -529,6 +521,32 @@ class MySQLDataExtractor:
         finally:
             self.close_connection()
 
+    def run_incremental_extraction(
+        self, batch_size: int = DEFAULT_BATCH_SIZE, start_date: str | None = None
+    ) -> bool:
+        """Run incremental assignments extraction from the saved checkpoint"""
+        try:
+            logger.info("🚀 Starting incremental MySQL data extraction...")
+
+            if not self.connect_to_database():
+                return False
+
+            result = self.extract_assignments_incremental(
+                batch_size=batch_size, start_date=start_date
+            )
+            if "error" in result:
+                return False
+
+            logger.info(f"📁 Chunks saved to: {self.chunks_dir}")
+            logger.info(f"📍 Checkpoint: {self.checkpoint_file}")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Incremental extraction failed: {e}")
+            return False
+        finally:
+            self.close_connection()
+
 
 def main():
     """Main execution function"""
@@ -547,11 +565,42 @@ def main():
     parser.add_argument(
         "--end-date", type=str, help="End date for extraction (YYYY-MM-DD)"
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Extract only rows added since the last run into chunk files",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Rows per fetch batch and chunk file in incremental mode",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help="Parallel connections for reference tables (DB_MAX_WORKERS)",
+    )
+
+    parser.add_argument(
+        "--compress",
+        choices=[c for c in EXTENSIONS if c],
+        help="Compress JSONL output (zstd needs the zstandard package)",
+    )
 
     args = parser.parse_args()
+    extractor.compression = args.compress
 
     # Run extraction
-    success = extractor.run_full_extraction(limit=args.limit)
+    if args.incremental:
+        success = extractor.run_incremental_extraction(
+            batch_size=args.batch_size, start_date=args.start_date
+        )
+    else:
+        success = extractor.run_full_extraction(
+            limit=args.limit, max_workers=args.workers
+        )
 
     if success:
         print("✅ Data extraction completed successfully!")
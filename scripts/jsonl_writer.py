@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Streaming JSONL Writer
+Потоковая запись результатов извлечения и анализа в JSONL
+
+Записи пишутся по одной по мере получения, поэтому память не зависит от
+объема выгрузки. Подряд идущие записи одной таблицы и даты образуют сегмент;
+рядом с файлом сохраняется индекс (<файл>.index.json) со смещением и длиной
+каждого сегмента в байтах, чтобы читатель мог сразу перейти к нужному дню.
+
+Сжатие: None, "gzip" или "zstd" (нужен пакет zstandard). Каждый сегмент
+сжимается отдельным gzip-member/zstd-frame, весь файл при этом остается
+обычным .gz/.zst и читается стандартными средствами.
+"""
+
+import json
+import os
+import zlib
+from collections.abc import Iterable, Iterator
+from types import ModuleType
+from typing import Any
+
+EXTENSIONS = {None: ".jsonl", "gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+INDEX_SUFFIX = ".index.json"
+
+
+def _zstandard() -> ModuleType:
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError(
+            "Для сжатия zstd установите пакет: pip install zstandard"
+        ) from None
+    return zstandard
+
+
+def _compressor(compression: str) -> Any:
+    """Компрессор одного сегмента: compress(bytes) и flush()"""
+    if compression == "gzip":
+        # wbits=31: отдельный gzip-member с заголовком
+        return zlib.compressobj(6, zlib.DEFLATED, 31)
+    if compression == "zstd":
+        return _zstandard().ZstdCompressor().compressobj()
+    raise ValueError(f"Неизвестное сжатие: {compression}")
+
+
+def _decompress(data: bytes, compression: str | None) -> bytes:
+    if compression is None:
+        return data
+    if compression == "gzip":
+        return zlib.decompress(data, 31)
+    return _zstandard().ZstdDecompressor().decompressobj().decompress(data)
+
+
+def output_path(
+    directory: str | os.PathLike[str], name: str, compression: str | None = None
+) -> str:
+    """Путь к файлу JSONL с расширением по типу сжатия"""
+    if compression not in EXTENSIONS:
+        raise ValueError(f"Неизвестное сжатие: {compression}")
+    return os.path.join(directory, name + EXTENSIONS[compression])
+
+
+class JsonlWriter:
+    """Запись JSONL по одной записи с индексом сегментов по таблице и дате"""
+
+    def __init__(self, path: str, compression: str | None = None) -> None:
+        if compression not in EXTENSIONS:
+            raise ValueError(f"Неизвестное сжатие: {compression}")
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX
+        self.compression = compression
+        self.records = 0
+        self.segments: list[dict[str, Any]] = []
+        self._file = open(path, "wb")
+        self._segment: dict[str, Any] | None = None
+        self._compressor: Any = None
+
+    def write(self, table: str, record: Any, date: Any = None) -> None:
+        """Запись одной строки таблицы; date относит ее к дню в индексе"""
+        date = str(date) if date is not None else None
+        segment = self._segment
+        if segment is None or segment["table"] != table or segment["date"] != date:
+            self._close_segment()
+            self._open_segment(table, date)
+
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        data = line.encode("utf-8")
+        if self._compressor is not None:
+            data = self._compressor.compress(data)
+        self._file.write(data)
+        self._segment["records"] += 1
+        self.records += 1
+
+    def write_many(
+        self,
+        table: str,
+        records: Iterable[dict[str, Any]],
+        date_field: str | None = None,
+    ) -> None:
+        """Запись строк таблицы; дата берется из поля date_field"""
+        for record in records:
+            self.write(table, record, record.get(date_field) if date_field else None)
+
+    def _open_segment(self, table: str, date: str | None) -> None:
+        self._segment = {
+            "table": table,
+            "date": date,
+            "offset": self._file.tell(),
+            "records": 0,
+        }
+        if self.compression is not None:
+            self._compressor = _compressor(self.compression)
+
+    def _close_segment(self) -> None:
+        if self._segment is None:
+            return
+        if self._compressor is not None:
+            self._file.write(self._compressor.flush())
+            self._compressor = None
+        self._segment["length"] = self._file.tell() - self._segment["offset"]
+        self.segments.append(self._segment)
+        self._segment = None
+
+    def close(self) -> None:
+        """Завершение файла и запись индекса"""
+        if self._file.closed:
+            return
+        self._close_segment()
+        self._file.close()
+        index = {
+            "file": os.path.basename(self.path),
+            "compression": self.compression,
+            "records": self.records,
+            "segments": self.segments,
+        }
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def write_sections(
+    writer: JsonlWriter,
+    data: dict[str, Any],
+    date_fields: dict[str, str] | None = None,
+) -> None:
+    """Запись словаря результатов: раздел-список построчно, остальные целиком
+
+    Раздел становится таблицей индекса; date_fields задает поле даты строк
+    для разделов, которые нужно индексировать по дням.
+    """
+    date_fields = date_fields or {}
+    for section, value in data.items():
+        if isinstance(value, list):
+            if section in date_fields:
+                writer.write_many(section, value, date_fields[section])
+            else:
+                for record in value:
+                    writer.write(section, record)
+        else:
+            writer.write(section, value)
+
+
+def read_index(path: str) -> dict[str, Any]:
+    """Индекс сегментов файла JSONL"""
+    with open(path + INDEX_SUFFIX, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_records(
+    path: str, table: str | None = None, date: Any = None
+) -> Iterator[Any]:
+    """Чтение записей таблицы и/или дня, читаются только нужные сегменты"""
+    index = read_index(path)
+    date = str(date) if date is not None else None
+    with open(path, "rb") as f:
+        for segment in index["segments"]:
+            if table is not None and segment["table"] != table:
+                continue
+            if date is not None and segment["date"] != date:
+                continue
+            f.seek(segment["offset"])
+            data = _decompress(f.read(segment["length"]), index["compression"])
+            for line in data.decode("utf-8").splitlines():
+                yield json.loads(line)
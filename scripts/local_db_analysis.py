@@ -4,9 +4,10 @@ Local Database Analysis Tool
 Локальный анализ удаленной базы данных диспетчера
 """
 
-import json
+import argparse
 import os
 import sys
+import time
 from datetime import datetime
 from typing import Any
 
@@ -18,11 +19,36 @@ except ImportError:
     print("Установите его командой: pip install mysql-connector-python")
     sys.exit(1)
 
+from column_profiler import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_PRECISION,
+    DEFAULT_TOP_K_CAPACITY,
+    profile_cursor,
+)
+from jsonl_writer import JsonlWriter, output_path, write_sections
+from parallel_tables import DEFAULT_MAX_WORKERS, TableWorkerPool
+from table_sampler import (
+    DEFAULT_CONFIDENCE,
+    SAMPLE_METHODS,
+    Z_SCORES,
+    field_statistics,
+    sample_table,
+)
+
 
 class LocalDatabaseAnalyzer:
     """Класс для локального анализа удаленной базы данных диспетчера"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        profile_precision: int = DEFAULT_PRECISION,
+        profile_top_k_capacity: int = DEFAULT_TOP_K_CAPACITY,
+        profile_chunk_size: int = DEFAULT_CHUNK_SIZE,
+        sample_fraction: float | None = None,
+        sample_method: str = "blocks",
+        confidence: float = DEFAULT_CONFIDENCE,
+    ):
         """Инициализация с настройками подключения к удаленной БД"""
         self.config = {
             "host": "91.222.248.216",
@@ -38,6 +64,18 @@ class LocalDatabaseAnalyzer:
         }
         self.connection = None
         self.cursor = None
+        # Ограничение параллельных соединений для анализа по полям
+        self.max_workers = max_workers
+        self.timings = {}
+        # Точность профиля полей (см. column_profiler)
+        self.profile_precision = profile_precision
+        self.profile_top_k_capacity = profile_top_k_capacity
+        self.profile_chunk_size = profile_chunk_size
+        # Выборочный режим: статистика полей по доле строк (см. table_sampler)
+        self.sample_fraction = sample_fraction
+        self.sample_method = sample_method
+        self.confidence = confidence
+        self.samples = {}
 
     def connect(self) -> bool:
         """Подключение к удаленной базе данных"""
@@ -154,44 +192,38 @@ class LocalDatabaseAnalyzer:
                 "data_day",
             ]
 
-            relationships = {}
-
-            for field in analysis_fields:
-                print(f"   📊 Анализирую поле: {field}")
-
-                # Уникальные значения и их частота
-                try:
-                    field_query = f"`{field}`" if "№" in field else field
-
-                    self.cursor.execute(f"""
-                        SELECT {field_query} as value, COUNT(*) as count
-                        FROM {table_name}
-                        WHERE {field_query} IS NOT NULL
-                        AND {field_query} != ''
-                        GROUP BY {field_query}
-                        ORDER BY count DESC, {field_query} ASC
-                        LIMIT 50
-                    """)
-                    unique_values = self.cursor.fetchall()
-
-                    # Статистика по полю
-                    self.cursor.execute(f"""
-                        SELECT
-                            COUNT(DISTINCT {field_query}) as unique_count,
-                            COUNT({field_query}) as non_null_count,
-                            COUNT(*) as total_count
-                        FROM {table_name}
-                    """)
-                    field_stats = self.cursor.fetchone()
-
-                    relationships[field] = {
-                        "unique_values": unique_values,
-                        "statistics": field_stats,
-                    }
-
-                except Error as e:
-                    print(f"   ⚠️ Ошибка анализа поля {field}: {e}")
-                    relationships[field] = {"error": str(e)}
+            if self.sample_fraction:
+                sample = self.table_sample(table_name).project(analysis_fields)
+                return field_statistics(sample, self.confidence, top_k=50)
+
+            # Один потоковый проход по таблице вместо двух запросов на поле
+            print(f"   📊 Профиль {len(analysis_fields)} полей за один проход...")
+            started = time.perf_counter()
+            columns = ", ".join(f"`{field}`" for field in analysis_fields)
+            cursor = self.connection.cursor(buffered=False)
+            try:
+                cursor.execute(f"SELECT {columns} FROM {table_name}")
+                profiler = profile_cursor(
+                    cursor,
+                    analysis_fields,
+                    chunk_size=self.profile_chunk_size,
+                    precision=self.profile_precision,
+                    top_k_capacity=self.profile_top_k_capacity,
+                )
+            finally:
+                cursor.close()
+            relationships = profiler.results(top_k=50)
+
+            seconds = time.perf_counter() - started
+            self.timings["field_relationships"] = {
+                "seconds": round(seconds, 3),
+                "rows": profiler.rows,
+                "rows_per_second": round(profiler.rows / seconds) if seconds else 0,
+            }
+            print(
+                f"   ⏱️ {profiler.rows} строк за {seconds:.1f} с "
+                f"({self.timings['field_relationships']['rows_per_second']} строк/с)"
+            )
 
             return relationships
 
@@ -199,9 +231,111 @@ class LocalDatabaseAnalyzer:
             print(f"❌ Ошибка анализа связей полей: {e}")
             return {}
 
+    def table_sample(self, table_name: str):
+        """Выборка всех столбцов таблицы, одна на запуск анализа"""
+        if table_name not in self.samples:
+            self.cursor.execute(f"""
+                SELECT COLUMN_NAME
+                FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = '{self.config["database"]}'
+                AND TABLE_NAME = '{table_name}'
+                AND COLUMN_NAME != 'key'
+                ORDER BY ORDINAL_POSITION
+            """)
+            columns = [row["COLUMN_NAME"] for row in self.cursor.fetchall()]
+
+            started = time.perf_counter()
+            sample = sample_table(
+                self.cursor,
+                table_name,
+                columns,
+                fraction=self.sample_fraction,
+                method=self.sample_method,
+            )
+            info = sample.info()
+            info["seconds"] = round(time.perf_counter() - started, 3)
+            info["confidence"] = self.confidence
+            print(
+                f"   🎲 Выборка {table_name} ({info['method']}): {info['rows']} строк "
+                f"из {len(sample.clusters)} кластеров за {info['seconds']} с"
+            )
+            self.samples[table_name] = sample
+            self.timings[f"sample_{table_name}"] = info
+        return self.samples[table_name]
+
+    def report_timings(self, timings: dict[str, dict[str, Any]]):
+        """Вывод времени и скорости чтения по полям"""
+        for name, timing in timings.items():
+            if "error" in timing:
+                print(f"   ⚠️ Ошибка анализа поля {name}: {timing['error']}")
+            else:
+                print(
+                    f"   ⏱️ {name}: {timing['seconds']} с, {timing['rows']} строк "
+                    f"({timing['rows_per_second']} строк/с)"
+                )
+
+    def has_daily_stats(self) -> bool:
+        """Проверка наличия сводных таблиц daily_assignment_stats"""
+        self.cursor.execute("SHOW TABLES LIKE 'daily_route_shift_stats'")
+        return self.cursor.fetchone() is not None
+
+    def analyze_data_patterns_from_summary(self) -> dict[str, Any]:
+        """Анализ паттернов zanaradka по сводным таблицам (без сканирования)"""
+        patterns = {}
+
+        print("   📅 Анализ данных по датам (сводка)...")
+        self.cursor.execute("""
+            SELECT
+                stat_date as data_day,
+                total_assignments as assignments_count,
+                total_routes as routes_count,
+                total_shifts as shifts_count,
+                total_drivers as drivers_count
+            FROM daily_assignment_stats
+            WHERE stat_date >= '2025-07-01'
+            ORDER BY stat_date DESC
+            LIMIT 15
+        """)
+        patterns["by_date"] = self.cursor.fetchall()
+
+        print("   🚌 Анализ данных по маршрутам (сводка)...")
+        self.cursor.execute("""
+            SELECT
+                route as marshrut,
+                SUM(assignments_count) as total_assignments,
+                COUNT(DISTINCT stat_date) as days_active,
+                COUNT(DISTINCT shift) as shifts_used,
+                MAX(drivers_count) as max_daily_drivers
+            FROM daily_route_shift_stats
+            WHERE stat_date >= '2025-07-01'
+            GROUP BY route
+            ORDER BY total_assignments DESC
+            LIMIT 20
+        """)
+        patterns["by_route"] = self.cursor.fetchall()
+
+        print("   ⏰ Анализ данных по сменам (сводка)...")
+        self.cursor.execute("""
+            SELECT
+                shift as smena,
+                SUM(assignments_count) as total_assignments,
+                COUNT(DISTINCT route) as routes_count,
+                SUM(work_seconds) / NULLIF(SUM(work_rows), 0) / 3600 as avg_work_hours
+            FROM daily_route_shift_stats
+            WHERE stat_date >= '2025-07-01'
+            GROUP BY shift
+            ORDER BY shift
+        """)
+        patterns["by_shift"] = self.cursor.fetchall()
+
+        return patterns
+
     def analyze_data_patterns(self, table_name: str) -> dict[str, Any]:
         """Анализ паттернов данных"""
         try:
+            if table_name == "zanaradka" and self.has_daily_stats():
+                return self.analyze_data_patterns_from_summary()
+
             patterns = {}
 
             # Анализ по датам
@@ -289,24 +423,53 @@ class LocalDatabaseAnalyzer:
             """)
             all_fields = self.cursor.fetchall()
 
-            # Проверяем какие поля содержат данные
-            fields_with_data = {}
-            for field_info in all_fields:
-                field_name = field_info["COLUMN_NAME"]
-                field_query = f"`{field_name}`" if "№" in field_name else field_name
-
-                try:
-                    self.cursor.execute(f"""
+            if self.sample_fraction:
+                recent = self.table_sample("zanaradka").filtered(
+                    "data_day", lambda day: day is not None and str(day) >= "2025-07-01"
+                )
+                return {
+                    "sample_data": sample_data,
+                    "all_fields": all_fields,
+                    "fields_with_data": {
+                        field: {
+                            "total": stats["statistics"]["total_count"],
+                            "non_null": stats["statistics"]["non_null_count"],
+                            "non_null_low": stats["statistics"]["non_null_low"],
+                            "non_null_high": stats["statistics"]["non_null_high"],
+                            "unique_vals": stats["statistics"]["unique_count"],
+                        }
+                        for field, stats in field_statistics(
+                            recent, self.confidence, top_k=0
+                        ).items()
+                    },
+                }
+
+            # Проверяем какие поля содержат данные, параллельно по полям
+            def field_stats(field_name: str):
+                def task(cursor):
+                    field_query = f"`{field_name}`" if "№" in field_name else field_name
+                    cursor.execute(f"""
                         SELECT COUNT(*) as total,
                                COUNT({field_query}) as non_null,
                                COUNT(DISTINCT {field_query}) as unique_vals
                         FROM zanaradka
                         WHERE data_day >= '2025-07-01'
                     """)
-                    field_stats = self.cursor.fetchone()
-                    fields_with_data[field_name] = field_stats
-                except Exception:
-                    fields_with_data[field_name] = {"error": "Cannot analyze field"}
+                    return cursor.fetchone()
+
+                return task
+
+            with TableWorkerPool(self.config, self.max_workers) as pool:
+                fields_with_data, timings = pool.run(
+                    {
+                        field_info["COLUMN_NAME"]: field_stats(
+                            field_info["COLUMN_NAME"]
+                        )
+                        for field_info in all_fields
+                    }
+                )
+            self.report_timings(timings)
+            self.timings["ms_access_fields"] = timings
 
             return {
                 "sample_data": sample_data,
@@ -457,7 +620,10 @@ class LocalDatabaseAnalyzer:
         }
 
     def save_analysis_results(
-        self, analysis_data: dict[str, Any], output_dir: str = "local_db_analysis"
+        self,
+        analysis_data: dict[str, Any],
+        output_dir: str = "local_db_analysis",
+        compression: str | None = None,
     ):
         """Сохранение результатов анализа"""
         print(f"💾 Сохранение результатов в папку: {output_dir}")
@@ -467,13 +633,12 @@ class LocalDatabaseAnalyzer:
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-        # JSON для программной обработки
-        with open(
-            os.path.join(output_dir, f"full_analysis_{timestamp}.json"),
-            "w",
-            encoding="utf-8",
-        ) as f:
-            json.dump(analysis_data, f, ensure_ascii=False, indent=2, default=str)
+        # JSONL для программной обработки, по разделу на запись
+        with JsonlWriter(
+            output_path(output_dir, f"full_analysis_{timestamp}", compression),
+            compression,
+        ) as writer:
+            write_sections(writer, analysis_data)
 
         # Читаемый отчет
         with open(
@@ -597,6 +762,7 @@ class LocalDatabaseAnalyzer:
                 "ms_access_analysis": ms_access_analysis,
                 "enhanced_field_mapping": enhanced_field_mapping,
                 "recommendations": recommendations,
+                "timings": self.timings,
             }
 
             # Сохранение результатов
@@ -635,8 +801,24 @@ def main():
     # Проверка зависимостей
     print("🔧 Проверка зависимостей...")
 
+    parser = argparse.ArgumentParser(description="Локальный анализ удаленной БД")
+    parser.add_argument(
+        "--sample",
+        type=float,
+        help="Доля строк для выборочного анализа полей (например 0.01)",
+    )
+    parser.add_argument("--sample-method", choices=SAMPLE_METHODS, default="blocks")
+    parser.add_argument(
+        "--confidence", type=float, choices=sorted(Z_SCORES), default=DEFAULT_CONFIDENCE
+    )
+    args = parser.parse_args()
+
     # Запуск анализа
-    analyzer = LocalDatabaseAnalyzer()
+    analyzer = LocalDatabaseAnalyzer(
+        sample_fraction=args.sample,
+        sample_method=args.sample_method,
+        confidence=args.confidence,
+    )
     success = analyzer.run_full_analysis()
 
     if success:
@@ -645,7 +827,7 @@ def main():
         )
         print("\n💡 Следующие шаги:")
         print("1. Изучите analysis_report_*.txt")
-        print("2. Используйте full_analysis_*.json для программной обработки")
+        print("2. Используйте full_analysis_*.jsonl для программной обработки")
         print("3. Примените рекомендации для улучшения веб-интерфейса")
     else:
         print("\n❌ Анализ не удался. Проверьте подключение к удаленной базе данных.")
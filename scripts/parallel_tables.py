@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Parallel Table Reader
+Параллельное чтение таблиц пулом потоков: по одному соединению на поток,
+число потоков ограничено, чтобы не перегружать MySQL
+"""
+
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import mysql.connector
+from mysql.connector import Error
+
+# Количество одновременных соединений по умолчанию (DB_MAX_WORKERS)
+DEFAULT_MAX_WORKERS = int(os.getenv("DB_MAX_WORKERS", "4"))
+
+
+class CountingCursor:
+    """Курсор, считающий полученные строки"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.rows = 0
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self.rows += 1
+        return row
+
+    def fetchmany(self, size: int = 1):
+        rows = self._cursor.fetchmany(size)
+        self.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self.rows += len(rows)
+        return rows
+
+    def __getattr__(self, name: str):
+        return getattr(self._cursor, name)
+
+
+class TableWorkerPool:
+    """Пул потоков с собственным соединением у каждого потока"""
+
+    def __init__(self, config: dict[str, Any], max_workers: int = DEFAULT_MAX_WORKERS):
+        self.config = config
+        self.max_workers = max(1, max_workers)
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        # Потоки создаются по мере надобности, соединений не больше max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="table-worker"
+        )
+
+    def _cursor(self):
+        """Курсор соединения текущего потока, соединение открывается один раз"""
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            connection = mysql.connector.connect(**self.config)
+            with self._lock:
+                self._connections.append(connection)
+            cursor = self._local.cursor = connection.cursor(dictionary=True)
+        return cursor
+
+    def _run_task(self, task: Callable[[Any], Any]) -> tuple[Any, int, float]:
+        started = time.perf_counter()
+        cursor = CountingCursor(self._cursor())
+        result = task(cursor)
+        return result, cursor.rows, time.perf_counter() - started
+
+    def run(
+        self, tasks: dict[str, Callable[[Any], Any]]
+    ) -> tuple[dict[str, Any], dict[str, dict[str, Any]]]:
+        """Выполнение задач параллельно; задача получает курсор своего потока
+
+        Возвращает результаты по именам задач и время выполнения, число
+        полученных строк и скорость для каждой задачи. Любая ошибка задачи
+        (MySQL или самой задачи) попадает в ее результат и время как
+        {"error": ...} и не останавливает остальные.
+        """
+        results = {}
+        timings = {}
+        futures = {
+            name: self._executor.submit(self._run_task, task)
+            for name, task in tasks.items()
+        }
+        for name, future in futures.items():
+            try:
+                result, rows, seconds = future.result()
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                results[name] = {"error": error}
+                timings[name] = {"error": error}
+                continue
+            results[name] = result
+            timings[name] = {
+                "seconds": round(seconds, 3),
+                "rows": rows,
+                "rows_per_second": round(rows / seconds) if seconds else rows,
+            }
+        return results, timings
+
+    def close(self):
+        """Остановка потоков и закрытие их соединений"""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                connection.close()
+            except Error:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -4,9 +4,10 @@ Remote Database Analysis Tool for Python 3.5.4
 Анализ базы данных диспетчера для Python 3.5.4 (старые системы)
 """
 
-import json
+import argparse
 import os
 import sys
+import time
 from datetime import datetime
 
 try:
@@ -17,11 +18,25 @@ except ImportError:
     print("Установите его командой: pip install mysql-connector-python")
     sys.exit(1)
 
+from jsonl_writer import JsonlWriter, output_path, write_sections
+from table_sampler import (
+    DEFAULT_CONFIDENCE,
+    SAMPLE_METHODS,
+    Z_SCORES,
+    field_statistics,
+    sample_table,
+)
+
 
 class RemoteDatabaseAnalyzer35:
     """Класс для анализа базы данных диспетчера (Python 3.5.4 совместимый)"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        sample_fraction=None,
+        sample_method="blocks",
+        confidence=DEFAULT_CONFIDENCE,
+    ):
         """Инициализация с настройками подключения"""
         self.config = {
             "host": "91.222.248.216",
@@ -36,6 +51,11 @@ class RemoteDatabaseAnalyzer35:
         }
         self.connection = None
         self.cursor = None
+        # Выборочный режим: значения полей по доле строк (см. table_sampler)
+        self.sample_fraction = sample_fraction
+        self.sample_method = sample_method
+        self.confidence = confidence
+        self.sample_info = None
 
     def connect(self):
         """Подключение к базе данных"""
@@ -131,6 +151,39 @@ class RemoteDatabaseAnalyzer35:
             print(f"❌ Ошибка получения значений поля {field_name}: {e}")
             return []
 
+    def sample_field_values(self, table_name, fields, limit=20):
+        """Частые значения и статистика полей по выборке строк"""
+        print(
+            f"   Выборка {self.sample_fraction:.1%} строк {table_name} ({self.sample_method})..."
+        )
+        started = time.time()
+        try:
+            sample = sample_table(
+                self.cursor,
+                table_name,
+                fields,
+                fraction=self.sample_fraction,
+                method=self.sample_method,
+            )
+        except Error as e:
+            print(f"❌ Ошибка выборки из таблицы {table_name}: {e}")
+            return {}, {}
+
+        self.sample_info = sample.info()
+        self.sample_info["seconds"] = round(time.time() - started, 3)
+        self.sample_info["confidence"] = self.confidence
+        print(
+            "   Получено {} строк за {} с".format(
+                self.sample_info["rows"], self.sample_info["seconds"]
+            )
+        )
+
+        statistics = field_statistics(sample, self.confidence, top_k=limit)
+        values = {}
+        for field, stats in statistics.items():
+            values[field] = stats.pop("unique_values")
+        return values, statistics
+
     def get_sample_data(self, table_name, date_filter=None, limit=10):
         """Получение примеров данных"""
         try:
@@ -178,11 +231,17 @@ class RemoteDatabaseAnalyzer35:
             "putlist№",
         ]
 
-        # Анализ значений полей
-        field_analysis = {}
-        for field in key_fields:
-            print(f"   Анализ поля: {field}")
-            field_analysis[field] = self.get_field_values("zanaradka", field)
+        # Анализ значений полей: по выборке или запросом на каждое поле
+        sampled_statistics = None
+        if self.sample_fraction:
+            field_analysis, sampled_statistics = self.sample_field_values(
+                "zanaradka", key_fields
+            )
+        else:
+            field_analysis = {}
+            for field in key_fields:
+                print(f"   Анализ поля: {field}")
+                field_analysis[field] = self.get_field_values("zanaradka", field)
 
         # Примеры данных
         sample_data = self.get_sample_data("zanaradka", limit=5)
@@ -216,6 +275,8 @@ class RemoteDatabaseAnalyzer35:
             "sample_data": sample_data,
             "date_specific_data": date_specific_data,
             "date_statistics": date_statistics,
+            "sampled_field_statistics": sampled_statistics,
+            "sampling": self.sample_info,
         }
 
     def create_field_mapping(self):
@@ -315,7 +376,9 @@ class RemoteDatabaseAnalyzer35:
 
         return recommendations
 
-    def save_analysis_results(self, analysis_data, output_dir="remote_py35_analysis"):
+    def save_analysis_results(
+        self, analysis_data, output_dir="remote_py35_analysis", compression=None
+    ):
         """Сохранение результатов анализа"""
         print(f"Сохранение результатов в папку: {output_dir}")
 
@@ -323,18 +386,10 @@ class RemoteDatabaseAnalyzer35:
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
-        # Сохранение в JSON для программной обработки
-        json_file = os.path.join(output_dir, "full_analysis.json")
-        with open(json_file, "w", encoding="utf-8") as f:
-            # Используем separators для Python 3.5 совместимости
-            json.dump(
-                analysis_data,
-                f,
-                ensure_ascii=False,
-                indent=2,
-                default=str,
-                separators=(",", ": "),
-            )
+        # Сохранение в JSONL для программной обработки, по разделу на запись
+        json_file = output_path(output_dir, "full_analysis", compression)
+        with JsonlWriter(json_file, compression) as writer:
+            write_sections(writer, analysis_data)
 
         # Сохранение читаемого отчета
         report_file = os.path.join(output_dir, "analysis_report.txt")
@@ -465,8 +520,24 @@ def main():
         f"Python версия: {sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}"
     )
 
+    parser = argparse.ArgumentParser(description="Анализ базы данных диспетчера")
+    parser.add_argument(
+        "--sample",
+        type=float,
+        help="Доля строк для выборочного анализа полей (например 0.01)",
+    )
+    parser.add_argument("--sample-method", choices=SAMPLE_METHODS, default="blocks")
+    parser.add_argument(
+        "--confidence", type=float, choices=sorted(Z_SCORES), default=DEFAULT_CONFIDENCE
+    )
+    args = parser.parse_args()
+
     # Запуск анализа
-    analyzer = RemoteDatabaseAnalyzer35()
+    analyzer = RemoteDatabaseAnalyzer35(
+        sample_fraction=args.sample,
+        sample_method=args.sample_method,
+        confidence=args.confidence,
+    )
     success = analyzer.run_full_analysis()
 
     if success:
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Table Sampler
+Выборочный анализ больших таблиц с доверительными интервалами
+
+Вместо полного сканирования читается небольшая выборка по первичному ключу,
+каждый запрос — поиск по индексу ключа:
+- "uniform": случайные значения ключа из [MIN(key), MAX(key)], найденные
+  строки образуют равномерную случайную выборку существующих строк
+- "blocks": диапазон ключей делится на страты, в каждой читается блок
+  подряд идущих строк со случайного места. Ключи zanaradka растут вместе с
+  data_day, поэтому выборка распределена по всем дням
+
+Выборка — набор кластеров (проба или блок) с охваченным диапазоном ключей.
+Количества оцениваются отношением (строк на значение ключа) с дисперсией по
+кластерам, интервалы — нормальное приближение. Число уникальных значений
+оценивается Chao1 без интервала, нижняя граница — число найденных в выборке
+(unique_in_sample). Для столбцов, значения которых идут группами по ключу
+(data_day), оно точнее по uniform-выборке: блок видит один-два дня.
+"""
+
+import math
+import random
+from collections import Counter
+from collections.abc import Callable, Sequence
+from typing import Any
+
+DEFAULT_FRACTION = 0.01
+DEFAULT_STRATA = 200
+DEFAULT_CONFIDENCE = 0.95
+SAMPLE_METHODS = ("blocks", "uniform")
+
+# Квантили нормального распределения для двусторонних интервалов
+Z_SCORES = {0.9: 1.645, 0.95: 1.96, 0.99: 2.576}
+
+# Ключей в одном запросе uniform-выборки
+_PROBE_BATCH = 1000
+
+
+def _quote(name: str) -> str:
+    return f"`{name}`"
+
+
+def _row_values(row: Any, columns: Sequence[str]) -> tuple[Any, ...]:
+    if isinstance(row, dict):
+        return tuple(row[column] for column in columns)
+    return tuple(row)
+
+
+class Cluster:
+    """Строки одной пробы или блока и охваченный ими диапазон ключей"""
+
+    def __init__(self, span: int, rows: list[tuple[Any, ...]]) -> None:
+        self.span = span
+        self.rows = rows
+
+
+class TableSample:
+    """Выборка таблицы: кластеры и размер диапазона ключей"""
+
+    def __init__(
+        self,
+        table: str,
+        columns: list[str],
+        method: str,
+        fraction: float,
+        key_range: int,
+        clusters: list[Cluster],
+    ) -> None:
+        self.table = table
+        self.columns = columns
+        self.method = method
+        self.fraction = fraction
+        self.key_range = key_range
+        self.clusters = clusters
+
+    @property
+    def rows(self) -> int:
+        return sum(len(cluster.rows) for cluster in self.clusters)
+
+    def _derive(self, columns: list[str], clusters: list[Cluster]) -> "TableSample":
+        return TableSample(
+            self.table, columns, self.method, self.fraction, self.key_range, clusters
+        )
+
+    def project(self, columns: Sequence[str]) -> "TableSample":
+        """Выборка тех же строк только с указанными столбцами"""
+        indexes = [self.columns.index(column) for column in columns]
+        return self._derive(
+            list(columns),
+            [
+                Cluster(c.span, [tuple(row[i] for i in indexes) for row in c.rows])
+                for c in self.clusters
+            ],
+        )
+
+    def filtered(self, column: str, predicate: Callable[[Any], bool]) -> "TableSample":
+        """Выборка строк, где predicate(значение столбца) истинно
+
+        Охват кластеров не меняется, поэтому оценки относятся к строкам
+        таблицы, удовлетворяющим условию (как WHERE в запросе).
+        """
+        index = self.columns.index(column)
+        return self._derive(
+            self.columns,
+            [
+                Cluster(c.span, [row for row in c.rows if predicate(row[index])])
+                for c in self.clusters
+            ],
+        )
+
+    def info(self) -> dict[str, Any]:
+        return {
+            "table": self.table,
+            "method": self.method,
+            "fraction": self.fraction,
+            "key_range": self.key_range,
+            "clusters": len(self.clusters),
+            "rows": self.rows,
+        }
+
+
+def key_bounds(cursor: Any, table: str, key: str = "key") -> tuple[Any, Any]:
+    """MIN и MAX первичного ключа (два поиска по индексу)"""
+    cursor.execute(
+        f"SELECT MIN({_quote(key)}) as min_key, MAX({_quote(key)}) as max_key "
+        f"FROM {table}"
+    )
+    row = cursor.fetchone()
+    if isinstance(row, dict):
+        return row["min_key"], row["max_key"]
+    return row[0], row[1]
+
+
+def sample_table(
+    cursor: Any,
+    table: str,
+    columns: Sequence[str],
+    fraction: float = DEFAULT_FRACTION,
+    method: str = "blocks",
+    key: str = "key",
+    strata: int = DEFAULT_STRATA,
+    seed: int | None = None,
+) -> TableSample:
+    """Выборка около fraction строк таблицы по первичному ключу"""
+    if method not in SAMPLE_METHODS:
+        raise ValueError(f"Неизвестный метод выборки: {method}")
+    if not 0 < fraction <= 1:
+        raise ValueError("Доля выборки должна быть в (0, 1]")
+
+    rng = random.Random(seed)
+    min_key, max_key = key_bounds(cursor, table, key)
+    if min_key is None:
+        return TableSample(table, columns, method, fraction, 0, [])
+    key_range = max_key - min_key + 1
+    select = ", ".join(_quote(column) for column in [key] + list(columns))
+    all_columns = [key] + list(columns)
+
+    clusters: list[Cluster] = []
+    if method == "uniform":
+        probe_count = min(key_range, max(2, round(fraction * key_range)))
+        probes = rng.sample(range(min_key, max_key + 1), probe_count)
+        for start in range(0, len(probes), _PROBE_BATCH):
+            batch = probes[start : start + _PROBE_BATCH]
+            placeholders = ", ".join(["%s"] * len(batch))
+            cursor.execute(
+                f"SELECT {select} FROM {table} WHERE {_quote(key)} IN ({placeholders})",
+                batch,
+            )
+            found: dict[Any, tuple[Any, ...]] = {}
+            for row in cursor.fetchall():
+                values = _row_values(row, all_columns)
+                found[values[0]] = values[1:]
+            clusters.extend(
+                Cluster(1, [found[probe]] if probe in found else []) for probe in batch
+            )
+    else:
+        strata = max(2, min(strata, key_range))
+        for i in range(strata):
+            low = min_key + key_range * i // strata
+            high = min_key + key_range * (i + 1) // strata
+            block_size = max(1, round(fraction * (high - low)))
+            start = rng.randint(low, max(low, high - block_size))
+            cursor.execute(
+                f"SELECT {select} FROM {table} "
+                f"WHERE {_quote(key)} >= %s AND {_quote(key)} < %s "
+                f"ORDER BY {_quote(key)} LIMIT %s",
+                (start, high, block_size),
+            )
+            rows = [_row_values(row, all_columns) for row in cursor.fetchall()]
+            # Блок заканчивается на последней строке, если набран полностью
+            end = rows[-1][0] + 1 if len(rows) == block_size else high
+            clusters.append(Cluster(end - start, [row[1:] for row in rows]))
+
+    return TableSample(table, list(columns), method, fraction, key_range, clusters)
+
+
+def ratio_interval(
+    ys: Sequence[float], xs: Sequence[float], z: float
+) -> tuple[float, float, float]:
+    """Оценка sum(y) / sum(x) по кластерам и ее доверительный интервал"""
+    total_x = sum(xs)
+    if not total_x:
+        return 0.0, 0.0, 0.0
+    ratio = sum(ys) / total_x
+    k = len(xs)
+    if k < 2:
+        return ratio, ratio, ratio
+    residuals = sum((y - ratio * x) ** 2 for y, x in zip(ys, xs))  # noqa: B905
+    error = z * math.sqrt(residuals / (k * (k - 1))) / (total_x / k)
+    return ratio, max(ratio - error, 0.0), ratio + error
+
+
+def _scaled(interval: tuple[float, float, float], scale: int) -> tuple[int, int, int]:
+    estimate, low, high = interval
+    return (
+        int(round(estimate * scale)),
+        int(round(low * scale)),
+        int(round(high * scale)),
+    )
+
+
+def estimate_distinct(frequencies: Counter[Any], population: int) -> int:
+    """Оценка числа уникальных значений по частотам в выборке (Chao1)
+
+    Значения, встреченные в выборке один раз (f1) и дважды (f2), оценивают
+    число не попавших в нее; результат не меньше найденных и не больше
+    population.
+    """
+    found = len(frequencies)
+    profile = Counter(frequencies.values())
+    f1 = profile.get(1, 0)
+    f2 = profile.get(2, 0)
+    estimate = found + f1 * (f1 - 1) / (2 * (f2 + 1))
+    return int(round(min(estimate, max(population, found))))
+
+
+def field_statistics(
+    sample: TableSample, confidence: float = DEFAULT_CONFIDENCE, top_k: int = 50
+) -> dict[str, dict[str, Any]]:
+    """Статистика полей по выборке в формате профиля полей
+
+    Количества даны оценкой и интервалом (*_low, *_high) для уровня
+    confidence; unique_values — самые частые значения выборки без NULL и
+    пустых строк с оценкой количества в таблице.
+    """
+    if confidence not in Z_SCORES:
+        raise ValueError(f"Уровень доверия должен быть одним из {sorted(Z_SCORES)}")
+    z = Z_SCORES[confidence]
+    spans = [cluster.span for cluster in sample.clusters]
+    sizes = [len(cluster.rows) for cluster in sample.clusters]
+    total = _scaled(ratio_interval(sizes, spans, z), sample.key_range)
+
+    results: dict[str, dict[str, Any]] = {}
+    for index, column in enumerate(sample.columns):
+        cluster_counts = [
+            Counter(row[index] for row in cluster.rows if row[index] is not None)
+            for cluster in sample.clusters
+        ]
+        frequencies: Counter[Any] = Counter()
+        for counts in cluster_counts:
+            frequencies.update(counts)
+        non_null = _scaled(
+            ratio_interval([sum(c.values()) for c in cluster_counts], spans, z),
+            sample.key_range,
+        )
+
+        candidates = sorted(
+            (item for item in frequencies.items() if item[0] != ""),
+            key=lambda item: (-item[1], item[0]),
+        )[:top_k]
+        unique_values: list[dict[str, Any]] = []
+        for value, _ in candidates:
+            ys = [counts[value] for counts in cluster_counts]
+            count, low, high = _scaled(ratio_interval(ys, spans, z), sample.key_range)
+            share = ratio_interval(ys, sizes, z)
+            unique_values.append(
+                {
+                    "value": value,
+                    "count": count,
+                    "count_low": low,
+                    "count_high": high,
+                    "share": round(share[0], 4),
+                }
+            )
+
+        results[column] = {
+            "unique_values": unique_values,
+            "statistics": {
+                "unique_count": estimate_distinct(frequencies, non_null[0]),
+                "unique_in_sample": len(frequencies),
+                "non_null_count": non_null[0],
+                "non_null_low": non_null[1],
+                "non_null_high": non_null[2],
+                "total_count": total[0],
+                "total_low": total[1],
+                "total_high": total[2],
+                "min_value": min(frequencies) if frequencies else None,
+                "max_value": max(frequencies) if frequencies else None,
+            },
+        }
+    return results